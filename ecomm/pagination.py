@@ -0,0 +1,241 @@
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db import connections
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+# Totals for paginated lists without a `COUNT(*)` per request.
+#
+# Counting every row that matches a filter costs more than fetching the page
+# once tables reach millions of rows, and clients rarely need the exact
+# figure. Paginators here let the client pick, with `?count=`:
+#
+# - `exact` runs `COUNT(*)`;
+# - `estimate` asks the PostgreSQL planner for its row estimate, or on other
+#   backends reuses an exact count cached per query for `ESTIMATE_TIMEOUT`;
+#   small estimates are replaced by an exact count, which is cheap there;
+# - `none` reports no total, only whether there is a next page.
+#
+# Whichever mode is used, the last page yields an exact total for free.
+
+COUNT_MODES = ["exact", "estimate", "none"]
+
+ESTIMATE_TIMEOUT = 5 * 60
+
+# Planner estimates below this are replaced by an exact count.
+EXACT_BELOW = 10000
+
+# For function-based views that paginate with `EstimatedCountPagination`.
+PAGINATION_PARAMETERS = [
+    OpenApiParameter("page", OpenApiTypes.INT, description="A page number within the paginated result set."),
+    OpenApiParameter("page_size", OpenApiTypes.INT, description="Number of results to return per page."),
+    OpenApiParameter(
+        "count", OpenApiTypes.STR, enum=COUNT_MODES,
+        description="How to count the total: `exact`, `estimate` (default) or `none`."
+    ),
+]
+
+
+def _planner_estimate(queryset, connection):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def estimate_count(queryset):
+    """
+    Return `(count, exact)` for `queryset` without necessarily counting its
+    rows: `exact` is False when `count` is an estimate or was cached.
+    """
+    queryset = queryset.order_by()
+    connection = connections[queryset.db]
+
+    if connection.vendor == "postgresql":
+        estimate = _planner_estimate(queryset.values("pk"), connection)
+        if estimate >= EXACT_BELOW:
+            return estimate, False
+        return queryset.count(), True
+
+    sql, params = queryset.query.sql_with_params()
+    digest = hashlib.md5(f"{queryset.db}:{sql}:{params!r}".encode("utf-8")).hexdigest()
+    key = f"pagination:count:{digest}"
+    count = cache.get(key)
+    if count is not None:
+        return count, False
+
+    count = queryset.count()
+    cache.set(key, count, ESTIMATE_TIMEOUT)
+    return count, True
+
+
+def is_paginated(request):
+    """
+    Return whether `request` asks for one page of a list that is otherwise
+    returned whole.
+    """
+    names = (EstimatedCountPagination.page_query_param, EstimatedCountPagination.page_size_query_param)
+    return any(name in request.query_params for name in names)
+
+
+class CountModeMixin:
+    """
+    Reads the `?count=` mode of a paginator and computes the total for it.
+    """
+    count_query_param = "count"
+    default_count_mode = "estimate"
+
+    def get_count_mode(self, request):
+        mode = request.query_params.get(self.count_query_param) or self.default_count_mode
+        if mode not in COUNT_MODES:
+            raise ValidationError({self.count_query_param: [f"Must be one of: {', '.join(COUNT_MODES)}."]})
+        return mode
+
+    def get_count(self, queryset, mode):
+        """
+        Return `(count, exact)` for `queryset` in `mode`, or `(None, False)`
+        for "none".
+        """
+        if mode == "exact":
+            return queryset.count(), True
+        if mode == "estimate":
+            return estimate_count(queryset)
+        return None, False
+
+    def get_count_schema(self):
+        return {
+            self.count_query_param: {"type": "integer", "nullable": True, "example": 123},
+            f"{self.count_query_param}_exact": {"type": "boolean"},
+        }
+
+    def get_count_schema_parameters(self):
+        return [{
+            "name": self.count_query_param,
+            "required": False,
+            "in": "query",
+            "description": "How to count the total: exact, estimate or none.",
+            "schema": {"type": "string", "enum": COUNT_MODES, "default": self.default_count_mode},
+        }]
+
+
+class EstimatedCountPagination(CountModeMixin, BasePagination):
+    """
+    Page-number pagination whose total is exact, estimated or left out, as
+    the client asks with `?count=` (see `COUNT_MODES`).
+
+    The page itself never depends on the total: one extra row is fetched to
+    find out whether a next page exists, and a page past the end is a 404
+    because it is empty, not because of the count. `fetch` turns the sliced
+    queryset into the page's rows; it defaults to `list`, and views that
+    serialize from `values_list()` rows pass their serializer instead.
+    """
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    page_query_param = "page"
+    invalid_page_message = "Invalid page."
+
+    def __init__(self, fetch=list):
+        self.fetch = fetch
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return min(page_size, self.max_page_size) if page_size > 0 else self.page_size
+
+    def get_page_number(self, request):
+        try:
+            number = int(request.query_params.get(self.page_query_param, 1))
+        except ValueError:
+            raise NotFound(self.invalid_page_message)
+        if number < 1:
+            raise NotFound(self.invalid_page_message)
+        return number
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.number = self.get_page_number(request)
+        mode = self.get_count_mode(request)
+
+        offset = (self.number - 1) * self.page_size
+        # Fetch one extra row to find out whether there is a following page.
+        results = self.fetch(queryset[offset:offset + self.page_size + 1])
+        if not results and self.number > 1:
+            raise NotFound(self.invalid_page_message)
+
+        self.page = results[:self.page_size]
+        self.has_next = len(results) > self.page_size
+        if self.has_next:
+            self.count, self.count_exact = self.get_count(queryset, mode)
+            # An estimate cannot end before the rows already seen.
+            if self.count is not None:
+                self.count = max(self.count, offset + len(results))
+        else:
+            self.count, self.count_exact = offset + len(self.page), True
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.page_query_param, self.number + 1)
+
+    def get_previous_link(self):
+        if self.number == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.number - 1)
+
+    def get_paginated_response(self, data):
+        return Response({
+            self.count_query_param: self.count,
+            f"{self.count_query_param}_exact": self.count_exact,
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                **self.get_count_schema(),
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.page_query_param,
+                "required": False,
+                "in": "query",
+                "description": "A page number within the paginated result set.",
+                "schema": {"type": "integer"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+            *self.get_count_schema_parameters(),
+        ]
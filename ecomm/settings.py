@@ -93,6 +93,30 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'ecomm',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+    # Version stamps of the catalog caches (see products_app.cache). Every
+    # worker process has to read the same stamps, so this cache must be
+    # shared: the file cache is shared by the processes of one host, and
+    # deployments spanning several hosts point it at Redis or Memcached.
+    # Stamps must not expire: `incr()` rewrites them with this timeout.
+    'versions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'versions',
+        'TIMEOUT': None,
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
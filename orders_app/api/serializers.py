@@ -1,7 +1,10 @@
+from django.db import transaction
 from rest_framework import serializers
 
 from cart_app.models import CartItem
 from orders_app.models import *
+from orders_app.sales import (BESTSELLER_DAYS, MAX_DAYS, MAX_LIMIT,
+                              TRENDING_DAYS, record_sales, withdraw_sales)
 
 
 class OrderCreateSerializer(serializers.ModelSerializer):
@@ -10,6 +13,7 @@ class OrderCreateSerializer(serializers.ModelSerializer):
         model = Order
         fields = fields = ["id", "created_at", "updated_at", "status"]
     
+    @transaction.atomic
     def create(self, validated_data):
         user = self.context["request"].user
         
@@ -38,6 +42,22 @@ class OrderCreateSerializer(serializers.ModelSerializer):
         
         cart_items.delete()
         
+        record_sales(order)
+        
+        return order
+    
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        # Read under lock, so that two concurrent changes cannot both
+        # withdraw the order's sales.
+        previous = Order.objects.select_for_update().values_list("status", flat=True).get(pk=instance.pk)
+        order = super().update(instance, validated_data)
+        
+        if previous != "cancelled" and order.status == "cancelled":
+            withdraw_sales(order)
+        elif previous == "cancelled" and order.status != "cancelled":
+            record_sales(order)
+        
         return order
 
 class OrderViewSerializer(serializers.ModelSerializer):
@@ -56,4 +76,36 @@ class ShippingAddressSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = ShippingAddress
-        fields = "__all__"
\ No newline at end of file
+        fields = "__all__"
+
+class FrequentlyBoughtTogetherSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source="recommended_id")
+    name = serializers.CharField(source="recommended.name")
+    price = serializers.DecimalField(source="recommended.price", max_digits=6, decimal_places=2)
+    
+    class Meta:
+        model = FrequentlyBoughtTogether
+        fields = ["id", "name", "price", "count"]
+
+class ProductSalesQuerySerializer(serializers.Serializer):
+    days = serializers.IntegerField(min_value=1, max_value=MAX_DAYS, default=BESTSELLER_DAYS)
+    category = serializers.IntegerField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=MAX_LIMIT, default=10)
+
+class TrendingQuerySerializer(serializers.Serializer):
+    days = serializers.IntegerField(min_value=1, max_value=MAX_DAYS, default=TRENDING_DAYS)
+    limit = serializers.IntegerField(min_value=1, max_value=MAX_LIMIT, default=10)
+
+class ProductSalesSerializer(serializers.Serializer):
+    id = serializers.IntegerField(source="product_id")
+    name = serializers.CharField(source="product__name")
+    price = serializers.DecimalField(source="product__price", max_digits=6, decimal_places=2)
+    quantity = serializers.IntegerField(source="total_quantity")
+    orders = serializers.IntegerField(source="total_orders")
+
+class TrendingProductSerializer(serializers.Serializer):
+    id = serializers.IntegerField(source="product_id")
+    name = serializers.CharField(source="product__name")
+    price = serializers.DecimalField(source="product__price", max_digits=6, decimal_places=2)
+    quantity = serializers.IntegerField(source="total_quantity")
+    previous_quantity = serializers.IntegerField()
@@ -9,4 +9,7 @@ urlpatterns = [
     path("user/<int:pk>/", retrieve_single_order_view_user, name="order-single-user"),
     path("checkout/<int:pk>/", checkout_cart_view, name="cart-checkout"),
     path("<int:pk>/status/", change_order_status_view, name="order-change-status"),
+    path("recommendations/<int:pk>/", frequently_bought_together_view, name="product-recommendations"),
+    path("bestsellers/", bestsellers_view, name="product-bestsellers"),
+    path("trending/", trending_view, name="product-trending"),
 ]
\ No newline at end of file
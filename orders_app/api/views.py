@@ -6,13 +6,20 @@ from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 
 from cart_app.models import *
+from ecomm.fast_serialization import serialize_queryset
+from ecomm.pagination import (PAGINATION_PARAMETERS, EstimatedCountPagination,
+                              is_paginated)
+from orders_app.sales import bestsellers, trending
+from products_app.deletion import visible_products
 
 from .serializers import *
 
 
 @extend_schema(
+    parameters=PAGINATION_PARAMETERS,
     responses={200: OrderViewSerializer(many=True)},
-    description="List all orders. Accessible only to admin users."
+    description="List all orders. Accessible only to admin users. Passing `page` or `page_size` "
+                "returns one page with an exact, estimated or no total, as chosen with `count`."
 )
 @api_view(["GET"])
 @permission_classes([IsAdminUser])
@@ -22,9 +29,14 @@ def list_orders_view(request):
     """
     orders = Order.objects.all()
     
-    serializer = OrderViewSerializer(orders, many=True)
+    if is_paginated(request):
+        paginator = EstimatedCountPagination(fetch=lambda page: serialize_queryset(OrderViewSerializer(), page))
+        data = paginator.paginate_queryset(orders.order_by("-pk"), request)
+        return paginator.get_paginated_response(data)
     
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    data = serialize_queryset(OrderViewSerializer(), orders)
+    
+    return Response(data, status=status.HTTP_200_OK)
 
 
 @extend_schema(
@@ -127,3 +139,61 @@ def change_order_status_view(request, pk):
         return Response(serializer.data)
     else:
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@extend_schema(
+    responses={200: FrequentlyBoughtTogetherSerializer(many=True)},
+    description="List the products most often bought together with a product, as of the last "
+                "`build_recommendations` run."
+)
+@api_view(["GET"])
+def frequently_bought_together_view(request, pk):
+    """
+    List the products most often bought together with a product.
+    """
+    recommendations = (
+        visible_products(FrequentlyBoughtTogether.objects.filter(product_id=pk), "recommended__").order_by("rank")
+        .select_related("recommended").only("recommended_id", "count", "recommended__name", "recommended__price")
+    )
+    serializer = FrequentlyBoughtTogetherSerializer(recommendations, many=True)
+    return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+@extend_schema(
+    parameters=[ProductSalesQuerySerializer],
+    responses={200: ProductSalesSerializer(many=True), 400: OpenApiResponse(description="Bad Request")},
+    description="List the products that sold the most units over the last `days` days, optionally "
+                "within one category."
+)
+@api_view(["GET"])
+def bestsellers_view(request):
+    """
+    List the best-selling products.
+    """
+    serializer = ProductSalesQuerySerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    params = serializer.validated_data
+    products = bestsellers(days=params["days"], category_id=params.get("category"), limit=params["limit"])
+    return Response(ProductSalesSerializer(products, many=True).data, status=status.HTTP_200_OK)
+
+
+@extend_schema(
+    parameters=[TrendingQuerySerializer],
+    responses={200: TrendingProductSerializer(many=True), 400: OpenApiResponse(description="Bad Request")},
+    description="List the products whose sales over the last `days` days grew the most compared with "
+                "the `days` days before."
+)
+@api_view(["GET"])
+def trending_view(request):
+    """
+    List the trending products.
+    """
+    serializer = TrendingQuerySerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    params = serializer.validated_data
+    products = trending(days=params["days"], limit=params["limit"])
+    return Response(TrendingProductSerializer(products, many=True).data, status=status.HTTP_200_OK)
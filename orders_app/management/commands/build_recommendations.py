@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from orders_app.recommendations import CHUNK_SIZE, build_recommendations
+
+
+class Command(BaseCommand):
+    help = ("Fold the orders created since the last run into the product co-occurrence counts and "
+            "rebuild the \"frequently bought together\" recommendations of the products involved.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Number of orders folded per transaction.")
+
+    def handle(self, *args, **options):
+        run = build_recommendations(chunk_size=options["chunk_size"])
+        if run is None:
+            self.stdout.write(self.style.WARNING("Another run is folding orders; nothing was done."))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Folded {run.orders} orders ({run.pairs} product pairs) up to order {run.last_order_id}."
+        ))
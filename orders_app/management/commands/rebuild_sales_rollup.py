@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from orders_app.sales import rebuild_sales
+
+
+class Command(BaseCommand):
+    help = ("Recompute the daily product sales rollup behind the bestseller and trending lists from "
+            "every order item. Checkout keeps it up to date; this fills it for older orders.")
+
+    def handle(self, *args, **options):
+        rows = rebuild_sales()
+        self.stdout.write(self.style.SUCCESS(f"Wrote {rows} daily sales rows."))
@@ -0,0 +1,54 @@
+# Generated by Django 5.0.1 on 2026-10-18 02:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders_app', '0003_alter_order_status'),
+        ('products_app', '0012_listing_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecommendationRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('first_order_id', models.BigIntegerField(default=0)),
+                ('last_order_id', models.BigIntegerField(default=0)),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('pairs', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FrequentlyBoughtTogether',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField()),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('product', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products_app.product')),
+                ('recommended', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products_app.product')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ProductPairCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField()),
+                ('other', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products_app.product')),
+                ('product', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products_app.product')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='frequentlyboughttogether',
+            constraint=models.UniqueConstraint(fields=('product', 'rank'), name='bought_together_rank_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='productpaircount',
+            constraint=models.UniqueConstraint(fields=('product', 'other'), name='product_pair_unique'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.1 on 2026-10-18 02:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders_app', '0004_product_pair_counts'),
+        ('products_app', '0012_listing_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSalesDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('quantity', models.PositiveIntegerField(default=0)),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('product', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products_app.product')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='productsalesdaily',
+            constraint=models.UniqueConstraint(fields=('day', 'product'), name='product_sales_day_unique'),
+        ),
+    ]
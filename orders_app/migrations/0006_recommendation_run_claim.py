@@ -0,0 +1,27 @@
+# Generated by Django 5.0.1 on 2026-10-18 03:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders_app', '0005_product_sales_daily'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recommendationrun',
+            name='running',
+            field=models.BooleanField(default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name='recommendationrun',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddConstraint(
+            model_name='recommendationrun',
+            constraint=models.UniqueConstraint(fields=('running',), name='recommendation_run_single_running'),
+        ),
+    ]
@@ -32,4 +32,74 @@ class ShippingAddress(models.Model):
     city = models.CharField(max_length=10)
     state = models.CharField(max_length=10)
     postal_code = models.PositiveSmallIntegerField()
-    country = models.CharField(max_length=10)
\ No newline at end of file
+    country = models.CharField(max_length=10)
+
+class ProductPairCount(models.Model):
+    """
+    The number of orders containing both products. Every pair is stored in
+    both directions, so that a product's neighbours are one index range.
+    """
+    product = models.ForeignKey(Product, models.CASCADE, related_name="+", db_index=False)
+    other = models.ForeignKey(Product, models.CASCADE, related_name="+")
+    count = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["product", "other"], name="product_pair_unique"),
+        ]
+
+class FrequentlyBoughtTogether(models.Model):
+    """
+    The top neighbours of each product in `ProductPairCount`, by rank.
+    """
+    product = models.ForeignKey(Product, models.CASCADE, related_name="+", db_index=False)
+    recommended = models.ForeignKey(Product, models.CASCADE, related_name="+")
+    count = models.PositiveIntegerField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["product", "rank"], name="bought_together_rank_unique"),
+        ]
+
+class RecommendationRun(models.Model):
+    """
+    A run of the co-occurrence job, which folded in the orders after
+    `first_order_id` up to `last_order_id`.
+
+    `running` is True for the one run allowed to fold orders at a time and
+    None otherwise; the unique constraint ignores NULLs.
+    """
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    running = models.BooleanField(null=True, default=None)
+    first_order_id = models.BigIntegerField(default=0)
+    last_order_id = models.BigIntegerField(default=0)
+    orders = models.PositiveIntegerField(default=0)
+    pairs = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["running"], name="recommendation_run_single_running"),
+        ]
+
+
+class ProductSalesDaily(models.Model):
+    """
+    The units of a product sold, and the orders they were sold in, on one
+    day. Cancelled orders are not counted.
+
+    Rows are keyed by day first, so that a ranking reads one range of days.
+    The product column has no index of its own: SQLite would scan all of it
+    to group by product rather than read the range.
+    """
+    product = models.ForeignKey(Product, models.CASCADE, related_name="+", db_index=False)
+    day = models.DateField()
+    quantity = models.PositiveIntegerField(default=0)
+    orders = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "product"], name="product_sales_day_unique"),
+        ]
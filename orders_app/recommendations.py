@@ -0,0 +1,208 @@
+import heapq
+from array import array
+from collections import defaultdict
+from datetime import timedelta
+from itertools import groupby
+from operator import itemgetter
+
+from django.db import IntegrityError, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from orders_app.models import (FrequentlyBoughtTogether, Order, OrderItem,
+                               ProductPairCount, RecommendationRun)
+
+# "Frequently bought together", precomputed from order co-occurrence.
+#
+# `build_recommendations` folds the orders created since the previous run
+# into `ProductPairCount`, chunk by chunk. The product pairs of a chunk are
+# packed into 64-bit keys (`product << 32 | other`) in an `array`, sorted,
+# and counted run by run, so even large chunks hold one integer per pair
+# occurrence. The counts are added to the stored ones in the database
+# (`INSERT ... ON CONFLICT DO UPDATE`), and once every chunk is in, the top
+# `TOP_K` neighbours of every product touched are rewritten into
+# `FrequentlyBoughtTogether`, which the product page reads with a single
+# indexed query.
+#
+# Each chunk is committed together with the run's watermark, so an
+# interrupted run resumes after the last chunk it completed; the next run
+# also rebuilds the recommendations of every order folded since the last
+# run that finished. Only one run folds orders at a time: a run claims the
+# unique `running` flag when it starts, and each chunk is only committed
+# while the claim is still its own. A run that has not committed for
+# `STALE_AFTER` is taken to have died, and the next run takes its claim.
+#
+# Orders are only folded in once they are `SETTLE_DELAY` old, since
+# checkout writes the order before its items. Cancelled orders are skipped,
+# but an order cancelled after it was folded in stays counted: unlike the
+# sales rollup, the pair counts are not corrected on cancellation. They
+# only rank neighbours, which a few late cancellations barely move.
+
+TOP_K = 10
+
+CHUNK_SIZE = 5000
+
+SETTLE_DELAY = timedelta(minutes=5)
+
+STALE_AFTER = timedelta(minutes=30)
+
+# Orders with more distinct products than this are bulk purchases that say
+# little about what goes together, and cost a quadratic number of pairs.
+MAX_ORDER_PRODUCTS = 50
+
+# Keeps `__in` lists below the SQLite variable limit.
+BATCH_SIZE = 500
+
+
+def pair_counts(items):
+    """
+    Count the product pairs in `(order_id, product_id)` rows sorted by
+    order. Returns `(product, other, count)` triples with `product < other`.
+    """
+    keys = array("q")
+    for _, rows in groupby(items, key=itemgetter(0)):
+        products = sorted({product_id for _, product_id in rows})
+        if len(products) > MAX_ORDER_PRODUCTS:
+            continue
+        for index, product in enumerate(products):
+            keys.extend(product << 32 | other for other in products[index + 1:])
+
+    keys = array("q", sorted(keys))
+    return [(key >> 32, key & 0xFFFFFFFF, sum(1 for _ in run)) for key, run in groupby(keys)]
+
+
+def fold_pairs(pairs, using="default"):
+    """
+    Add `(product, other, count)` triples to the stored pair counts, in
+    both directions.
+    """
+    connection = connections[using]
+    table = connection.ops.quote_name(ProductPairCount._meta.db_table)
+    count = connection.ops.quote_name("count")
+    rows = [row for product, other, n in pairs for row in ((product, other, n), (other, product, n))]
+
+    # Adding to the stored count in the upsert itself means the existing
+    # counts never have to be read back.
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {table} (product_id, other_id, {count}) VALUES (%s, %s, %s) "
+            f"ON CONFLICT (product_id, other_id) DO UPDATE SET {count} = {table}.{count} + excluded.{count}",
+            rows
+        )
+
+
+def rebuild_top_neighbours(products):
+    """
+    Rewrite the recommendations of `products` from their pair counts.
+    """
+    products = sorted(products)
+    for start in range(0, len(products), BATCH_SIZE):
+        batch = products[start:start + BATCH_SIZE]
+        neighbours = defaultdict(list)
+        rows = ProductPairCount.objects.filter(product_id__in=batch).values_list("product_id", "other_id", "count")
+        for product, other, count in rows:
+            neighbours[product].append((other, count))
+
+        recommendations = []
+        for product, candidates in neighbours.items():
+            top = heapq.nsmallest(TOP_K, candidates, key=lambda item: (-item[1], item[0]))
+            recommendations += [
+                FrequentlyBoughtTogether(product_id=product, recommended_id=other, count=count, rank=rank)
+                for rank, (other, count) in enumerate(top, 1)
+            ]
+
+        with transaction.atomic():
+            FrequentlyBoughtTogether.objects.filter(product_id__in=batch).delete()
+            FrequentlyBoughtTogether.objects.bulk_create(recommendations)
+
+
+def ordered_products(first_order_id, last_order_id):
+    """
+    Return the ids of the products ordered in orders after `first_order_id`
+    up to `last_order_id`.
+    """
+    items = OrderItem.objects.filter(order_id__gt=first_order_id, order_id__lte=last_order_id)
+    return set(items.values_list("product_id", flat=True).distinct())
+
+
+def claim_run():
+    """
+    Start a run holding the claim to fold orders, or return None if another
+    run holds it.
+    """
+    RecommendationRun.objects.filter(running=True, updated_at__lt=timezone.now() - STALE_AFTER).update(running=None)
+    try:
+        with transaction.atomic():
+            run = RecommendationRun.objects.create(running=True)
+    except IntegrityError:
+        return None
+
+    # Read once the claim is held, so that the previous run has written its
+    # last watermark.
+    previous = RecommendationRun.objects.exclude(pk=run.pk).order_by("-pk").first()
+    run.first_order_id = run.last_order_id = previous.last_order_id if previous is not None else 0
+    run.save(update_fields=["first_order_id", "last_order_id", "updated_at"])
+    return run
+
+
+def build_recommendations(chunk_size=CHUNK_SIZE, now=None):
+    """
+    Fold every settled order created since the last run into the
+    recommendations and return the `RecommendationRun`, or None if another
+    run is folding orders.
+    """
+    run = claim_run()
+    if run is None:
+        return None
+    try:
+        return _build(run, chunk_size, (now or timezone.now()) - SETTLE_DELAY)
+    except Exception:
+        # Leave the claim to the next run rather than block it until stale.
+        RecommendationRun.objects.filter(pk=run.pk, running=True).update(running=None)
+        raise
+
+
+def _build(run, chunk_size, cutoff):
+    affected = set()
+    finished = RecommendationRun.objects.filter(finished_at__isnull=False).order_by("-pk").first()
+    rebuilt_until = finished.last_order_id if finished is not None else 0
+    if run.first_order_id > rebuilt_until:
+        # Folded by runs that were interrupted before rebuilding their
+        # recommendations.
+        affected |= ordered_products(rebuilt_until, run.first_order_id)
+
+    while True:
+        orders = list(
+            Order.objects.filter(pk__gt=run.last_order_id, created_at__lte=cutoff)
+            .order_by("pk").values_list("pk", "status")[:chunk_size]
+        )
+        if not orders:
+            break
+
+        order_ids = [pk for pk, status in orders if status != "cancelled"]
+        items = []
+        for start in range(0, len(order_ids), BATCH_SIZE):
+            items += OrderItem.objects.filter(order_id__in=order_ids[start:start + BATCH_SIZE]).order_by(
+                "order_id"
+            ).values_list("order_id", "product_id")
+        pairs = pair_counts(items)
+
+        with transaction.atomic():
+            claimed = RecommendationRun.objects.filter(pk=run.pk, running=True).update(
+                last_order_id=orders[-1][0], orders=F("orders") + len(orders), pairs=F("pairs") + len(pairs),
+                updated_at=timezone.now()
+            )
+            if not claimed:
+                # Taken over by a later run; this chunk is left to it.
+                return None
+            fold_pairs(pairs)
+        run.last_order_id = orders[-1][0]
+        run.orders += len(orders)
+        run.pairs += len(pairs)
+        affected.update(product for pair in pairs for product in pair[:2])
+
+    rebuild_top_neighbours(affected)
+    run.finished_at = timezone.now()
+    RecommendationRun.objects.filter(pk=run.pk).update(running=None, finished_at=run.finished_at)
+    run.running = None
+    return run
@@ -0,0 +1,144 @@
+from collections import defaultdict
+from datetime import timedelta
+from itertools import islice
+
+from django.db import connections, transaction
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, TruncDate
+from django.utils import timezone
+
+from orders_app.models import OrderItem, ProductSalesDaily
+from products_app.deletion import visible_products
+
+# Bestseller and trending lists from a daily sales rollup.
+#
+# Checkout adds the units of every product ordered to that product's bucket
+# for the day in `ProductSalesDaily`; cancelling an order takes them out of
+# the bucket of the day it was placed, and reinstating it puts them back.
+# The rankings then read the window's range of days and sum at most one row
+# per product and day, so their cost depends on the catalog and the window,
+# not on the number of orders. `rebuild_sales` recomputes the whole table
+# from the order items, to fill it for orders placed before it existed.
+
+BESTSELLER_DAYS = 30
+
+TRENDING_DAYS = 7
+
+MAX_DAYS = 365
+
+MAX_LIMIT = 50
+
+BATCH_SIZE = 1000
+
+
+def order_quantities(order):
+    """
+    Return the units of each product in `order`.
+    """
+    quantities = defaultdict(int)
+    for product_id, quantity in OrderItem.objects.filter(order=order).values_list("product_id", "quantity"):
+        quantities[product_id] += quantity
+    return quantities
+
+
+def record_sales(order, using="default"):
+    """
+    Add the items of `order` to the rollup.
+    """
+    connection = connections[using]
+    day = connection.ops.adapt_datefield_value(timezone.localdate(order.created_at))
+    rows = [(day, product_id, quantity, 1) for product_id, quantity in order_quantities(order).items()]
+
+    table = connection.ops.quote_name(ProductSalesDaily._meta.db_table)
+    # Concurrent checkouts of the same product add to the same row, so the
+    # increment happens in the upsert rather than after a read.
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {table} (day, product_id, quantity, orders) VALUES (%s, %s, %s, %s) "
+            f"ON CONFLICT (day, product_id) DO UPDATE SET "
+            f"quantity = {table}.quantity + excluded.quantity, orders = {table}.orders + excluded.orders",
+            rows
+        )
+
+
+def withdraw_sales(order):
+    """
+    Take the items of `order` back out of the rollup.
+    """
+    day = timezone.localdate(order.created_at)
+    for product_id, quantity in order_quantities(order).items():
+        ProductSalesDaily.objects.filter(product_id=product_id, day=day).update(
+            quantity=Greatest(F("quantity") - quantity, Value(0)),
+            orders=Greatest(F("orders") - 1, Value(0))
+        )
+
+
+def rebuild_sales():
+    """
+    Recompute the rollup from every order item and return the number of
+    rows written.
+    """
+    buckets = (
+        OrderItem.objects.exclude(order__status="cancelled")
+        .annotate(day=TruncDate("order__created_at"))
+        .values("product_id", "day").order_by()
+        .annotate(total=Sum("quantity"), order_count=Count("order_id", distinct=True))
+        .values_list("product_id", "day", "total", "order_count")
+    )
+
+    written = 0
+    with transaction.atomic():
+        ProductSalesDaily.objects.all().delete()
+        rows = buckets.iterator(chunk_size=BATCH_SIZE)
+        # Written a chunk at a time, so memory does not grow with the
+        # order history.
+        while chunk := list(islice(rows, BATCH_SIZE)):
+            ProductSalesDaily.objects.bulk_create(
+                ProductSalesDaily(product_id=product_id, day=day, quantity=quantity, orders=orders)
+                for product_id, day, quantity, orders in chunk
+            )
+            written += len(chunk)
+    return written
+
+
+def window_start(days, today=None):
+    return (today or timezone.localdate()) - timedelta(days=days - 1)
+
+
+def bestsellers(days=BESTSELLER_DAYS, category_id=None, limit=10, today=None):
+    """
+    Return the products that sold the most units over the last `days` days,
+    today included, optionally within one category. Products of brands and
+    categories being deleted are left out.
+    """
+    sales = ProductSalesDaily.objects.filter(day__gte=window_start(days, today), quantity__gt=0)
+    sales = visible_products(sales, "product__")
+    if category_id is not None:
+        sales = sales.filter(product__category_id=category_id)
+
+    return list(
+        sales.values("product_id", "product__name", "product__price")
+        .annotate(total_quantity=Sum("quantity"), total_orders=Sum("orders"))
+        .order_by("-total_quantity", "product_id")[:limit]
+    )
+
+
+def trending(days=TRENDING_DAYS, limit=10, today=None):
+    """
+    Return the products whose sales over the last `days` days grew the most
+    over the `days` days before, among those sold in the last `days` days.
+    Products of brands and categories being deleted are left out.
+    """
+    since = window_start(days, today)
+    recent = Coalesce(Sum("quantity", filter=Q(day__gte=since)), 0)
+    previous = Coalesce(Sum("quantity", filter=Q(day__lt=since)), 0)
+
+    sales = visible_products(ProductSalesDaily.objects.filter(day__gte=since - timedelta(days=days)), "product__")
+
+    return list(
+        sales.values("product_id", "product__name", "product__price")
+        .annotate(total_quantity=recent, previous_quantity=previous)
+        .filter(total_quantity__gt=0)
+        .annotate(growth=F("total_quantity") - F("previous_quantity"))
+        .order_by("-growth", "-total_quantity", "product_id")[:limit]
+    )
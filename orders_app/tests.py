@@ -1,11 +1,21 @@
+from datetime import timedelta
+from unittest.mock import patch
+
 from django.contrib.auth.models import User
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
 
 from cart_app.models import *
-from orders_app.api.serializers import OrderCreateSerializer
+from orders_app.api.serializers import (OrderCreateSerializer,
+                                        OrderViewSerializer)
+from orders_app.recommendations import (SETTLE_DELAY, STALE_AFTER,
+                                        build_recommendations)
+from orders_app.sales import rebuild_sales
+from products_app.cache import bump_version
 from products_app.models import *
 
 from .models import *
@@ -67,6 +77,9 @@ class OrderTestCase(APITestCase):
         response = self.client.get(reverse("orders"))
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.content, JSONRenderer().render(OrderViewSerializer(Order.objects.all(), many=True).data)
+        )
 
     def test_view_orders_user(self):
         """
@@ -154,6 +167,23 @@ class OrderTestCase(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 
+    def test_list_orders_paginated_without_count(self):
+        """
+        Test paging through all orders as an admin without counting them.
+        """
+        self.client.force_authenticate(self.admin_user)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("orders"), {"page_size": 1, "count": "none"})
+
+        self.assertEqual([order["id"] for order in response.data["results"]], [self.order_user.id])
+        self.assertIsNone(response.data["count"])
+        self.assertIsNotNone(response.data["next"])
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual([order["id"] for order in response.data["results"]], [self.order_admin.id])
+        self.assertEqual((response.data["count"], response.data["count_exact"]), (2, True))
+
     def test_change_order_status_200(self):
         """
         Test changing the status of an order as an admin (valid data).
@@ -184,4 +214,261 @@ class OrderTestCase(APITestCase):
 
         response = self.client.patch(reverse("order-change-status", args=(self.order_admin.id,)), data)
 
-        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class RecommendationTestCase(APITestCase):
+    """
+    Test case for the "frequently bought together" recommendations.
+    """
+
+    def setUp(self):
+        """
+        Set up test data including a user and four products.
+        """
+        self.user = User.objects.create_user(username="test_user", password="password")
+        brand = Brand.objects.create(name="Test Brand", description="Test Description")
+        category = Category.objects.create(name="Test Category", description="Test Description")
+        self.a, self.b, self.c, self.d = [
+            Product.objects.create(
+                name=f"Product {name}",
+                description="Test Description",
+                price=9.99,
+                stock=10,
+                category=category,
+                brand=brand
+            )
+            for name in "ABCD"
+        ]
+
+    def place_order(self, products, status="delivered"):
+        order = Order.objects.create(user=self.user, total_price=10, status=status)
+        for product in products:
+            OrderItem.objects.create(order=order, product=product, quantity=1, price=9.99)
+        return order
+
+    def build(self):
+        return build_recommendations(now=timezone.now() + SETTLE_DELAY)
+
+    def recommended(self, product):
+        response = self.client.get(reverse("product-recommendations", args=(product.id,)))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(entry["id"], entry["count"]) for entry in response.data]
+
+    def test_recommendations_built_from_orders(self):
+        """
+        Test that neighbours are ranked by co-occurrence and cancelled orders are ignored.
+        """
+        self.place_order([self.a, self.b, self.c])
+        self.place_order([self.a, self.b, self.b])
+        self.place_order([self.a, self.d])
+        self.place_order([self.a, self.c], status="cancelled")
+
+        run = self.build()
+
+        self.assertEqual(run.orders, 4)
+        self.assertEqual(self.recommended(self.a), [(self.b.id, 2), (self.c.id, 1), (self.d.id, 1)])
+        self.assertEqual(self.recommended(self.d), [(self.a.id, 1)])
+        with self.assertNumQueries(1):
+            self.client.get(reverse("product-recommendations", args=(self.a.id,)))
+
+    def test_products_being_deleted_not_recommended(self):
+        """
+        Test that products of a brand being deleted are left out of the recommendations.
+        """
+        self.place_order([self.a, self.b])
+        self.build()
+        brand = Brand.objects.create(name="Other Brand", description="Test Description")
+        Product.objects.filter(pk=self.b.pk).update(brand=brand)
+        Brand.objects.filter(pk=brand.pk).update(is_deleting=True)
+        bump_version("brand")
+
+        self.assertEqual(self.recommended(self.a), [])
+
+    def test_recommendations_incremental(self):
+        """
+        Test that a second run only folds in the orders placed since the first one.
+        """
+        self.place_order([self.a, self.b])
+        self.build()
+        self.place_order([self.a, self.c])
+        self.place_order([self.a, self.c])
+
+        run = self.build()
+
+        self.assertEqual(run.orders, 2)
+        self.assertEqual(self.recommended(self.a), [(self.c.id, 2), (self.b.id, 1)])
+        self.assertEqual(self.recommended(self.b), [(self.a.id, 1)])
+
+    def test_recent_orders_wait_to_settle(self):
+        """
+        Test that orders younger than the settle delay are left for a later run.
+        """
+        self.place_order([self.a, self.b])
+
+        run = build_recommendations()
+
+        self.assertEqual(run.orders, 0)
+        self.assertEqual(self.recommended(self.a), [])
+
+
+    def test_single_run_at_a_time(self):
+        """
+        Test that a run is refused while another holds the claim, until that claim goes stale.
+        """
+        self.place_order([self.a, self.b])
+        holder = RecommendationRun.objects.create(running=True)
+
+        self.assertIsNone(self.build())
+
+        RecommendationRun.objects.filter(pk=holder.pk).update(updated_at=timezone.now() - STALE_AFTER - timedelta(minutes=1))
+        run = self.build()
+        self.assertEqual(run.orders, 1)
+        self.assertEqual(self.recommended(self.a), [(self.b.id, 1)])
+
+    def test_interrupted_runs_rebuilt_by_next_run(self):
+        """
+        Test that the recommendations of every run interrupted since the last finished one are rebuilt.
+        """
+        self.place_order([self.a, self.b])
+        with patch("orders_app.recommendations.rebuild_top_neighbours", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.build()
+            self.place_order([self.c, self.d])
+            with self.assertRaises(RuntimeError):
+                self.build()
+
+        run = self.build()
+
+        self.assertEqual(run.orders, 0)
+        self.assertEqual(self.recommended(self.a), [(self.b.id, 1)])
+        self.assertEqual(self.recommended(self.c), [(self.d.id, 1)])
+
+
+class SalesRollupTestCase(APITestCase):
+    """
+    Test case for the daily sales rollup and the bestseller and trending lists.
+    """
+
+    def setUp(self):
+        """
+        Set up test data including an admin, a user with a cart and three products in two categories.
+        """
+        self.admin_user = User.objects.create_superuser(username="test_admin_user", password="password")
+        self.user = User.objects.create_user(username="test_user", password="password")
+        brand = Brand.objects.create(name="Test Brand", description="Test Description")
+        self.lamps = Category.objects.create(name="Lamps", description="Test Description")
+        self.chairs = Category.objects.create(name="Chairs", description="Test Description")
+        self.a, self.b, self.c = [
+            Product.objects.create(
+                name=f"Product {name}",
+                description="Test Description",
+                price=9.99,
+                stock=10,
+                category=category,
+                brand=brand
+            )
+            for name, category in (("A", self.lamps), ("B", self.lamps), ("C", self.chairs))
+        ]
+        self.cart = Cart.objects.create(user=self.user)
+        self.today = timezone.localdate()
+
+    def checkout(self, *items):
+        for product, quantity in items:
+            CartItem.objects.create(cart=self.cart, product=product, quantity=quantity)
+        self.client.force_authenticate(self.user)
+        response = self.client.post(reverse("cart-checkout", args=(self.cart.id,)), {"status": "pending"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Order.objects.get(pk=response.data["id"])
+
+    def add_sales(self, product, days_ago, quantity):
+        ProductSalesDaily.objects.create(
+            product=product, day=self.today - timedelta(days=days_ago), quantity=quantity, orders=1
+        )
+
+    def ranked(self, name, **params):
+        response = self.client.get(reverse(name), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(entry["id"], entry["quantity"]) for entry in response.data]
+
+    def test_checkout_updates_rollup(self):
+        """
+        Test that checkout adds to today's buckets and the bestsellers are ranked by units sold.
+        """
+        self.checkout((self.a, 2), (self.b, 1))
+        self.checkout((self.b, 3), (self.c, 1))
+
+        self.assertEqual(self.ranked("product-bestsellers"), [(self.b.id, 4), (self.a.id, 2), (self.c.id, 1)])
+        self.assertEqual(ProductSalesDaily.objects.get(product=self.b, day=self.today).orders, 2)
+        with self.assertNumQueries(1):
+            self.client.get(reverse("product-bestsellers"))
+
+    def test_category_being_deleted_not_ranked(self):
+        """
+        Test that products of a category being deleted are left out of the bestsellers and trending lists.
+        """
+        self.add_sales(self.a, 0, 1)
+        self.add_sales(self.c, 0, 5)
+        Category.objects.filter(pk=self.chairs.pk).update(is_deleting=True)
+        bump_version("category")
+
+        self.assertEqual(self.ranked("product-bestsellers"), [(self.a.id, 1)])
+        self.assertEqual(self.ranked("product-trending"), [(self.a.id, 1)])
+
+    def test_bestsellers_in_category_and_window(self):
+        """
+        Test that bestsellers can be limited to a category and only count days in the window.
+        """
+        self.add_sales(self.a, 0, 1)
+        self.add_sales(self.a, 40, 10)
+        self.add_sales(self.b, 3, 2)
+        self.add_sales(self.c, 1, 5)
+
+        self.assertEqual(self.ranked("product-bestsellers", category=self.lamps.id), [(self.b.id, 2), (self.a.id, 1)])
+        self.assertEqual(self.ranked("product-bestsellers", days=60, limit=1), [(self.a.id, 11)])
+
+    def test_trending(self):
+        """
+        Test that trending products are ranked by growth over the previous window.
+        """
+        self.add_sales(self.a, 1, 5)
+        self.add_sales(self.a, 9, 6)
+        self.add_sales(self.b, 2, 3)
+        self.add_sales(self.c, 10, 4)
+
+        self.assertEqual(self.ranked("product-trending"), [(self.b.id, 3), (self.a.id, 5)])
+
+    def test_cancelling_order_withdraws_sales(self):
+        """
+        Test that cancelling an order takes its units out of the rollup and reinstating it puts them back.
+        """
+        order = self.checkout((self.a, 2))
+        self.checkout((self.a, 1))
+        self.client.force_authenticate(self.admin_user)
+        url = reverse("order-change-status", args=(order.id,))
+
+        self.client.patch(url, {"status": "cancelled"})
+        self.client.patch(url, {"status": "cancelled"})
+        self.assertEqual(self.ranked("product-bestsellers"), [(self.a.id, 1)])
+
+        self.client.patch(url, {"status": "processing"})
+        self.assertEqual(self.ranked("product-bestsellers"), [(self.a.id, 3)])
+
+    def test_rebuild_sales(self):
+        """
+        Test that rebuilding the rollup from order items matches what checkout recorded.
+        """
+        self.checkout((self.a, 2), (self.b, 1))
+        self.checkout((self.a, 1))
+        recorded = list(ProductSalesDaily.objects.order_by("product_id").values_list("product_id", "day", "quantity", "orders"))
+
+        self.assertEqual(rebuild_sales(), 2)
+        rebuilt = list(ProductSalesDaily.objects.order_by("product_id").values_list("product_id", "day", "quantity", "orders"))
+        self.assertEqual(rebuilt, recorded)
+
+    def test_invalid_parameters(self):
+        """
+        Test that out-of-range parameters are rejected.
+        """
+        response = self.client.get(reverse("product-trending"), {"days": 0})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,94 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+from products_app.cache import get_versions, normalize_query_params
+from products_app.deletion import visible_products
+from products_app.models import Product
+
+
+def _etag(request, *parts):
+    # The query string is part of the representation (filters, cursor,
+    # page size), so it has to be part of the validator too.
+    parts += (normalize_query_params(request.query_params),)
+    return quote_etag(hashlib.md5(":".join(str(part) for part in parts).encode("utf-8")).hexdigest())
+
+
+def _last_modified(timestamp, depends_on):
+    # `updated_at` only dates the product rows, so it cannot vouch for the
+    # brands or categories expanded into the response; their version stamps
+    # go into the ETag instead.
+    if timestamp is None or depends_on:
+        return None
+    return int(timestamp.timestamp())
+
+
+def product_revisions(pks):
+    """
+    Return `{pk: updated_at}` for the products `pks` that are visible.
+    """
+    return dict(visible_products(Product.objects.filter(pk__in=pks)).values_list("pk", "updated_at"))
+
+
+def product_validators(request, pk, updated_at, depends_on=()):
+    """
+    Return the `(etag, last_modified)` validators of a single product last
+    updated at `updated_at`, or `(None, None)` if it does not exist
+    (`updated_at` is None). `depends_on` lists the cache namespaces of
+    related objects embedded in the response.
+    """
+    if updated_at is None:
+        return None, None
+
+    etag = _etag(request, pk, updated_at.isoformat(), *get_versions(depends_on))
+    return etag, _last_modified(updated_at, depends_on)
+
+
+def product_list_validators(request, depends_on=()):
+    """
+    Return the `(etag, last_modified)` validators of a product listing,
+    derived from the version stamps like the cache keys rather than from
+    the filtered rows, which would cost an aggregate over all of them on
+    every request. Any product change therefore invalidates them. The brand
+    and category versions are included because name filters and the
+    hiding of brands and categories being deleted go through their lookup
+    tables. There is no `Last-Modified`: the stamps carry no date.
+    """
+    etag = _etag(request, "list", *get_versions(["product", "brand", "category", *depends_on]))
+    return etag, None
+
+
+def snapshot_list_validators(request, state, depends_on=()):
+    """
+    Return the validators of a product listing answered from a catalog
+    snapshot (see `products_app.snapshot`). They are derived from the whole
+    catalog rather than the filtered rows, which the snapshot cannot
+    aggregate without a scan, so any product change invalidates them. The
+    brand and category versions are included too: the snapshot resolves
+    name filters and hides brands and categories being deleted through
+    their lookup tables.
+    """
+    etag = _etag(request, "snapshot", len(state), state.synced_until.isoformat() if state.synced_until else "",
+                 *get_versions(["brand", "category", *depends_on]))
+    return etag, _last_modified(state.synced_until, depends_on)
+
+
+def conditional_response(request, etag, last_modified, build_response):
+    """
+    Answer with 304 Not Modified when the client's `If-None-Match` or
+    `If-Modified-Since` still matches, without calling `build_response`.
+    Otherwise build the response and attach the validators to it.
+    """
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    response = build_response()
+    if response.status_code == 200:
+        if etag:
+            response.headers["ETag"] = etag
+        if last_modified:
+            response.headers["Last-Modified"] = http_date(last_modified)
+
+    return response
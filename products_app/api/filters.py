@@ -0,0 +1,64 @@
+import django_filters
+from django import forms
+from rest_framework.filters import SearchFilter
+
+from products_app import lookups
+from products_app.models import Product
+from products_app.search import search_products
+
+
+class IntegerFilter(django_filters.NumberFilter):
+    """
+    A number filter that rejects values with a fractional part instead of
+    truncating them.
+    """
+    field_class = forms.IntegerField
+
+
+class ProductFilter(django_filters.FilterSet):
+    """
+    Filters of the product listing.
+
+    `category_id` and `brand_id` compare the foreign key columns directly.
+    `category__name` and `brand__name` are turned into the same comparison
+    through the in-memory lookup tables, so no filter needs a join.
+    `in_stock=true` matches the predicate of the partial in-stock index
+    exactly.
+    """
+    min_price = django_filters.NumberFilter(field_name="price", lookup_expr="gte")
+    max_price = django_filters.NumberFilter(field_name="price", lookup_expr="lte")
+    in_stock = django_filters.BooleanFilter(method="filter_in_stock")
+    category_id = IntegerFilter(field_name="category_id")
+    brand_id = IntegerFilter(field_name="brand_id")
+    category__name = django_filters.CharFilter(field_name="category_id", method="filter_by_name")
+    brand__name = django_filters.CharFilter(field_name="brand_id", method="filter_by_name")
+
+    class Meta:
+        model = Product
+        fields = []
+
+    def filter_in_stock(self, queryset, name, value):
+        return queryset.filter(stock__gt=0) if value else queryset.filter(stock=0)
+
+    def filter_by_name(self, queryset, name, value):
+        table = lookups.categories if name == "category_id" else lookups.brands
+        ids = table.current().ids_for_name(value)
+        if len(ids) == 1:
+            return queryset.filter(**{name: ids[0]})
+        return queryset.filter(**{f"{name}__in": ids})
+
+
+class ProductSearchFilter(SearchFilter):
+    """
+    Search products through the full-text index instead of `icontains` scans.
+
+    Matching products are annotated with `search_rank`; the listing
+    paginator orders by it unless the client asks for another ordering.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, "").strip()
+        if not text:
+            return queryset
+
+        return search_products(queryset, text)
@@ -0,0 +1,233 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import namedtuple
+from datetime import date
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from ecomm.pagination import CountModeMixin
+from products_app.search import RANK_ANNOTATION
+
+KeysetCursor = namedtuple("KeysetCursor", ["ordering", "reverse", "position"])
+
+
+def _reverse_ordering(ordering):
+    return tuple(field[1:] if field.startswith("-") else "-" + field for field in ordering)
+
+
+def _encode_value(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+class KeysetPagination(CountModeMixin, CursorPagination):
+    """
+    Cursor pagination over a `(field, pk)` keyset.
+
+    DRF's `CursorPagination` pairs the position with an offset to get past
+    duplicate values, so pages over a column with many ties (such as price)
+    get slower the deeper they go. Here the primary key is always added as a
+    tie-breaker and every page is fetched with a single range condition on
+    the composite key, so page N costs the same as page one.
+
+    The ordering is taken from the view's `OrderingFilter`; only its first
+    field is used, followed by the primary key.
+
+    A view may answer pages itself by defining
+    `fetch_keyset_page(queryset, ordering, position, limit)`, which returns
+    the rows or None to let the queryset be used.
+
+    No total is reported unless the client asks for one with
+    `?count=exact` or `?count=estimate` (see `ecomm.pagination`).
+    """
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = "-created_at"
+    default_count_mode = "none"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        mode = self.get_count_mode(request)
+
+        reverse = self.cursor is not None and self.cursor.reverse
+        position = self.cursor.position if self.cursor is not None else None
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+
+        queryset = queryset.order_by(*ordering)
+        # Fetch one extra row to find out whether there is a following page.
+        results = self.fetch_page(queryset, ordering, position, self.page_size + 1, view)
+        self.page = results[:self.page_size]
+        has_following = len(results) > self.page_size
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_following
+        else:
+            self.has_next = has_following
+            self.has_previous = position is not None and bool(self.page)
+
+        self.count = None
+        if mode != "none":
+            if position is None and not has_following:
+                self.count, self.count_exact = len(self.page), True
+            else:
+                self.count, self.count_exact = self.get_count(queryset, mode)
+
+        return self.page
+
+    def fetch_page(self, queryset, ordering, position, limit, view=None):
+        """
+        Return the first `limit` rows after `position` in `ordering`.
+        """
+        fetch = getattr(view, "fetch_keyset_page", None)
+        try:
+            results = fetch(queryset, ordering, position, limit) if fetch is not None else None
+            if results is not None:
+                return results
+            if position is not None:
+                queryset = queryset.filter(self.get_keyset_filter(ordering, position))
+        except (ValidationError, ValueError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return list(queryset[:limit])
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Return the `(field, pk)` ordering used as the keyset.
+
+        Search results are ordered by relevance unless the client explicitly
+        asks for another ordering.
+        """
+        field = None
+        for backend in getattr(view, "filter_backends", []):
+            if issubclass(backend, OrderingFilter) and backend.ordering_param in request.query_params:
+                # Only an ordering the client asked for overrides relevance.
+                ordering = backend().get_ordering(request, queryset, view)
+                if ordering:
+                    field = ordering[0]
+                break
+
+        if field is None:
+            field = RANK_ANNOTATION if RANK_ANNOTATION in queryset.query.annotations else self.ordering
+
+        return (field, "-pk" if field.startswith("-") else "pk")
+
+    def get_keyset_filter(self, ordering, position):
+        """
+        Build the condition selecting rows strictly after `position`.
+
+        `field >= value AND (field > value OR pk > last_pk)` is equivalent to
+        the row comparison `(field, pk) > (value, last_pk)` but keeps a plain
+        range on the leading column, which every backend can serve from an
+        index on `(field, pk)`.
+        """
+        field, pk = ordering
+        value, last_pk = position
+        name = field.lstrip("-")
+        op = "lt" if field.startswith("-") else "gt"
+        pk_op = "lt" if pk.startswith("-") else "gt"
+
+        return Q(**{f"{name}__{op}e": value}) & (
+            Q(**{f"{name}__{op}": value}) | Q(**{f"pk__{pk_op}": last_pk})
+        )
+
+    def get_paginated_response(self, data):
+        if self.count is None:
+            return super().get_paginated_response(data)
+        return Response({
+            self.count_query_param: self.count,
+            f"{self.count_query_param}_exact": self.count_exact,
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"].update(self.get_count_schema())
+        return response_schema
+
+    def get_schema_operation_parameters(self, view):
+        return [*super().get_schema_operation_parameters(view), *self.get_count_schema_parameters()]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+
+        position = self._get_position_from_instance(self.page[-1], self.ordering)
+        return self.encode_cursor(KeysetCursor(ordering=self.ordering[0], reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+
+        position = self._get_position_from_instance(self.page[0], self.ordering)
+        return self.encode_cursor(KeysetCursor(ordering=self.ordering[0], reverse=True, position=position))
+
+    def decode_cursor(self, request):
+        """
+        Given a request with a cursor, return a `KeysetCursor` instance.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            tokens = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            cursor = KeysetCursor(ordering=tokens["o"], reverse=bool(tokens.get("r")), position=tokens["p"])
+        except (TypeError, ValueError, KeyError, AttributeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        # A cursor is only meaningful for the ordering it was issued for.
+        if cursor.ordering != self.ordering[0] or not isinstance(cursor.position, list) or len(cursor.position) != 2:
+            raise NotFound(self.invalid_cursor_message)
+
+        return cursor
+
+    def encode_cursor(self, cursor):
+        """
+        Given a KeysetCursor instance, return an url with encoded cursor.
+        """
+        tokens = {"o": cursor.ordering, "p": cursor.position}
+        if cursor.reverse:
+            tokens["r"] = 1
+
+        encoded = urlsafe_b64encode(json.dumps(tokens, separators=(",", ":")).encode("ascii")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _get_position_from_instance(self, instance, ordering):
+        position = []
+        for field in ordering:
+            name = field.lstrip("-")
+            if isinstance(instance, dict):
+                value = instance["id" if name == "pk" else name]
+            else:
+                value = getattr(instance, name)
+            position.append(_encode_value(value))
+        return position
+
+
+class ProductKeysetPagination(KeysetPagination):
+    ordering = "-created_at"
+
+
+class ReviewKeysetPagination(KeysetPagination):
+    ordering = "-created_at"
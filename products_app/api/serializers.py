@@ -1,34 +1,298 @@
+from copy import copy
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files.storage import default_storage
 from rest_framework import serializers
 
+from products_app import lookups
+from products_app.autocomplete import MAX_LIMIT as AUTOCOMPLETE_MAX_LIMIT
+from products_app.bulk_import import FILE_FORMATS
+from products_app.changes import MAX_LIMIT as CHANGES_MAX_LIMIT
+from products_app.image_variants import VARIANT_FORMATS
 from products_app.models import *
 
+MAX_BATCH_IDS = 250
+
+
+def parse_field_list(value):
+    """
+    Split a comma-separated `?fields=` or `?expand=` value into names.
+    """
+    return [name.strip() for name in (value or "").split(",") if name.strip()]
+
+
+def sparse_options(request):
+    """
+    Return the `fields` and `expand` serializer arguments requested by
+    `request`.
+    """
+    return {
+        "fields": parse_field_list(request.query_params.get("fields")),
+        "expand": parse_field_list(request.query_params.get("expand")),
+    }
+
+
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """
+    A model serializer whose output can be trimmed and expanded per request.
+
+    `fields` keeps only the named fields and `expand` replaces the named
+    foreign keys from `expandable_fields` with their nested representation.
+    Both default to the `?fields=` and `?expand=` query parameters of the
+    request in the serializer context; unknown names are ignored.
+    `optimize_queryset` then loads only the columns and relations the
+    remaining fields read.
+    """
+    expandable_fields = {}
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        request = self.context.get("request")
+        if fields is None and request is not None:
+            fields = parse_field_list(request.query_params.get("fields"))
+        if expand is None and request is not None:
+            expand = parse_field_list(request.query_params.get("expand"))
+
+        self.expanded = [name for name in expand or [] if name in self.expandable_fields]
+        for name in self.expanded:
+            self.fields[name] = self.expandable_fields[name](read_only=True)
+
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+            self.expanded = [name for name in self.expanded if name in self.fields]
+
+    def optimize_queryset(self, queryset, always=()):
+        """
+        Restrict `queryset` to what the selected fields read: `only()` the
+        columns, `select_related()` the expanded relations and
+        `prefetch_related()` the nested lists. `always` names columns that
+        must be loaded regardless, such as the ones a paginator reads.
+        """
+        concrete = {field.name for field in queryset.model._meta.concrete_fields}
+        columns = {queryset.model._meta.pk.name, *always}
+        prefetch = []
+
+        for name, field in self.fields.items():
+            source = field.source.split(".")[0]
+            if name in self.expanded:
+                queryset = queryset.select_related(source)
+                columns.add(source)
+            elif source in concrete:
+                columns.add(source)
+            elif isinstance(field, serializers.ListSerializer):
+                prefetch.append(source)
+
+        return queryset.prefetch_related(None).prefetch_related(*prefetch).only(*columns)
+
 
-class BrandSerializer(serializers.ModelSerializer):
+class LookupRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    A primary key relation validated against an in-memory lookup table
+    (see `products_app.lookups`) instead of a query per write.
+    """
+
+    def __init__(self, table, **kwargs):
+        self.table = table
+        kwargs.setdefault("queryset", table.model.objects.all())
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        try:
+            if isinstance(data, bool):
+                raise TypeError
+            pk = self.table.model._meta.pk.to_python(data)
+        except (TypeError, ValueError, DjangoValidationError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        obj = self.table.current().get(pk)
+        if obj is None:
+            self.fail("does_not_exist", pk_value=data)
+        # The snapshot is shared by every request of the process.
+        return copy(obj)
+
+
+class BrandSerializer(DynamicFieldsModelSerializer):
     
     class Meta:
         model = Brand
-        fields = "__all__"
+        exclude = ["is_deleting"]
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(DynamicFieldsModelSerializer):
     
     class Meta:
         model = Category
-        fields = "__all__"
+        exclude = ["is_deleting"]
         
-class ProductSerializer(serializers.ModelSerializer):
+class ProductImageSerializer(serializers.ModelSerializer):
+    variants = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ProductImage
+        fields = "__all__"
+
+    def get_variants(self, obj) -> dict:
+        # Variant paths are stored relative to MEDIA_ROOT; expose them as URLs
+        # the same way the `image` field is.
+        request = self.context.get("request")
+        variants = {}
+        for name, entry in obj.variants.items():
+            variants[name] = dict(entry)
+            for extension in VARIANT_FORMATS:
+                url = default_storage.url(entry[extension])
+                variants[name][extension] = request.build_absolute_uri(url) if request else url
+        return variants
+
+class ProductSerializer(DynamicFieldsModelSerializer):
+    category = LookupRelatedField(lookups.categories)
+    brand = LookupRelatedField(lookups.brands)
+    images = ProductImageSerializer(source="productimage_set", many=True, read_only=True)
+    expandable_fields = {"brand": BrandSerializer, "category": CategorySerializer}
     
     class Meta:
         model = Product
         fields = "__all__"
+        read_only_fields = ["rating_count", "rating_sum", "rating_1", "rating_2",
+                            "rating_3", "rating_4", "rating_5", "rating_average"]
 
-class ProductImageSerializer(serializers.ModelSerializer):
+class DeletionJobSerializer(serializers.ModelSerializer):
     
     class Meta:
-        model = ProductImage
+        model = DeletionJob
         fields = "__all__"
 
 class ProductReviewSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = ProductReview
-        fields = "__all__"
\ No newline at end of file
+        fields = "__all__"
+
+class ProductReviewListSerializer(serializers.ModelSerializer):
+    user_name = serializers.CharField(source="user.username", read_only=True)
+    
+    class Meta:
+        model = ProductReview
+        fields = "__all__"
+
+class FacetCountSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    count = serializers.IntegerField()
+
+class PriceFacetCountSerializer(serializers.Serializer):
+    min = serializers.IntegerField()
+    max = serializers.IntegerField(allow_null=True)
+    count = serializers.IntegerField()
+
+class ProductFacetsSerializer(serializers.Serializer):
+    categories = FacetCountSerializer(many=True)
+    brands = FacetCountSerializer(many=True)
+    price = PriceFacetCountSerializer(many=True)
+
+
+class AutocompleteQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=100, trim_whitespace=False)
+    limit = serializers.IntegerField(min_value=1, max_value=AUTOCOMPLETE_MAX_LIMIT, default=10)
+
+class AutocompleteSuggestionSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+
+class AutocompleteSerializer(serializers.Serializer):
+    products = AutocompleteSuggestionSerializer(many=True)
+    brands = AutocompleteSuggestionSerializer(many=True)
+    categories = AutocompleteSuggestionSerializer(many=True)
+
+
+class ProductBatchQuerySerializer(serializers.Serializer):
+    ids = serializers.CharField(help_text=f"Comma-separated product IDs, at most {MAX_BATCH_IDS}.")
+
+    def validate_ids(self, value):
+        try:
+            ids = [int(pk) for pk in value.split(",") if pk.strip()]
+        except ValueError:
+            raise serializers.ValidationError("Product IDs must be integers.")
+        # Repeated ids are answered once, at their first position.
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            raise serializers.ValidationError("At least one product ID is required.")
+        if len(ids) > MAX_BATCH_IDS:
+            raise serializers.ValidationError(f"At most {MAX_BATCH_IDS} product IDs can be requested at once.")
+        return ids
+
+class ProductBatchSerializer(serializers.Serializer):
+    results = ProductSerializer(many=True)
+    missing = serializers.ListField(child=serializers.IntegerField())
+
+
+class CatalogChangesQuerySerializer(serializers.Serializer):
+    since = serializers.IntegerField(min_value=0, default=0)
+    limit = serializers.IntegerField(min_value=1, max_value=CHANGES_MAX_LIMIT, default=100)
+
+class CatalogChangeSerializer(serializers.Serializer):
+    sequence = serializers.IntegerField()
+    type = serializers.ChoiceField(choices=CatalogChange.TARGET_CHOICES)
+    id = serializers.IntegerField()
+    action = serializers.ChoiceField(choices=CatalogChange.ACTION_CHOICES)
+    changed_at = serializers.DateTimeField()
+    data = serializers.DictField(allow_null=True)
+
+class CatalogChangesSerializer(serializers.Serializer):
+    results = CatalogChangeSerializer(many=True)
+    cursor = serializers.IntegerField()
+    has_more = serializers.BooleanField()
+
+
+class ProductImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    file_format = serializers.ChoiceField(choices=FILE_FORMATS, required=False)
+
+    def validate(self, data):
+        if "file_format" not in data:
+            extension = data["file"].name.rsplit(".", 1)[-1].lower()
+            if extension not in FILE_FORMATS:
+                raise serializers.ValidationError({"file_format": "Could not infer the format from the file name."})
+            data["file_format"] = extension
+        return data
+
+class ProductImportErrorSerializer(serializers.Serializer):
+    line = serializers.IntegerField()
+    errors = serializers.DictField(child=serializers.ListField(child=serializers.CharField()))
+
+class ProductImportReportSerializer(serializers.Serializer):
+    rows = serializers.IntegerField()
+    created = serializers.IntegerField()
+    error_count = serializers.IntegerField()
+    errors = ProductImportErrorSerializer(many=True)
+    elapsed_seconds = serializers.FloatField()
+    rows_per_second = serializers.IntegerField()
+
+
+class BulkProductUpdateItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    price = serializers.DecimalField(max_digits=6, decimal_places=2, min_value=Decimal("0"), required=False)
+    stock = serializers.IntegerField(min_value=0, required=False)
+    stock_delta = serializers.IntegerField(required=False)
+
+    def validate(self, data):
+        if not {"price", "stock", "stock_delta"} & set(data):
+            raise serializers.ValidationError("Provide at least one of price, stock or stock_delta.")
+        if "stock" in data and "stock_delta" in data:
+            raise serializers.ValidationError("Provide either stock or stock_delta, not both.")
+        return data
+
+class BulkProductUpdateListSerializer(serializers.ListSerializer):
+    child = BulkProductUpdateItemSerializer()
+
+    def validate(self, data):
+        ids = [item["id"] for item in data]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError("Each product id may appear only once.")
+        return data
+
+class BulkProductUpdateResultSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=["updated", "not_found", "insufficient_stock"])
+    price = serializers.DecimalField(max_digits=6, decimal_places=2, required=False)
+    stock = serializers.IntegerField(required=False)
@@ -19,15 +19,31 @@ urlpatterns = [
     
     # PRODUCT
     path("view/all/", ProductListView.as_view(), name="products"),
+    path("view/facets/", ProductFacetsView.as_view(), name="product-facets"),
+    path("autocomplete/", autocomplete_view, name="product-autocomplete"),
     path("view/<int:pk>/", retrieve_single_product_view, name="product"),
+    path("view/batch/", retrieve_products_batch_view, name="product-batch"),
     path("create/", create_product_view, name="product-create"),
+    path("import/", import_products_view, name="product-import"),
+    path("export/", export_products_view, name="product-export"),
     path("edit/<int:pk>/", edit_product_view, name="product-edit"),
+    path("bulk-update/", bulk_update_products_view, name="product-bulk-update"),
     path("delete/<int:pk>/", delete_product_view, name="product-delete"),
     
     # PRODUCT REVIEW
     path("reviews/view/all/", list_reviews_view, name="reviews"),
-    path("reviews/view/<int:pk>/", retrieve_single_product_view, name="review"),
+    path("reviews/view/<int:pk>/", retrieve_single_review_view, name="review"),
+    path("reviews/product/<int:pk>/", ProductReviewListView.as_view(), name="product-reviews"),
     path("reviews/create/", create_review_view, name="review-create"),
     path("reviews/edit/<int:pk>/", edit_review_view, name="review-edit"),
-    path("reviews/delete/<int:pk>/", delete_review_view, name="review-delete")
+    path("reviews/delete/<int:pk>/", delete_review_view, name="review-delete"),
+    
+    # CHANGE FEED
+    path("changes/", catalog_changes_view, name="catalog-changes"),
+    
+    # DELETION JOB
+    path("deletion-jobs/<int:pk>/", retrieve_deletion_job_view, name="deletion-job"),
+    
+    # CACHE
+    path("cache/stats/", cache_stats_view, name="cache-stats")
 ]
\ No newline at end of file
@@ -1,19 +1,59 @@
+import io
+
+from django.core.cache import cache
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django_filters.rest_framework import DjangoFilterBackend
-from drf_spectacular.utils import (OpenApiResponse, extend_schema,
-                                   extend_schema_view)
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import (OpenApiParameter, OpenApiResponse,
+                                   extend_schema, extend_schema_view)
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.filters import SearchFilter
-from rest_framework.generics import ListAPIView
+from rest_framework.decorators import (api_view, parser_classes,
+                                       permission_classes)
+from rest_framework.filters import OrderingFilter
+from rest_framework.generics import GenericAPIView, ListAPIView
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 
+from ecomm.fast_serialization import serialize_queryset
+from ecomm.pagination import (PAGINATION_PARAMETERS, EstimatedCountPagination,
+                              is_paginated)
+from products_app import lookups
+from products_app.autocomplete import autocomplete
+from products_app.bulk_import import ProductImporter
+from products_app.bulk_update import apply_bulk_update
+from products_app.cache import (get_or_set_detail, get_or_set_details,
+                                 make_key, normalize_query_params, stats)
+from products_app.changes import read_changes
+from products_app.deletion import delete_or_schedule, visible_products
+from products_app.export import (EXPORT_FORMATS, export_lines,
+                                 export_queryset)
+from products_app.facets import compute_facets
+from products_app.snapshot import FILTERS as SNAPSHOT_FILTERS
+from products_app.snapshot import catalog, is_enabled as snapshot_enabled
+
+from .conditional import (conditional_response, product_list_validators,
+                          product_revisions, product_validators,
+                          snapshot_list_validators)
+from .filters import ProductFilter, ProductSearchFilter
+from .pagination import ProductKeysetPagination, ReviewKeysetPagination
 from .serializers import *
 
+FIELDS_PARAMETER = OpenApiParameter(
+    "fields", OpenApiTypes.STR, description="Comma-separated fields to include; all fields by default."
+)
+EXPAND_PARAMETER = OpenApiParameter(
+    "expand", OpenApiTypes.STR, description="Comma-separated relations to inline: `brand`, `category`."
+)
+
 # BRAND
 
 @extend_schema(
+    parameters=[FIELDS_PARAMETER],
     responses={200: BrandSerializer(many=True)},
     description="List all brands."
 )
@@ -22,11 +62,9 @@ def list_brands_view(request):
     """
     List all brands.
     """
-    brands = Brand.objects.all()
-    
-    serializer = BrandSerializer(brands, many=True)
+    data = lookups.brands.current().render(BrandSerializer, **sparse_options(request))
     
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    return Response(data, status=status.HTTP_200_OK)
 
 
 @extend_schema(
@@ -53,6 +91,7 @@ def create_brand_view(request):
 
 
 @extend_schema(
+    parameters=[FIELDS_PARAMETER],
     responses={200: BrandSerializer},
     description="Retrieve a single brand by ID."
 )
@@ -61,10 +100,14 @@ def retrieve_single_brand_view(request, pk):
     """
     Retrieve a single brand by ID.
     """
-    brand = get_object_or_404(Brand, pk=pk)
-    
-    serializer = BrandSerializer(brand)
-    return Response(serializer.data)
+    options = sparse_options(request)
+
+    def load():
+        brands = BrandSerializer(**options).optimize_queryset(Brand.objects.filter(is_deleting=False))
+        return BrandSerializer(get_object_or_404(brands, pk=pk), **options).data
+
+    data = get_or_set_detail("brand", pk, load, params=normalize_query_params(request.query_params))
+    return Response(data)
 
 
 @extend_schema(
@@ -78,7 +121,7 @@ def edit_brand_view(request, pk):
     """
     Edit a brand (PUT or PATCH).
     """
-    brand = get_object_or_404(Brand, pk=pk)
+    brand = get_object_or_404(Brand, pk=pk, is_deleting=False)
 
     if request.method == "PUT":
         serializer = BrandSerializer(brand, data=request.data)
@@ -93,23 +136,27 @@ def edit_brand_view(request, pk):
 
 
 @extend_schema(
-    responses={204: None},
-    description="Delete a brand. Admin only."
+    responses={204: None, 202: DeletionJobSerializer},
+    description="Delete a brand. Admin only. A brand with many products is hidden at once and deleted "
+                "in the background; the response is then 202 with the deletion job."
 )
 @api_view(["DELETE"])
 @permission_classes([IsAdminUser])
 def delete_brand_view(request, pk):
     """
-    Delete a brand.
+    Delete a brand, in the background if it has many products.
     """
-    brand = get_object_or_404(Brand, pk=pk)
-    brand.delete()
-    return Response(status=status.HTTP_204_NO_CONTENT)
+    brand = get_object_or_404(Brand, pk=pk, is_deleting=False)
+    job = delete_or_schedule(brand)
+    if job is None:
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response(DeletionJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
 
 
 # CATEGORY
 
 @extend_schema(
+    parameters=[FIELDS_PARAMETER],
     responses={200: CategorySerializer(many=True)},
     description="List all categories."
 )
@@ -118,11 +165,9 @@ def list_categories_view(request):
     """
     List all categories.
     """
-    categories = Category.objects.all()
-    
-    serializer = CategorySerializer(categories, many=True)
+    data = lookups.categories.current().render(CategorySerializer, **sparse_options(request))
     
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    return Response(data, status=status.HTTP_200_OK)
 
 
 @extend_schema(
@@ -149,6 +194,7 @@ def create_category_view(request):
 
 
 @extend_schema(
+    parameters=[FIELDS_PARAMETER],
     responses={200: CategorySerializer},
     description="Retrieve a single category by ID."
 )
@@ -157,10 +203,14 @@ def retrieve_single_category_view(request, pk):
     """
     Retrieve a single category by ID.
     """
-    category = get_object_or_404(Category, pk=pk)
-    
-    serializer = CategorySerializer(category)
-    return Response(serializer.data)
+    options = sparse_options(request)
+
+    def load():
+        categories = CategorySerializer(**options).optimize_queryset(Category.objects.filter(is_deleting=False))
+        return CategorySerializer(get_object_or_404(categories, pk=pk), **options).data
+
+    data = get_or_set_detail("category", pk, load, params=normalize_query_params(request.query_params))
+    return Response(data)
 
 
 @extend_schema(
@@ -174,7 +224,7 @@ def edit_category_view(request, pk):
     """
     Edit a category (PUT or PATCH). Admin only.
     """
-    category = get_object_or_404(Category, pk=pk)
+    category = get_object_or_404(Category, pk=pk, is_deleting=False)
 
     if request.method == "PUT":
         serializer = CategorySerializer(category, data=request.data)
@@ -189,26 +239,34 @@ def edit_category_view(request, pk):
 
 
 @extend_schema(
-    responses={204: None},
-    description="Delete a category. Admin only."
+    responses={204: None, 202: DeletionJobSerializer},
+    description="Delete a category. Admin only. A category with many products is hidden at once and deleted "
+                "in the background; the response is then 202 with the deletion job."
 )
 @api_view(["DELETE"])
 @permission_classes([IsAdminUser])
 def delete_category_view(request, pk):
     """
-    Delete a category.
+    Delete a category, in the background if it has many products.
     """
-    category = get_object_or_404(Category, pk=pk)
-    category.delete()
-    return Response(status=status.HTTP_204_NO_CONTENT)
+    category = get_object_or_404(Category, pk=pk, is_deleting=False)
+    job = delete_or_schedule(category)
+    if job is None:
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response(DeletionJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
 
 
 # PRODUCT
 
 @extend_schema_view(
     list=extend_schema(
+        parameters=[FIELDS_PARAMETER, EXPAND_PARAMETER],
         responses={200: ProductSerializer(many=True)},
-        description="List all products with filtering and search capabilities."
+        description="List all products with filtering and search capabilities. "
+                    "Filter by `category_id`, `brand_id`, `min_price`, `max_price` and `in_stock`. "
+                    "Results are cursor-paginated; pass `ordering` to sort by `created_at`, `price`, `name` "
+                    "or `rating_average`. `search` matches product names and descriptions and orders results "
+                    "by relevance."
     )
 )
 class ProductListView(ListAPIView):
@@ -217,12 +275,118 @@ class ProductListView(ListAPIView):
     """
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
-    filter_backends = [DjangoFilterBackend, SearchFilter]
-    filterset_fields = ["category__name", "brand__name"]
-    search_filters = ["name"]
+    pagination_class = ProductKeysetPagination
+    filter_backends = [DjangoFilterBackend, ProductSearchFilter, OrderingFilter]
+    filterset_class = ProductFilter
+    ordering_fields = ["created_at", "price", "name", "rating_average"]
+
+    def get_queryset(self):
+        return visible_products(super().get_queryset())
+
+    def list(self, request, *args, **kwargs):
+        # The ordering columns are always loaded, since the paginator reads
+        # them to build the cursors.
+        sparse = self.get_serializer()
+        queryset = sparse.optimize_queryset(self.filter_queryset(self.get_queryset()), always=self.ordering_fields)
+
+        self.snapshot = None
+        self.snapshot_filters = self.get_snapshot_filters(request)
+        if self.snapshot_filters is not None:
+            # None while the snapshot is being built; the database answers
+            # in the meantime.
+            self.snapshot = catalog.current()
+        if self.snapshot is not None:
+            etag, last_modified = snapshot_list_validators(request, self.snapshot, depends_on=sparse.expanded)
+        else:
+            etag, last_modified = product_list_validators(request, depends_on=sparse.expanded)
+
+        def build_response():
+            page = self.paginate_queryset(queryset)
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        return conditional_response(request, etag, last_modified, build_response)
+
+    def get_snapshot_filters(self, request):
+        """
+        Return the cleaned filter values if the catalog snapshot can answer
+        `request`, otherwise None. Search needs the full-text index.
+        """
+        if not snapshot_enabled() or request.query_params.get(ProductSearchFilter.search_param, "").strip():
+            return None
+
+        filterset = self.filterset_class(request.query_params, queryset=self.get_queryset())
+        if not filterset.is_valid():
+            return None
+        return {name: filterset.form.cleaned_data.get(name) for name in SNAPSHOT_FILTERS}
+
+    def fetch_keyset_page(self, queryset, ordering, position, limit):
+        """
+        Find the page in the catalog snapshot and load only its products.
+        """
+        if self.snapshot is None:
+            return None
+
+        ids = self.snapshot.page(self.snapshot_filters, ordering, position, limit)
+        if ids is None:
+            return None
+
+        products = queryset.order_by().in_bulk(ids)
+        return [products[pk] for pk in ids if pk in products]
+
+
+@extend_schema_view(
+    get=extend_schema(
+        responses={200: ProductFacetsSerializer},
+        description="Count the products matching the listing filters per category, brand and price bucket."
+    )
+)
+class ProductFacetsView(GenericAPIView):
+    """
+    Count the products matching the listing filters per category, brand and price bucket.
+    """
+    queryset = Product.objects.all()
+    serializer_class = ProductFacetsSerializer
+    filter_backends = [DjangoFilterBackend, ProductSearchFilter]
+    filterset_class = ProductFilter
+    pagination_class = None
+    cache_timeout = 60 * 60
+
+    def get_queryset(self):
+        return visible_products(super().get_queryset())
+
+    def get(self, request):
+        params = normalize_query_params(request.query_params, exclude=["cursor", "page_size", "ordering"])
+        key = make_key("facets", params, depends_on=["product", "brand", "category"])
+
+        facets = cache.get(key)
+        if facets is None:
+            facets = compute_facets(self.filter_queryset(self.get_queryset()))
+            cache.set(key, facets, self.cache_timeout)
+
+        return Response(facets, status=status.HTTP_200_OK)
 
 
 @extend_schema(
+    parameters=[AutocompleteQuerySerializer],
+    responses={200: AutocompleteSerializer, 400: OpenApiResponse(description="Bad Request")},
+    description="Suggest product, brand and category names starting with `q`, most popular first."
+)
+@api_view(["GET"])
+def autocomplete_view(request):
+    """
+    Suggest product, brand and category names starting with a prefix.
+    """
+    serializer = AutocompleteQuerySerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    suggestions = autocomplete.suggest(serializer.validated_data["q"], serializer.validated_data["limit"])
+    return Response(suggestions, status=status.HTTP_200_OK)
+
+
+@extend_schema(
+    parameters=[FIELDS_PARAMETER, EXPAND_PARAMETER],
     responses={200: ProductSerializer(many=True)},
     description="List all products."
 )
@@ -231,11 +395,53 @@ def list_products_view(request):
     """
     List all products.
     """
-    products = Product.objects.all()
+    products = visible_products(Product.objects.all())
     
-    serializer = ProductSerializer(products, many=True)
+    data = serialize_queryset(ProductSerializer(**sparse_options(request)), products)
     
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    return Response(data, status=status.HTTP_200_OK)
+
+
+@extend_schema(
+    parameters=[
+        OpenApiParameter("output", OpenApiTypes.STR, enum=list(EXPORT_FORMATS), description="Export format, `ndjson` by default."),
+        OpenApiParameter("updated_since", OpenApiTypes.DATETIME, description="Only export products updated at or after this time."),
+    ],
+    responses={
+        (200, "application/x-ndjson"): OpenApiTypes.STR,
+        (200, "text/csv"): OpenApiTypes.STR,
+        400: OpenApiResponse(description="Bad Request")
+    },
+    description="Stream the product catalog as NDJSON or CSV. The `X-Export-Watermark` header "
+                "can be passed as `updated_since` on the next pull to fetch only what changed."
+)
+@api_view(["GET"])
+def export_products_view(request):
+    """
+    Stream the product catalog as NDJSON or CSV.
+    """
+    export_format = request.query_params.get("output", "ndjson")
+    if export_format not in EXPORT_FORMATS:
+        return Response({"output": [f"Choose one of: {', '.join(EXPORT_FORMATS)}."]}, status=status.HTTP_400_BAD_REQUEST)
+
+    updated_since = request.query_params.get("updated_since")
+    if updated_since is not None:
+        try:
+            updated_since = parse_datetime(updated_since)
+        except ValueError:
+            updated_since = None
+        if updated_since is None:
+            return Response({"updated_since": ["Expected an ISO 8601 datetime."]}, status=status.HTTP_400_BAD_REQUEST)
+        if timezone.is_naive(updated_since):
+            updated_since = timezone.make_aware(updated_since)
+
+    watermark = timezone.now()
+    rows = export_queryset(updated_since)
+
+    response = StreamingHttpResponse(export_lines(rows, export_format), content_type=EXPORT_FORMATS[export_format])
+    response.headers["Content-Disposition"] = f'attachment; filename="products.{export_format}"'
+    response.headers["X-Export-Watermark"] = watermark.isoformat()
+    return response
 
 
 @extend_schema(
@@ -262,6 +468,36 @@ def create_product_view(request):
 
 
 @extend_schema(
+    request={"multipart/form-data": ProductImportSerializer},
+    responses={
+        200: ProductImportReportSerializer,
+        400: OpenApiResponse(description="Bad Request")
+    },
+    description="Bulk import products from a CSV or JSONL file. Brands and categories are referenced by name. Admin only."
+)
+@api_view(["POST"])
+@permission_classes([IsAdminUser])
+@parser_classes([MultiPartParser])
+def import_products_view(request):
+    """
+    Bulk import products from a CSV or JSONL file.
+    """
+    serializer = ProductImportSerializer(data=request.data)
+    
+    if serializer.is_valid():
+        upload = serializer.validated_data["file"]
+        stream = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+        try:
+            report = ProductImporter().run(stream, serializer.validated_data["file_format"])
+        except UnicodeDecodeError:
+            return Response({"file": ["The file is not valid UTF-8."]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_200_OK)
+    else:
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@extend_schema(
+    parameters=[FIELDS_PARAMETER, EXPAND_PARAMETER],
     responses={200: ProductSerializer},
     description="Retrieve a single product by ID."
 )
@@ -269,11 +505,66 @@ def create_product_view(request):
 def retrieve_single_product_view(request, pk):
     """
     Retrieve a single product by ID.
+
+    Supports conditional requests: a matching `If-None-Match` or
+    `If-Modified-Since` is answered with 304 before anything is serialized.
     """
-    product = get_object_or_404(Product, pk=pk)
+    options = sparse_options(request)
+    sparse = ProductSerializer(**options)
+    updated_at = product_revisions([pk]).get(pk)
+    etag, last_modified = product_validators(request, pk, updated_at, depends_on=sparse.expanded)
 
-    serializer = ProductSerializer(product)
-    return Response(serializer.data)
+    def load():
+        product = get_object_or_404(sparse.optimize_queryset(visible_products(Product.objects.all())), pk=pk)
+        return ProductSerializer(product, **options).data
+
+    def build_response():
+        data = get_or_set_detail(
+            "product", pk, load, params=normalize_query_params(request.query_params), depends_on=sparse.expanded,
+            revision=updated_at.isoformat() if updated_at else None
+        )
+        return Response(data)
+
+    return conditional_response(request, etag, last_modified, build_response)
+
+
+@extend_schema(
+    parameters=[ProductBatchQuerySerializer, FIELDS_PARAMETER, EXPAND_PARAMETER],
+    responses={200: ProductBatchSerializer, 400: OpenApiResponse(description="Bad Request")},
+    description="Retrieve several products by ID, in the order requested. IDs without a product are "
+                "listed in `missing`."
+)
+@api_view(["GET"])
+def retrieve_products_batch_view(request):
+    """
+    Retrieve several products by ID.
+
+    Each product is cached on its own, under the same entry as its detail
+    response: one query reads the revisions of the products, and only those
+    missing from the cache are loaded.
+    """
+    serializer = ProductBatchQuerySerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    ids = serializer.validated_data["ids"]
+    options = sparse_options(request)
+    sparse = ProductSerializer(**options)
+
+    def load(pks):
+        products = sparse.optimize_queryset(visible_products(Product.objects.all())).in_bulk(pks)
+        data = ProductSerializer(list(products.values()), many=True, **options).data
+        return dict(zip(products, data))
+
+    revisions = {pk: updated_at.isoformat() for pk, updated_at in product_revisions(ids).items()}
+    found = get_or_set_details(
+        "product", list(revisions), load, params=normalize_query_params(request.query_params, exclude=["ids"]),
+        depends_on=sparse.expanded, revisions=revisions
+    )
+    return Response({
+        "results": [found[pk] for pk in ids if pk in found],
+        "missing": [pk for pk in ids if pk not in found],
+    }, status=status.HTTP_200_OK)
 
 
 @extend_schema(
@@ -301,6 +592,30 @@ def edit_product_view(request, pk):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@extend_schema(
+    request=BulkProductUpdateItemSerializer(many=True),
+    responses={
+        200: BulkProductUpdateResultSerializer(many=True),
+        400: OpenApiResponse(description="Bad Request")
+    },
+    description="Update the price and stock of many products at once. `stock_delta` adjusts "
+                "the stock relative to its current value. Admin only."
+)
+@api_view(["POST"])
+@permission_classes([IsAdminUser])
+def bulk_update_products_view(request):
+    """
+    Update the price and stock of many products at once.
+    """
+    serializer = BulkProductUpdateListSerializer(data=request.data, max_length=10000)
+    
+    if serializer.is_valid():
+        results = apply_bulk_update(serializer.validated_data)
+        return Response(BulkProductUpdateResultSerializer(results, many=True).data, status=status.HTTP_200_OK)
+    else:
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
 @extend_schema(
     responses={204: None},
     description="Delete a product. Admin only."
@@ -319,8 +634,10 @@ def delete_product_view(request, pk):
 # PRODUCT REVIEW
 
 @extend_schema(
+    parameters=PAGINATION_PARAMETERS,
     responses={200: ProductReviewSerializer(many=True)},
-    description="List all product reviews."
+    description="List all product reviews. Passing `page` or `page_size` returns one page with an "
+                "exact, estimated or no total, as chosen with `count`."
 )
 @api_view(["GET"])
 def list_reviews_view(request):
@@ -329,9 +646,32 @@ def list_reviews_view(request):
     """
     reviews = ProductReview.objects.all()
     
-    serializer = ProductReviewSerializer(reviews, many=True)
+    if is_paginated(request):
+        paginator = EstimatedCountPagination(fetch=lambda page: serialize_queryset(ProductReviewSerializer(), page))
+        data = paginator.paginate_queryset(reviews.order_by("-pk"), request)
+        return paginator.get_paginated_response(data)
     
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    data = serialize_queryset(ProductReviewSerializer(), reviews)
+    
+    return Response(data, status=status.HTTP_200_OK)
+
+
+@extend_schema_view(
+    get=extend_schema(
+        responses={200: ProductReviewListSerializer(many=True)},
+        description="List the reviews of a single product, newest first."
+    )
+)
+class ProductReviewListView(ListAPIView):
+    """
+    List the reviews of a single product, newest first.
+    """
+    serializer_class = ProductReviewListSerializer
+    pagination_class = ReviewKeysetPagination
+
+    def get_queryset(self):
+        product = get_object_or_404(Product, pk=self.kwargs["pk"])
+        return ProductReview.objects.filter(product=product).select_related("user")
 
 
 @extend_schema(
@@ -351,7 +691,8 @@ def create_review_view(request):
     serializer = ProductReviewSerializer(data=request.data)
     
     if serializer.is_valid():
-        serializer.save()
+        with transaction.atomic():
+            serializer.save()
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     else:
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -391,7 +732,8 @@ def edit_review_view(request, pk):
         serializer = ProductReviewSerializer(review, data=request.data, partial=True)
 
     if serializer.is_valid():
-        serializer.save()
+        with transaction.atomic():
+            serializer.save()
         return Response(serializer.data)
     else:
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -408,5 +750,65 @@ def delete_review_view(request, pk):
     Delete a product review.
     """
     review = get_object_or_404(ProductReview, pk=pk)
-    review.delete()
-    return Response(status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+    with transaction.atomic():
+        review.delete()
+    return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+# CHANGE FEED
+
+@extend_schema(
+    parameters=[CatalogChangesQuerySerializer],
+    responses={200: CatalogChangesSerializer, 400: OpenApiResponse(description="Bad Request")},
+    description="List the products, brands and categories changed since the `since` sequence number, oldest "
+                "first, each in its current state or as a deletion. Pass the returned `cursor` as `since` to "
+                "read on; `since=0` lists the whole catalog."
+)
+@api_view(["GET"])
+def catalog_changes_view(request):
+    """
+    List the catalog changes after a sequence number.
+    """
+    serializer = CatalogChangesQuerySerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    since = serializer.validated_data["since"]
+    entries, has_more = read_changes(since, serializer.validated_data["limit"])
+    return Response({
+        "results": entries,
+        "cursor": entries[-1]["sequence"] if entries else since,
+        "has_more": has_more,
+    }, status=status.HTTP_200_OK)
+
+
+# DELETION JOB
+
+@extend_schema(
+    responses={200: DeletionJobSerializer},
+    description="Show the progress of a background brand or category deletion. Admin only."
+)
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def retrieve_deletion_job_view(request, pk):
+    """
+    Show the progress of a background brand or category deletion.
+    """
+    job = get_object_or_404(DeletionJob, pk=pk)
+    serializer = DeletionJobSerializer(job)
+    return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+# CACHE
+
+@extend_schema(
+    responses={200: OpenApiResponse(description="Detail response cache hits, misses and hit rate")},
+    description="Show the detail response cache statistics of this worker. Admin only."
+)
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def cache_stats_view(request):
+    """
+    Show the detail response cache statistics of this worker.
+    """
+    return Response(stats.as_dict(), status=status.HTTP_200_OK)
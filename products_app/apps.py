@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ProductsAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'products_app'
+
+    def ready(self):
+        from products_app import checks, signals
@@ -0,0 +1,381 @@
+import logging
+import sys
+import threading
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from heapq import heappop, heappush
+
+from django.db import close_old_connections
+from django.db.models import Count, Max, Q
+
+from products_app import lookups
+from products_app.cache import get_versions
+from products_app.models import CatalogChange, Product
+from products_app.snapshot import SYNC_OVERLAP
+
+logger = logging.getLogger(__name__)
+
+# In-memory prefix index for search-box suggestions.
+#
+# Each worker keeps the product, brand and category names sorted
+# case-insensitively, so the names starting with a prefix form one range
+# found with two bisections. A segment tree over the popularity of each
+# position (review count for products, product count for brands and
+# categories) then yields the most popular names of that range in
+# O(limit * log n), however many names share the prefix.
+#
+# Brands and categories are rebuilt from the lookup tables whenever those
+# change. Products follow the "product" version stamp like the catalog
+# snapshot: rows whose `updated_at` is newer than the last sync are read
+# and, if their name or popularity changed, kept in a small overlay index
+# that takes precedence over the base index, and products with a tombstone
+# in the change feed are left out of the results. So are the products of
+# brands and categories being deleted, whose ids are read again whenever
+# the lookup tables change while there are any. A large overlay or a row
+# count that still does not match trigger a full rebuild, which runs on a
+# background thread while the previous index keeps answering; a new
+# process suggests no products until its first build is done. Brand and
+# category popularity is counted by those builds, so the request path
+# never groups the product table.
+
+MAX_OVERLAY = 1000
+
+MAX_LIMIT = 50
+
+LOAD_CHUNK_SIZE = 10000
+
+# Sorts after every character, so `prefix + END` bounds the names starting
+# with `prefix`.
+END = "\U0010ffff"
+
+
+class PrefixIndex:
+    """
+    `(id, name, popularity)` entries sorted by case-folded name.
+    """
+
+    def __init__(self, entries):
+        entries = sorted(entries, key=lambda entry: (entry[1].casefold(), entry[0]))
+        self.names = [name for _, name, _ in entries]
+        self.ids = array("q", (pk for pk, _, _ in entries))
+        self.popularity = array("q", (popularity for _, _, popularity in entries))
+
+        # `tree[1]` covers every position, `tree[size + i]` position i; each
+        # node holds the most popular position below it, or -1.
+        self.size = 1
+        while self.size < len(self.names):
+            self.size *= 2
+        self.tree = array("i", [-1]) * (2 * self.size)
+        self.tree[self.size:self.size + len(self.names)] = array("i", range(len(self.names)))
+        for node in range(self.size - 1, 0, -1):
+            self.tree[node] = self._better(self.tree[2 * node], self.tree[2 * node + 1])
+
+    def __len__(self):
+        return len(self.names)
+
+    def _better(self, a, b):
+        # Ties go to the earlier position, i.e. alphabetical order.
+        if a < 0 or b < 0:
+            return max(a, b)
+        if self.popularity[a] != self.popularity[b]:
+            return a if self.popularity[a] > self.popularity[b] else b
+        return min(a, b)
+
+    def _most_popular(self, lo, hi):
+        best = -1
+        lo += self.size
+        hi += self.size
+        while lo < hi:
+            if lo & 1:
+                best = self._better(best, self.tree[lo])
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                best = self._better(best, self.tree[hi])
+            lo //= 2
+            hi //= 2
+        return best
+
+    def search(self, prefix, limit, exclude=frozenset()):
+        """
+        Return up to `limit` `(id, name, popularity)` entries whose name
+        starts with `prefix`, most popular first, skipping the ids in
+        `exclude`.
+        """
+        prefix = prefix.casefold()
+        lo = bisect_left(self.names, prefix, key=str.casefold)
+        hi = bisect_left(self.names, prefix + END, lo, key=str.casefold)
+
+        results = []
+        heap = []
+        self._push(heap, lo, hi)
+        while heap and len(results) < limit:
+            _, position, lo, hi = heappop(heap)
+            if self.ids[position] not in exclude:
+                results.append((self.ids[position], self.names[position], self.popularity[position]))
+            self._push(heap, lo, position)
+            self._push(heap, position + 1, hi)
+        return results
+
+    def _push(self, heap, lo, hi):
+        if lo < hi:
+            position = self._most_popular(lo, hi)
+            heappush(heap, (-self.popularity[position], position, lo, hi))
+
+    def memory_usage(self):
+        """
+        Return the bytes held by the index, names included.
+        """
+        arrays = sum(values.itemsize * len(values) for values in (self.ids, self.popularity, self.tree))
+        return sys.getsizeof(self.names) + sum(map(sys.getsizeof, self.names)) + arrays
+
+
+class ProductNames:
+    """
+    The product index at one version: a base index, an overlay of rows
+    changed since it was built, the base ids deleted since, and an id
+    lookup into the base. `counts` holds the number of products per
+    `brand_id` and per `category_id` when the base was built.
+    """
+
+    def __init__(self, version, base, synced_until, changes_until=0, counts=None, by_id=None, overlay=None,
+                 removed=frozenset()):
+        self.version = version
+        self.base = base
+        self.synced_until = synced_until
+        self.changes_until = changes_until
+        self.counts = counts if counts is not None else {"brand_id": {}, "category_id": {}}
+        if by_id is None:
+            by_id = array("i", sorted(range(len(base)), key=base.ids.__getitem__))
+        self.by_id = by_id
+        self.overlay = overlay or {}
+        self.removed = removed
+        self.overlay_index = PrefixIndex((pk, name, popularity) for pk, (name, popularity) in self.overlay.items())
+
+    def __len__(self):
+        added = sum(1 for pk in self.overlay if self.base_position(pk) is None)
+        return len(self.base) - len(self.removed) + added
+
+    def base_position(self, pk):
+        index = bisect_left(self.by_id, pk, key=self.base.ids.__getitem__)
+        if index < len(self.by_id) and self.base.ids[self.by_id[index]] == pk:
+            return self.by_id[index]
+        return None
+
+    def with_changes(self, version, rows, changes):
+        """
+        Return a copy with the `(id, name, popularity, updated_at)` rows
+        merged into the overlay and the `(sequence, id, action)` product
+        changes of the feed applied.
+        """
+        synced_until = self.synced_until
+        overlay = dict(self.overlay)
+        removed = set(self.removed)
+        for pk, name, popularity, updated_at in rows:
+            synced_until = max(synced_until, updated_at)
+            position = self.base_position(pk)
+            removed.discard(pk)
+            unchanged = (
+                position is not None and self.base.names[position] == name
+                and self.base.popularity[position] == popularity
+            )
+            if unchanged:
+                overlay.pop(pk, None)
+            else:
+                overlay[pk] = (name, popularity)
+
+        changes_until = self.changes_until
+        for sequence, pk, action in changes:
+            changes_until = sequence
+            if action == "delete":
+                overlay.pop(pk, None)
+                if self.base_position(pk) is not None:
+                    removed.add(pk)
+
+        return ProductNames(
+            version, self.base, synced_until, changes_until, self.counts, by_id=self.by_id, overlay=overlay,
+            removed=frozenset(removed)
+        )
+
+    def search(self, prefix, limit, hidden=frozenset()):
+        results = self.base.search(prefix, limit, exclude=self.overlay.keys() | self.removed | hidden)
+        results += self.overlay_index.search(prefix, limit, exclude=hidden)
+        results.sort(key=lambda entry: (-entry[2], entry[1].casefold(), entry[0]))
+        return results[:limit]
+
+    def memory_usage(self):
+        return (
+            self.base.memory_usage() + self.by_id.itemsize * len(self.by_id)
+            + self.overlay_index.memory_usage() + sys.getsizeof(self.overlay)
+        )
+
+
+_executor = None
+
+
+def get_executor():
+    """
+    Return the thread that builds product indexes, starting it on first use.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="autocomplete")
+    return _executor
+
+
+class Autocomplete:
+    """
+    The suggestion indexes kept by this process.
+    """
+
+    def __init__(self):
+        self._products = None
+        self._groups = {}
+        self._hidden = None
+        self._lock = threading.Lock()
+        self._rebuilding = False
+
+    def suggest(self, prefix, limit=10):
+        """
+        Return `{"products": [...], "brands": [...], "categories": [...]}`
+        with up to `limit` `{"id", "name"}` suggestions each.
+        """
+        products = self.products()
+        results = {"products": products.search(prefix, limit, self.hidden()) if products is not None else []}
+        for name, table in (("brands", lookups.brands), ("categories", lookups.categories)):
+            results[name] = self.group(name, table, products).search(prefix, limit)
+
+        return {name: [{"id": pk, "name": text} for pk, text, _ in entries] for name, entries in results.items()}
+
+    def products(self):
+        """
+        Return the product index, synced to the "product" version stamp
+        unless a rebuild is under way, or None before the first build.
+        """
+        [version] = get_versions(["product"])
+        names = self._products
+        if names is not None and (names.version == version or self._rebuilding):
+            return names
+
+        with self._lock:
+            names = self._products
+            if names is None:
+                self.schedule_rebuild()
+                names = self._products
+            elif names.version != version and not self._rebuilding:
+                synced = self._sync(names, version)
+                if synced is None:
+                    self.schedule_rebuild()
+                else:
+                    self._products = names = synced
+        return names
+
+    def group(self, name, table, products):
+        """
+        Return the brand or category index, rebuilt when the lookup table
+        changes or a product build brings new counts.
+        """
+        snapshot = table.current()
+        counts = products.counts[f"{table.namespace}_id"] if products is not None else {}
+        cached = self._groups.get(name)
+        if cached is not None and cached[0] is snapshot and cached[1] is counts:
+            return cached[2]
+
+        index = PrefixIndex((obj.pk, obj.name, counts.get(obj.pk, 0)) for obj in snapshot.objects)
+        self._groups[name] = (snapshot, counts, index)
+        return index
+
+    def hidden(self):
+        """
+        Return the ids of the products of brands and categories being
+        deleted, read again when either lookup table changes.
+        """
+        brands, categories = lookups.brands.current(), lookups.categories.current()
+        cached = self._hidden
+        if cached is not None and cached[0] is brands and cached[1] is categories:
+            return cached[2]
+
+        ids = frozenset()
+        if brands.deleting_ids or categories.deleting_ids:
+            deleting = Q(brand_id__in=brands.deleting_ids) | Q(category_id__in=categories.deleting_ids)
+            ids = frozenset(Product.objects.filter(deleting).values_list("pk", flat=True))
+        self._hidden = (brands, categories, ids)
+        return ids
+
+    def clear(self):
+        self._products = None
+        self._groups = {}
+        self._hidden = None
+
+    def memory_usage(self):
+        """
+        Return the bytes held by each index of this process.
+        """
+        usage = {name: cached[2].memory_usage() for name, cached in self._groups.items()}
+        if self._products is not None:
+            usage["products"] = self._products.memory_usage()
+        return usage
+
+    def schedule_rebuild(self):
+        """
+        Rebuild the product index on the background thread, unless a
+        rebuild is already under way.
+        """
+        if not self._rebuilding:
+            self._rebuilding = True
+            get_executor().submit(self._rebuild_in_background)
+
+    def _rebuild_in_background(self):
+        close_old_connections()
+        try:
+            self.rebuild()
+        except Exception:
+            logger.exception("Autocomplete rebuild failed")
+        finally:
+            self._rebuilding = False
+            close_old_connections()
+
+    def rebuild(self):
+        """
+        Build the product index and the brand and category counts from the
+        product table and swap them in.
+        """
+        [version] = get_versions(["product"])
+        # Taken first: rows written during the build are read again by the
+        # next sync.
+        synced_until = Product.objects.order_by("-updated_at").values_list("updated_at", flat=True).first()
+        changes_until = CatalogChange.objects.aggregate(last=Max("id"))["last"] or 0
+        counts = {
+            column: dict(Product.objects.order_by().values_list(column).annotate(count=Count("id")))
+            for column in ("brand_id", "category_id")
+        }
+        rows = Product.objects.values_list("id", "name", "rating_count").iterator(chunk_size=LOAD_CHUNK_SIZE)
+        names = ProductNames(version, PrefixIndex(rows), synced_until, changes_until, counts)
+        self._products = names
+        return names
+
+    def _sync(self, names, version):
+        if names.synced_until is None:
+            return None
+
+        changed = Product.objects.filter(updated_at__gte=names.synced_until - SYNC_OVERLAP)
+        rows = list(changed.values_list("id", "name", "rating_count", "updated_at")[:MAX_OVERLAY + 1])
+        if len(rows) > MAX_OVERLAY:
+            return None
+        changes = list(
+            CatalogChange.objects.filter(pk__gt=names.changes_until, target="product")
+            .order_by("pk").values_list("pk", "object_id", "action")[:MAX_OVERLAY + 1]
+        )
+        if len(changes) > MAX_OVERLAY:
+            return None
+
+        names = names.with_changes(version, rows, changes)
+        if len(names.overlay) > MAX_OVERLAY or len(names) != Product.objects.count():
+            # Too many changes to keep aside, or a deletion the feed does
+            # not show yet.
+            return None
+        return names
+
+
+autocomplete = Autocomplete()
@@ -0,0 +1,140 @@
+import csv
+import json
+import time
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from products_app import lookups
+from products_app.models import Product
+from products_app.signals import products_bulk_saved
+
+FILE_FORMATS = ["csv", "jsonl"]
+
+IMPORT_FIELDS = ["name", "description", "price", "stock"]
+
+
+def iter_rows(stream, file_format):
+    """
+    Yield `(line_number, row)` pairs parsed lazily from a text stream. A row
+    is a dict, or a `ValidationError` if the line could not be parsed.
+    """
+    if file_format == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line_number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                row = ValidationError(f"Invalid JSON: {e}")
+            else:
+                if not isinstance(row, dict):
+                    row = ValidationError("Expected a JSON object.")
+            yield line_number, row
+
+
+class ProductImporter:
+    """
+    Stream products from a CSV or JSONL file into the catalog.
+
+    Brands and categories are referenced by name and resolved through
+    snapshots of the in-memory lookup tables taken once per import. Valid
+    rows are written with `bulk_create`, one transaction per batch, and rows
+    that fail validation are reported with their line number instead of
+    aborting the import.
+    """
+
+    def __init__(self, batch_size=5000, max_errors=1000, using="default"):
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.using = using
+        self.fields = {name: Product._meta.get_field(name) for name in IMPORT_FIELDS}
+
+    def run(self, stream, file_format):
+        """
+        Import every row of `stream` and return a report of the import.
+        """
+        self.brands = lookups.brands.current()
+        self.categories = lookups.categories.current()
+        self.rows = self.created = self.error_count = 0
+        self.errors = []
+
+        started = time.perf_counter()
+        batch = []
+        for line_number, row in iter_rows(stream, file_format):
+            self.rows += 1
+            product = self.build_product(line_number, row)
+            if product is not None:
+                batch.append(product)
+            if len(batch) >= self.batch_size:
+                self.write(batch)
+                batch = []
+        if batch:
+            self.write(batch)
+        elapsed = time.perf_counter() - started
+
+        return {
+            "rows": self.rows,
+            "created": self.created,
+            "error_count": self.error_count,
+            "errors": self.errors,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(self.rows / elapsed) if elapsed else 0,
+        }
+
+    def build_product(self, line_number, row):
+        """
+        Validate a parsed row and return an unsaved `Product`, or record the
+        errors and return None.
+        """
+        if isinstance(row, ValidationError):
+            self.add_error(line_number, {"row": row.messages})
+            return None
+
+        values = {}
+        errors = {}
+        for name, field in self.fields.items():
+            raw = row.get(name)
+            if isinstance(raw, str):
+                raw = raw.strip()
+            try:
+                values[name] = field.clean(raw, None)
+            except ValidationError as e:
+                errors[name] = e.messages
+
+        for name, snapshot in (("brand", self.brands), ("category", self.categories)):
+            if not isinstance(row.get(name), (str, type(None))):
+                # JSONL rows can hold lists or objects, which are no names
+                # and cannot be looked up.
+                errors[name] = [f"Expected a {name} name."]
+                continue
+            ids = snapshot.ids_for_name(row.get(name))
+            if not ids:
+                errors[name] = [f"Unknown {name} {row.get(name)!r}."]
+            elif len(ids) > 1:
+                errors[name] = [f"Several {name} rows are named {row.get(name)!r}."]
+            else:
+                values[f"{name}_id"] = ids[0]
+
+        if errors:
+            self.add_error(line_number, errors)
+            return None
+
+        return Product(**values)
+
+    def add_error(self, line_number, errors):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line_number, "errors": errors})
+
+    def write(self, batch):
+        with transaction.atomic(using=self.using):
+            Product.objects.using(self.using).bulk_create(batch, batch_size=self.batch_size)
+            products_bulk_saved.send(
+                sender=Product, product_ids=[product.pk for product in batch], fields=None, using=self.using
+            )
+        self.created += len(batch)
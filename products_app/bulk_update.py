@@ -0,0 +1,74 @@
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from products_app.models import Product
+from products_app.signals import products_bulk_saved
+
+BATCH_SIZE = 500
+
+
+def apply_bulk_update(items, batch_size=BATCH_SIZE, using="default"):
+    """
+    Apply price and stock changes to many products in one transaction.
+
+    Each item is a dict with an `id` and any of `price`, `stock` (absolute)
+    and `stock_delta` (relative). Every batch is written with a single
+    `UPDATE ... SET price = CASE ... END, stock = CASE ... END`. Relative
+    changes are applied as `stock = stock + n` in SQL, so concurrent
+    adjustments to the same product add up instead of overwriting each
+    other. Returns one result per item, in request order.
+    """
+    results = {}
+    with transaction.atomic(using=using):
+        for start in range(0, len(items), batch_size):
+            results.update(_apply_batch(items[start:start + batch_size], using))
+
+    return [results[item["id"]] for item in items]
+
+
+def _apply_batch(batch, using):
+    products = Product.objects.using(using)
+    # Row locks make the stock check below exact on backends that have them.
+    stocks = dict(
+        products.select_for_update().filter(pk__in=[item["id"] for item in batch]).values_list("pk", "stock")
+    )
+
+    results = {}
+    price_cases = []
+    stock_cases = []
+    for item in batch:
+        pk = item["id"]
+        delta = item.get("stock_delta")
+        if pk not in stocks:
+            results[pk] = {"id": pk, "status": "not_found"}
+            continue
+        if delta is not None and stocks[pk] + delta < 0:
+            results[pk] = {"id": pk, "status": "insufficient_stock"}
+            continue
+
+        if "price" in item:
+            price_cases.append(When(pk=pk, then=Value(item["price"])))
+        if "stock" in item:
+            stock_cases.append(When(pk=pk, then=Value(item["stock"])))
+        elif delta is not None:
+            stock_cases.append(When(pk=pk, then=F("stock") + delta))
+        results[pk] = None
+
+    updated = [pk for pk, result in results.items() if result is None]
+    if not updated:
+        return results
+
+    fields = {"updated_at": timezone.now()}
+    if price_cases:
+        fields["price"] = Case(*price_cases, default=F("price"), output_field=Product._meta.get_field("price"))
+    if stock_cases:
+        fields["stock"] = Case(*stock_cases, default=F("stock"), output_field=Product._meta.get_field("stock"))
+    products.filter(pk__in=updated).update(**fields)
+
+    products_bulk_saved.send(sender=Product, product_ids=updated, fields=list(fields), using=using)
+
+    for pk, price, stock in products.filter(pk__in=updated).values_list("pk", "price", "stock"):
+        results[pk] = {"id": pk, "status": "updated", "price": price, "stock": stock}
+
+    return results
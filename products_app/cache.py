@@ -0,0 +1,184 @@
+import hashlib
+import threading
+import time
+
+from django.core.cache import cache, caches
+
+# Cached catalog data is keyed by a version stamp per model ("product",
+# "brand", "category"). Writes bump the stamp instead of hunting down the
+# affected keys, so stale entries simply stop being addressed and age out of
+# the cache. A reader that loaded a row just before a write stores it under
+# the old stamp, which is never read again.
+#
+# The stamps are what tells one worker process that another has written,
+# so they are kept in the `VERSION_CACHE` cache, which all processes must
+# share (see `products_app.checks`), while the entries themselves may stay
+# in each process's own `default` cache.
+#
+# Product details are keyed by the product's `updated_at` instead, which
+# every write to a product moves on: a namespace-wide stamp would drop
+# every cached product whenever any one of them changed, reviews included.
+
+VERSION_CACHE = "versions"
+
+VERSION_KEY = "products_app:version:{namespace}"
+
+DETAIL_TIMEOUT = 60 * 60
+
+
+class CacheStats:
+    """
+    Hit and miss counters for the detail response cache of this process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def as_dict(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+stats = CacheStats()
+
+
+def _version_key(namespace):
+    return VERSION_KEY.format(namespace=namespace)
+
+
+def get_versions(namespaces):
+    """
+    Return the current version stamp of each namespace, in order.
+    """
+    stamps = caches[VERSION_CACHE]
+    keys = [_version_key(namespace) for namespace in namespaces]
+    versions = stamps.get_many(keys)
+
+    for key in keys:
+        if key not in versions:
+            # Start from the clock rather than 1, so that an evicted stamp
+            # can never come back at a value older entries were stored under.
+            stamps.add(key, time.time_ns(), timeout=None)
+            versions[key] = stamps.get(key)
+
+    return [versions[key] for key in keys]
+
+
+def bump_version(namespace):
+    """
+    Invalidate everything cached under `namespace`, in every process.
+    """
+    stamps = caches[VERSION_CACHE]
+    key = _version_key(namespace)
+    # Not atomic on every backend: the file cache reads and rewrites the
+    # stamp, so of two concurrent bumps one can be lost. Writers bump again
+    # once their transaction has committed, which covers that as well as
+    # readers that refilled an entry in between.
+    try:
+        stamps.incr(key)
+    except ValueError:
+        stamps.add(key, time.time_ns(), timeout=None)
+
+
+def make_key(name, params="", depends_on=()):
+    """
+    Build a cache key for `name` that changes whenever any of the
+    `depends_on` namespaces is bumped.
+    """
+    return _build_key(name, params, get_versions(depends_on))
+
+
+def _build_key(name, params, versions):
+    versions = ".".join(str(version) for version in versions)
+    digest = hashlib.md5(params.encode("utf-8")).hexdigest()
+    return f"products_app:{name}:{versions}:{digest}"
+
+
+def normalize_query_params(query_params, exclude=()):
+    """
+    Return a canonical string for `query_params`, ignoring parameter order
+    and the names in `exclude`.
+    """
+    items = sorted(
+        (key, value)
+        for key, values in query_params.lists() if key not in exclude
+        for value in values if value != ""
+    )
+    return "&".join(f"{key}={value}" for key, value in items)
+
+
+def _detail_key(namespace, pk, params, versions, revision):
+    # With a revision the entry belongs to one state of the object, and
+    # writes to the rest of the namespace leave it addressable.
+    if revision is not None:
+        versions = [revision, *versions[1:]]
+    return _build_key(f"detail:{namespace}:{pk}", params, versions)
+
+
+def get_or_set_detail(namespace, pk, loader, params="", depends_on=(), revision=None):
+    """
+    Return the cached response data for object `pk` of `namespace`, calling
+    `loader` to build and cache it on a miss. `depends_on` lists further
+    namespaces embedded in the data.
+
+    `revision` identifies the current state of the object, such as its
+    `updated_at`. When given, it keys the entry instead of the namespace
+    stamp, so only writes to this object invalidate it.
+    """
+    versions = get_versions([namespace, *depends_on])
+    key = _detail_key(namespace, pk, params, versions, revision)
+
+    data = cache.get(key)
+    stats.record(hit=data is not None)
+    if data is None:
+        data = loader()
+        cache.set(key, data, DETAIL_TIMEOUT)
+
+    return data
+
+
+def get_or_set_details(namespace, pks, loader, params="", depends_on=(), revisions=None):
+    """
+    Return `{pk: data}` for the objects `pks` of `namespace`, read with one
+    cache lookup. `loader` is called once with the pks that missed and
+    returns `{pk: data}` for those that exist; pks it leaves out are
+    missing from the result. `revisions` optionally maps pks to their
+    revision, as for `get_or_set_detail`.
+
+    Entries are shared with `get_or_set_detail` for the same `params`.
+    """
+    versions = get_versions([namespace, *depends_on])
+    revisions = revisions or {}
+    keys = {pk: _detail_key(namespace, pk, params, versions, revisions.get(pk)) for pk in pks}
+
+    cached = cache.get_many(keys.values())
+    found = {pk: cached[key] for pk, key in keys.items() if key in cached}
+    for pk in keys:
+        stats.record(hit=pk in found)
+
+    misses = [pk for pk in keys if pk not in found]
+    if misses:
+        loaded = loader(misses)
+        cache.set_many({keys[pk]: data for pk, data in loaded.items()}, DETAIL_TIMEOUT)
+        found.update(loaded)
+
+    return found
@@ -0,0 +1,103 @@
+from django.db import transaction
+
+from ecomm.fast_serialization import serialize_queryset
+from products_app.models import Brand, CatalogChange, Category, Product
+
+# A change feed over products, brands and categories.
+#
+# Every write to one of them records a `CatalogChange` for the object,
+# replacing the entry it had, so the table holds one row per object ever
+# seen: its latest change, or a tombstone once it is deleted. The entry's
+# id is a sequence number that only grows (SQLite's AUTOINCREMENT and
+# PostgreSQL sequences never hand out a number twice), and a client that
+# remembers the highest number it has read asks for the entries above it:
+# a range on the primary key, which for an empty delta is a single probe.
+# Because older entries of an object are removed, a client that falls
+# behind reads each changed object once, in its latest state.
+#
+# The feed relies on SQLite serializing writers. Numbers then become
+# visible in the order they were taken, and no two transactions replace an
+# object's entry at the same time. On a database with concurrent writers a
+# transaction that took a lower number can commit after a reader has moved
+# past it, losing that entry, and two writers can each leave an entry for
+# the same object; the `products_app.W002` check warns about this.
+
+MAX_LIMIT = 500
+
+# Keeps `__in` lists below the SQLite variable limit.
+BATCH_SIZE = 500
+
+
+def record_changes(target, ids, action="upsert", using="default"):
+    """
+    Record that the objects `ids` of `target` ("product", "brand" or
+    "category") were written, or deleted with `action="delete"`.
+    """
+    ids = list(dict.fromkeys(ids))
+    # Part of the caller's transaction when there is one; no savepoint.
+    with transaction.atomic(using=using, savepoint=False):
+        for start in range(0, len(ids), BATCH_SIZE):
+            batch = ids[start:start + BATCH_SIZE]
+            changes = CatalogChange.objects.using(using)
+            changes.filter(target=target, object_id__in=batch).delete()
+            changes.bulk_create(CatalogChange(target=target, object_id=pk, action=action) for pk in batch)
+
+
+def read_changes(since=0, limit=100):
+    """
+    Return up to `limit` entries with a sequence number above `since`, as
+    `{"sequence", "type", "id", "action", "changed_at", "data"}` dicts, and
+    whether more follow. `data` is the object as the detail endpoint shows
+    it, or None for deletions.
+    """
+    changes = CatalogChange.objects.filter(id__gt=since).order_by("id")
+    changes = list(changes.values_list("id", "target", "object_id", "action", "changed_at")[:limit + 1])
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    data = _load(changes)
+    entries = []
+    for sequence, target, pk, action, changed_at in changes:
+        row = data[target].get(pk) if action == "upsert" else None
+        entries.append({
+            "sequence": sequence,
+            "type": target,
+            "id": pk,
+            # Deleted since it was written, or hidden by a deletion under way:
+            # the database has no row to send, and the tombstone follows.
+            "action": action if row is not None or action == "delete" else "delete",
+            "changed_at": changed_at,
+            "data": row,
+        })
+    return entries, has_more
+
+
+def _load(changes):
+    # Imported here: the serializers import this module through
+    # `bulk_import` and the signals.
+    from products_app.api.serializers import (BrandSerializer,
+                                              CategorySerializer,
+                                              ProductSerializer)
+
+    wanted = {"product": [], "brand": [], "category": []}
+    for _, target, pk, action, _ in changes:
+        if action == "upsert":
+            wanted[target].append(pk)
+
+    # Read from the database rather than the lookup tables, whose copy in
+    # this process may not have the objects just written yet.
+    querysets = {
+        "brand": (Brand.objects.filter(is_deleting=False), BrandSerializer()),
+        "category": (Category.objects.filter(is_deleting=False), CategorySerializer()),
+        "product": (
+            Product.objects.filter(brand__is_deleting=False, category__is_deleting=False),
+            ProductSerializer()
+        ),
+    }
+    data = {}
+    for target, (queryset, serializer) in querysets.items():
+        data[target] = {}
+        for start in range(0, len(wanted[target]), BATCH_SIZE):
+            rows = serialize_queryset(serializer, queryset.filter(pk__in=wanted[target][start:start + BATCH_SIZE]))
+            data[target].update((row["id"], row) for row in rows)
+    return data
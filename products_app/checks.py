@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+from django.db import connections
+
+from products_app.cache import VERSION_CACHE
+
+PROCESS_LOCAL_BACKENDS = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+@register(Tags.caches)
+def check_version_cache(app_configs, **kwargs):
+    """
+    Check that the catalog version stamps are kept in a cache that every
+    worker process reads, and that they do not expire.
+    """
+    config = settings.CACHES.get(VERSION_CACHE)
+    if config is None:
+        return [Error(
+            f"CACHES has no {VERSION_CACHE!r} cache for the catalog version stamps.",
+            hint="Configure a cache shared by all worker processes, such as the file, Redis or Memcached backend.",
+            id="products_app.E001",
+        )]
+    if config["BACKEND"] in PROCESS_LOCAL_BACKENDS:
+        return [Warning(
+            f"The {VERSION_CACHE!r} cache is private to each process, so a catalog write is only seen by the "
+            "process that made it.",
+            hint="Only run a single worker process, or use a shared cache backend.",
+            id="products_app.W001",
+        )]
+    if config.get("TIMEOUT", 300) is not None:
+        return [Warning(
+            f"The {VERSION_CACHE!r} cache has a default timeout, so catalog version stamps expire after a write "
+            "and every worker reloads its catalog caches at once.",
+            hint=f"Set \"TIMEOUT\": None on the {VERSION_CACHE!r} cache.",
+            id="products_app.W003",
+        )]
+    return []
+
+
+@register(Tags.database)
+def check_change_feed_database(app_configs, databases=None, **kwargs):
+    """
+    Check that the catalog change feed runs on SQLite, whose serialized
+    writers keep its sequence numbers in commit order.
+    """
+    if not databases or "default" not in databases or connections["default"].vendor == "sqlite":
+        return []
+    return [Warning(
+        "The catalog change feed assumes writers are serialized, as on SQLite. With concurrent writers an "
+        "entry committed after a client has read past its number is never sent to that client.",
+        hint="Read the catalog changes only on SQLite, or give them a sequence assigned at commit time.",
+        id="products_app.W002",
+    )]
@@ -0,0 +1,186 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import partial
+
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from products_app import changes, lookups
+from products_app.cache import bump_version
+from products_app.models import Brand, Category, DeletionJob, Product
+
+logger = logging.getLogger(__name__)
+
+# Deleting brands and categories without one huge cascade.
+#
+# A brand's `delete()` cascades through its products and everything that
+# points at them (images, reviews, cart and order items) in a single
+# transaction, which on SQLite holds the write lock for as long as that
+# takes. Brands and categories with more than `BATCH_SIZE` products are
+# therefore only marked `is_deleting`, which hides them and their products
+# from reads (see `lookups` and `visible_products`), and a `DeletionJob`
+# removes the products `BATCH_SIZE` at a time, each batch in its own
+# transaction, before deleting the emptied row itself.
+#
+# Jobs run on a single background thread of the process that started them.
+# A job interrupted by a restart is picked up again by the
+# `run_deletion_jobs` command; it simply carries on with the products left.
+# Only one runner works on a job at a time: a runner claims the job by
+# moving it to `running`, and each batch is only committed while the job's
+# `updated_at` is still the one that runner last wrote. A running job that
+# has not moved for `STALE_AFTER` is taken to have died, and the next
+# runner takes it over.
+
+BATCH_SIZE = 200
+
+# Pause between batches, which lets other writers take the lock.
+BATCH_PAUSE = 0.05
+
+STALE_AFTER = timedelta(minutes=10)
+
+TARGETS = {"brand": (Brand, lookups.brands), "category": (Category, lookups.categories)}
+
+_executor = None
+
+
+def get_executor():
+    """
+    Return the thread that runs deletion jobs, starting it on first use.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="deletion")
+    return _executor
+
+
+def visible_products(queryset, prefix=""):
+    """
+    Exclude from `queryset` the products of brands and categories being
+    deleted. Adds no condition, and no query, when there are none. For
+    querysets of other models, `prefix` is the path to the product, such
+    as `"product__"`.
+    """
+    brand_ids = lookups.brands.current().deleting_ids
+    category_ids = lookups.categories.current().deleting_ids
+    if brand_ids:
+        queryset = queryset.exclude(**{f"{prefix}brand_id__in": brand_ids})
+    if category_ids:
+        queryset = queryset.exclude(**{f"{prefix}category_id__in": category_ids})
+    return queryset
+
+
+def _invalidate(target, using="default"):
+    # `update()` sends no signals, so bump what the post_save receivers
+    # would, now and again on commit.
+    for namespace in (target, "product"):
+        bump_version(namespace)
+        transaction.on_commit(partial(bump_version, namespace), using=using)
+
+
+def delete_or_schedule(obj):
+    """
+    Delete the brand or category `obj` right away if it has few products,
+    and return None. Otherwise hide it, queue its deletion and return the
+    `DeletionJob`.
+    """
+    target = obj._meta.model_name
+    products = Product.objects.filter(**{target: obj})
+    if not products[BATCH_SIZE:BATCH_SIZE + 1].exists():
+        obj.delete()
+        return None
+
+    with transaction.atomic():
+        type(obj).objects.filter(pk=obj.pk).update(is_deleting=True)
+        # Gone as far as readers are concerned; its products follow batch
+        # by batch.
+        changes.record_changes(target, [obj.pk], action="delete")
+        job = DeletionJob.objects.create(target=target, object_id=obj.pk, products_total=products.count())
+        _invalidate(target)
+        transaction.on_commit(partial(schedule_deletion, job.pk))
+    return job
+
+
+def schedule_deletion(pk):
+    """
+    Run the `DeletionJob` with primary key `pk` in the background.
+    """
+    return get_executor().submit(_run_in_background, pk)
+
+
+def _run_in_background(pk):
+    close_old_connections()
+    try:
+        run_deletion_job(pk)
+    except Exception:
+        logger.exception("Deletion job %s failed", pk)
+    finally:
+        close_old_connections()
+
+
+def claim_deletion_job(pk):
+    """
+    Mark the job with primary key `pk` as running for the caller and return
+    the time the claim was stamped with, or None if the job is done or
+    another runner is working on it.
+    """
+    now = timezone.now()
+    claimable = Q(status__in=("pending", "failed")) | Q(status="running", updated_at__lt=now - STALE_AFTER)
+    if not DeletionJob.objects.filter(claimable, pk=pk).update(status="running", error="", updated_at=now):
+        return None
+    return now
+
+
+def run_deletion_job(pk):
+    """
+    Delete the products of the job's brand or category in batches, then
+    the brand or category itself. Returns the job, or None if another
+    runner is working on it.
+    """
+    job = DeletionJob.objects.get(pk=pk)
+    if job.status == "done":
+        return job
+    stamp = claim_deletion_job(pk)
+    if stamp is None:
+        job.refresh_from_db()
+        return job if job.status == "done" else None
+
+    model, _ = TARGETS[job.target]
+    products = Product.objects.filter(**{f"{job.target}_id": job.object_id}).order_by("pk")
+
+    try:
+        while True:
+            with transaction.atomic():
+                ids = list(products.values_list("pk", flat=True)[:BATCH_SIZE])
+                deleted = 0
+                if ids:
+                    _, counts = Product.objects.filter(pk__in=ids).delete()
+                    deleted = counts.get(Product._meta.label, 0)
+                now = timezone.now()
+                if not DeletionJob.objects.filter(pk=pk, status="running", updated_at=stamp).update(
+                    products_deleted=F("products_deleted") + deleted, updated_at=now
+                ):
+                    # Taken over by another runner; leave the batch to it.
+                    transaction.set_rollback(True)
+                    return None
+                stamp = now
+            if not ids:
+                break
+            time.sleep(BATCH_PAUSE)
+
+        with transaction.atomic():
+            if not DeletionJob.objects.filter(pk=pk, status="running", updated_at=stamp).update(
+                status="done", finished_at=timezone.now(), updated_at=timezone.now()
+            ):
+                transaction.set_rollback(True)
+                return None
+            model.objects.filter(pk=job.object_id).delete()
+    except Exception as exc:
+        DeletionJob.objects.filter(pk=pk, status="running", updated_at=stamp).update(
+            status="failed", error=str(exc), updated_at=timezone.now()
+        )
+        raise
+    job.refresh_from_db()
+    return job
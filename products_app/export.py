@@ -0,0 +1,92 @@
+import csv
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from django.utils import timezone
+
+from products_app.deletion import visible_products
+from products_app.models import Product
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Same keys as `ProductSerializer`, with foreign keys as ids.
+EXPORT_FIELDS = [field.name for field in Product._meta.concrete_fields]
+
+CHUNK_SIZE = 2000
+
+LINES_PER_WRITE = 500
+
+
+def to_json_value(value):
+    """
+    Convert a database value the way the product serializer renders it.
+    """
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime):
+        value = timezone.localtime(value).isoformat()
+        if value.endswith("+00:00"):
+            value = value[:-6] + "Z"
+        return value
+    return value
+
+
+def export_queryset(updated_since=None):
+    """
+    Return the rows to export as tuples of `EXPORT_FIELDS`.
+
+    Full exports walk the primary key; incremental exports walk the
+    `updated_at` index from `updated_since` on. Products of brands and
+    categories being deleted are left out.
+    """
+    queryset = visible_products(Product.objects.all())
+    if updated_since is not None:
+        queryset = queryset.filter(updated_at__gte=updated_since).order_by("updated_at", "pk")
+    else:
+        queryset = queryset.order_by("pk")
+
+    return queryset.values_list(*EXPORT_FIELDS).iterator(chunk_size=CHUNK_SIZE)
+
+
+class _Echo:
+    """
+    A file-like object that hands back whatever is written to it, so that
+    `csv.writer` can format single rows for streaming.
+    """
+
+    def write(self, value):
+        return value
+
+
+def _ndjson_lines(rows):
+    for row in rows:
+        record = dict(zip(EXPORT_FIELDS, map(to_json_value, row)))
+        yield json.dumps(record, separators=(",", ":")) + "\n"
+
+
+def _csv_lines(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow([to_json_value(value) for value in row])
+
+
+def export_lines(rows, export_format):
+    """
+    Serialize `rows` lazily, grouping lines so that the response is written
+    in a few hundred chunks rather than one per product.
+    """
+    lines = _ndjson_lines(rows) if export_format == "ndjson" else _csv_lines(rows)
+
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= LINES_PER_WRITE:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
@@ -0,0 +1,52 @@
+from django.db.models import Count, Q
+
+from products_app import lookups
+
+# Upper bound of each price bucket; the last bucket is open-ended.
+PRICE_BUCKETS = [25, 50, 100, 250, 500, None]
+
+
+def compute_facets(queryset):
+    """
+    Count the products in `queryset` per category, per brand and per price
+    bucket, using one grouped aggregate query per facet. Category and brand
+    names come from the lookup tables rather than a join.
+    """
+    queryset = queryset.order_by()
+
+    categories = (
+        queryset.values("category_id")
+        .annotate(count=Count("id"))
+        .order_by("-count", "category_id")
+    )
+    brands = (
+        queryset.values("brand_id")
+        .annotate(count=Count("id"))
+        .order_by("-count", "brand_id")
+    )
+
+    bounds = list(zip([0] + PRICE_BUCKETS[:-1], PRICE_BUCKETS))
+    aggregates = {}
+    for index, (low, high) in enumerate(bounds):
+        condition = Q(price__gte=low)
+        if high is not None:
+            condition &= Q(price__lt=high)
+        aggregates[f"bucket_{index}"] = Count("id", filter=condition)
+    counts = queryset.aggregate(**aggregates)
+    category_names = lookups.categories.current()
+    brand_names = lookups.brands.current()
+
+    return {
+        "categories": [
+            {"id": row["category_id"], "name": category_names.name_for_id(row["category_id"]), "count": row["count"]}
+            for row in categories
+        ],
+        "brands": [
+            {"id": row["brand_id"], "name": brand_names.name_for_id(row["brand_id"]), "count": row["count"]}
+            for row in brands
+        ],
+        "price": [
+            {"min": low, "max": high, "count": counts[f"bucket_{index}"]}
+            for index, (low, high) in enumerate(bounds)
+        ],
+    }
@@ -0,0 +1,160 @@
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+# Resized copies of every uploaded product image.
+#
+# Listing pages only need a small picture per product, so serving the
+# original upload costs both bandwidth and client-side decoding. When a
+# `ProductImage` is saved, its original is handed to a process pool that
+# renders each variant below as WebP and JPEG next to it under
+# `product_images/variants/`. The paths and dimensions are then written to
+# `ProductImage.variants`. Rendering happens outside the request thread and
+# outside the GIL; until it finishes `variants` is empty and clients fall
+# back to the original.
+#
+# This module is imported by the worker processes, so it must not import
+# models at module level.
+
+logger = logging.getLogger(__name__)
+
+VARIANTS_DIR = "product_images/variants"
+
+# Bounding boxes; images are scaled down to fit and never scaled up.
+VARIANT_SIZES = {
+    "thumbnail": (160, 160),
+    "card": (480, 480),
+    "zoom": (1600, 1600),
+}
+
+VARIANT_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+_executor = None
+
+
+def get_executor():
+    """
+    Return the process pool used to render variants, starting it on first use.
+
+    Workers are spawned rather than forked so that they never inherit the
+    parent's database connections or threads.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=getattr(settings, "PRODUCT_IMAGE_WORKERS", 2),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+def render_variants(source_path, media_root, stem):
+    """
+    Render every variant of the image at `source_path` into `media_root`.
+
+    Returns the value stored in `ProductImage.variants`:
+    `{name: {"width": ..., "height": ..., "webp": path, "jpeg": path}}`, with
+    paths relative to `media_root`.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(source_path) as original:
+        image = ImageOps.exif_transpose(original).convert("RGB")
+
+    os.makedirs(os.path.join(media_root, VARIANTS_DIR), exist_ok=True)
+
+    variants = {}
+    for name, size in VARIANT_SIZES.items():
+        variant = image.copy()
+        variant.thumbnail(size, Image.LANCZOS)
+        entry = {"width": variant.width, "height": variant.height}
+        for extension, (image_format, options) in VARIANT_FORMATS.items():
+            path = f"{VARIANTS_DIR}/{stem}_{name}.{extension}"
+            variant.save(os.path.join(media_root, path), image_format, **options)
+            entry[extension] = path
+        variants[name] = entry
+
+    return variants
+
+
+def variant_stem(product_image):
+    """
+    Return the file name prefix for the variants of `product_image`.
+
+    The primary key is included so that two uploads with the same name never
+    share variants.
+    """
+    name = os.path.splitext(os.path.basename(product_image.image.name))[0]
+    return f"{product_image.pk}_{name}"
+
+
+def schedule_variants(product_image):
+    """
+    Queue variant rendering for `product_image` and return the future.
+
+    The result is stored from a callback once the worker is done.
+    """
+    future = get_executor().submit(
+        render_variants, product_image.image.path, settings.MEDIA_ROOT, variant_stem(product_image)
+    )
+    future.add_done_callback(partial(_store_variants, product_image.pk, product_image.image.name))
+    return future
+
+
+def store_variants(pk, image_name, variants):
+    """
+    Save rendered `variants` on the `ProductImage` with the given pk.
+
+    Nothing is saved if the image was replaced or deleted in the meantime.
+    """
+    from products_app.cache import bump_version
+    from products_app.changes import record_changes
+    from products_app.models import Product, ProductImage
+
+    updated = ProductImage.objects.filter(pk=pk, image=image_name).update(variants=variants)
+    if updated:
+        # The variants are part of the product representation.
+        products = Product.objects.filter(productimage__pk=pk)
+        products.update(updated_at=timezone.now())
+        record_changes("product", products.values_list("pk", flat=True))
+        bump_version("product")
+    return updated
+
+
+def delete_variants(variants):
+    """
+    Remove the files listed in a `ProductImage.variants` value.
+    """
+    for entry in variants.values():
+        for extension in VARIANT_FORMATS:
+            path = entry.get(extension)
+            if path:
+                try:
+                    os.remove(os.path.join(settings.MEDIA_ROOT, path))
+                except FileNotFoundError:
+                    pass
+
+
+def _store_variants(pk, image_name, future):
+    # Runs on the executor's management thread, which has its own database
+    # connection.
+    try:
+        variants = future.result()
+    except Exception:
+        logger.exception("Rendering variants for product image %s failed", pk)
+        return
+
+    close_old_connections()
+    try:
+        store_variants(pk, image_name, variants)
+    finally:
+        close_old_connections()
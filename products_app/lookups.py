@@ -0,0 +1,121 @@
+import threading
+
+from products_app.cache import get_versions
+from products_app.models import Brand, Category
+
+# Process-local copies of the small, rarely changing lookup tables.
+#
+# Brands and categories are read on nearly every catalog request: to list
+# them, to turn `?brand__name=` into a foreign key, to validate the `brand`
+# of a written product and to resolve names during imports. Each process
+# keeps the whole table in memory, tagged with the version stamp of its
+# namespace, which lives in the cache all processes share (see
+# `products_app.cache`). Every access compares that stamp with the shared
+# one, which costs a cache read but no query, and reloads the table with a
+# single query once a write in any process has bumped it. Workers therefore
+# see a change from their next request on without any messaging between
+# them.
+#
+# The list endpoints render the copy once per version and set of fields
+# (`LookupSnapshot.render`), so listing brands or categories neither
+# queries nor serializes row by row.
+#
+# A row written inside a transaction that is later rolled back may stay in
+# the copy of the process that wrote it until the next bump. The stamp is
+# bumped again once a write commits, so committed writes are never missed.
+#
+# Rows being deleted in the background (`is_deleting`) are left out of the
+# copy and only listed in `deleting_ids`, so that their products can be
+# hidden as well.
+
+
+class LookupSnapshot:
+    """
+    An immutable copy of a lookup table at one version.
+    """
+
+    def __init__(self, version, objects):
+        self.version = version
+        self.deleting_ids = frozenset(obj.pk for obj in objects if obj.is_deleting)
+        self.objects = objects = [obj for obj in objects if not obj.is_deleting]
+        self.by_id = {obj.pk: obj for obj in objects}
+        self.by_name = {}
+        for obj in objects:
+            self.by_name.setdefault(obj.name, []).append(obj.pk)
+        self._rendered = {}
+
+    def get(self, pk):
+        """
+        Return the object with primary key `pk`, or None.
+        """
+        return self.by_id.get(pk)
+
+    def ids_for_name(self, name):
+        """
+        Return the ids of the rows named `name`; names are not unique.
+        """
+        return self.by_name.get(name, [])
+
+    def name_for_id(self, pk):
+        obj = self.by_id.get(pk)
+        return obj.name if obj is not None else None
+
+    def render(self, serializer_class, **options):
+        """
+        Return the objects as `serializer_class(**options)` lists them. The
+        result is shared by every caller asking for the same fields and must
+        not be modified.
+        """
+        key = (serializer_class, tuple(serializer_class(**options).fields))
+        data = self._rendered.get(key)
+        if data is None:
+            data = self._rendered[key] = serializer_class(self.objects, many=True, **options).data
+        return data
+
+
+class LookupTable:
+    """
+    The in-memory copy of `model`, reloaded whenever the version stamp of
+    `namespace` changes.
+    """
+
+    def __init__(self, model, namespace):
+        self.model = model
+        self.namespace = namespace
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def current(self):
+        """
+        Return an up-to-date snapshot of the table.
+
+        Callers that make several lookups should keep the snapshot rather
+        than call this again, so that they read one consistent version.
+        """
+        [version] = get_versions([self.namespace])
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.version != version:
+                snapshot = LookupSnapshot(version, list(self.model.objects.order_by("pk")))
+                self._snapshot = snapshot
+        return snapshot
+
+    def __deepcopy__(self, memo):
+        # Serializer fields holding a table are deep-copied per serializer;
+        # they must all share the one copy of the process.
+        return self
+
+    def clear(self):
+        """
+        Drop the copy, so that the next access reloads it.
+        """
+        self._snapshot = None
+
+
+brands = LookupTable(Brand, "brand")
+
+categories = LookupTable(Category, "category")
@@ -0,0 +1,53 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from products_app.autocomplete import autocomplete
+from products_app.cache import bump_version
+from products_app.query_plans import generate_catalog
+
+
+class Command(BaseCommand):
+    help = ("Generate a synthetic catalog, build the autocomplete indexes over it and report their memory "
+            "footprint and lookup latency. The generated rows are rolled back.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000000, help="Number of products to generate.")
+        parser.add_argument("--lookups", type=int, default=10000, help="Number of prefixes to look up.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            generate_catalog(options["rows"])
+            bump_version("product")
+            autocomplete.clear()
+
+            # Built here rather than in the background: the generated rows
+            # are only visible inside this transaction.
+            started = time.perf_counter()
+            autocomplete.rebuild()
+            autocomplete.suggest("")
+            self.stdout.write(f"Built the indexes in {time.perf_counter() - started:.1f}s.")
+            for name, size in autocomplete.memory_usage().items():
+                self.stdout.write(f"{name:<12} {size / 2 ** 20:>8.1f} MiB")
+
+            names = autocomplete.products().base.names
+            prefixes = []
+            for name in random.choices(names, k=options["lookups"]):
+                prefixes.append(name[:random.randint(1, len(name))])
+
+            timings = []
+            for prefix in prefixes:
+                started = time.perf_counter()
+                autocomplete.suggest(prefix)
+                timings.append(time.perf_counter() - started)
+            timings.sort()
+
+            self.stdout.write(
+                f"{len(timings)} lookups: p50 {timings[len(timings) // 2] * 1000:.3f} ms, "
+                f"p99 {timings[int(len(timings) * 0.99)] * 1000:.3f} ms, max {timings[-1] * 1000:.3f} ms"
+            )
+            transaction.set_rollback(True)
+
+        autocomplete.clear()
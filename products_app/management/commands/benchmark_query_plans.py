@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from products_app.query_plans import TEMP_SORT, run_benchmark
+
+
+class Command(BaseCommand):
+    help = ("Generate a synthetic catalog, explain the catalog queries against it and fail if any of them "
+            "reads a table in full. The generated rows are rolled back.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000000, help="Number of products to generate.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("Query plans are only checked on SQLite.")
+
+        results, generation_seconds = run_benchmark(options["rows"])
+        self.stdout.write(f"Generated {options['rows']} products in {generation_seconds:.1f}s.")
+
+        failed = []
+        for name, (plan, scans) in results.items():
+            self.stdout.write(f"\n{name}:")
+            for line in plan:
+                self.stdout.write(f"  {line}")
+            if scans:
+                failed.append(name)
+                self.stdout.write(self.style.ERROR(f"  full scan of {', '.join(scans)}"))
+            elif TEMP_SORT in plan:
+                self.stdout.write(self.style.WARNING("  sorted outside the index"))
+
+        if failed:
+            raise CommandError(f"Full table scans in: {', '.join(failed)}.")
+        self.stdout.write(self.style.SUCCESS(f"\nNo full table scans in {len(results)} catalog queries."))
@@ -0,0 +1,123 @@
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from ecomm.fast_serialization import serialize_queryset
+from orders_app.api.serializers import OrderViewSerializer
+from orders_app.models import Order
+from products_app.api.serializers import (BrandSerializer, CategorySerializer,
+                                          ProductReviewSerializer,
+                                          ProductSerializer)
+from products_app.models import (Brand, Category, Product, ProductImage,
+                                 ProductReview)
+from users_app.api.serializers import ProfileViewSerializer
+from users_app.models import Profile
+
+
+class Command(BaseCommand):
+    help = ("Compare the rows per second of the list endpoints' ModelSerializers with the values() "
+            "serialization path on generated data, and check that both render the same JSON. "
+            "The generated rows are rolled back.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000, help="Number of rows generated per model.")
+
+    def handle(self, *args, **options):
+        rows = options["rows"]
+        with transaction.atomic():
+            generated = self.generate(rows)
+            cases = [
+                ("products", ProductSerializer, Product.objects.filter(pk__range=generated["products"])),
+                ("brands", BrandSerializer, Brand.objects.filter(pk__range=generated["brands"])),
+                ("categories", CategorySerializer, Category.objects.filter(pk__range=generated["categories"])),
+                ("reviews", ProductReviewSerializer, ProductReview.objects.filter(pk__range=generated["reviews"])),
+                ("orders", OrderViewSerializer, Order.objects.filter(pk__range=generated["orders"])),
+                ("profiles", ProfileViewSerializer, Profile.objects.filter(pk__range=generated["profiles"])),
+            ]
+            for name, serializer_class, queryset in cases:
+                self.compare(name, serializer_class, queryset)
+            transaction.set_rollback(True)
+
+    def compare(self, name, serializer_class, queryset):
+        baseline = queryset.all()
+        if hasattr(serializer_class, "optimize_queryset"):
+            # Give the serializer path the same prefetching the views had.
+            baseline = serializer_class().optimize_queryset(baseline)
+
+        started = time.perf_counter()
+        before = serializer_class(baseline, many=True).data
+        before_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        after = serialize_queryset(serializer_class(), queryset.all())
+        after_seconds = time.perf_counter() - started
+
+        renderer = JSONRenderer()
+        if renderer.render(before) != renderer.render(after):
+            raise CommandError(f"{name}: the values() output differs from the serializer's.")
+
+        count = len(after)
+        self.stdout.write(
+            f"{name:<12} {count:>8} rows  serializer {count / before_seconds:>10.0f} rows/s  "
+            f"values() {count / after_seconds:>10.0f} rows/s  x{before_seconds / after_seconds:.1f}"
+        )
+
+    def generate(self, rows):
+        """
+        Create `rows` rows per model and return `{name: (first pk, last pk)}`.
+        """
+        brands = Brand.objects.bulk_create(
+            Brand(name=f"Brand {i}", description="Generated brand " * 10) for i in range(rows)
+        )
+        categories = Category.objects.bulk_create(
+            Category(name=f"Category {i}", description="Generated category " * 10) for i in range(rows)
+        )
+        products = Product.objects.bulk_create(
+            Product(
+                name=f"Product {i}",
+                description="Generated product " * 40,
+                price=Decimal(i % 99900) / 100,
+                stock=i % 7,
+                category=categories[i % len(categories)],
+                brand=brands[i % len(brands)],
+            )
+            for i in range(rows)
+        )
+        ProductImage.objects.bulk_create(
+            ProductImage(product=product, image=f"product_images/{product.pk}.jpg") for product in products
+        )
+        users = User.objects.bulk_create(User(username=f"benchmark-{i}") for i in range(rows))
+        profiles = Profile.objects.bulk_create(
+            Profile(
+                user=user,
+                first_name="First",
+                last_name="Last",
+                phone_number=f"+1418543{i % 10000:04d}",
+                address_line_1="215 Clayton St.",
+                address_line_2="",
+                city="City",
+                state="CA",
+                postal_code=94117,
+                country="US",
+            )
+            for i, user in enumerate(users)
+        )
+        reviews = ProductReview.objects.bulk_create(
+            ProductReview(product=products[i], user=users[i], rating=i % 5 + 1, description="Generated review")
+            for i in range(rows)
+        )
+        orders = Order.objects.bulk_create(
+            Order(user=users[i], total_price=i, status="pending") for i in range(rows)
+        )
+
+        # Primary key bounds of each model's generated rows, so that rows
+        # already in the database are left out of the comparison.
+        generated = {
+            "products": products, "brands": brands, "categories": categories,
+            "reviews": reviews, "orders": orders, "profiles": profiles,
+        }
+        return {name: (objs[0].pk, objs[-1].pk) for name, objs in generated.items()}
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from products_app.bulk_import import FILE_FORMATS, ProductImporter
+
+
+class Command(BaseCommand):
+    help = "Bulk import products from a CSV or JSONL file. Brands and categories are referenced by name."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSONL file to import.")
+        parser.add_argument("--format", choices=FILE_FORMATS, help="File format; inferred from the extension by default.")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Number of products written per transaction.")
+        parser.add_argument("--database", default="default", help="Database alias to import into.")
+
+    def handle(self, *args, **options):
+        file_format = options["format"] or options["path"].rsplit(".", 1)[-1].lower()
+        if file_format not in FILE_FORMATS:
+            raise CommandError("Could not infer the format from the file name, pass --format.")
+
+        importer = ProductImporter(batch_size=options["batch_size"], using=options["database"])
+        with open(options["path"], encoding="utf-8-sig", newline="") as stream:
+            report = importer.run(stream, file_format)
+
+        for error in report["errors"]:
+            self.stderr.write(f"Line {error['line']}: {error['errors']}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['created']} of {report['rows']} rows "
+            f"({report['error_count']} rejected) in {report['elapsed_seconds']}s, "
+            f"{report['rows_per_second']} rows/s."
+        ))
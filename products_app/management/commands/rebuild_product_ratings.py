@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from products_app.ratings import rebuild_rating_aggregates
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized rating aggregates of every product from its reviews."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000, help="Number of products processed per batch.")
+
+    def handle(self, *args, **options):
+        corrected = rebuild_rating_aggregates(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rating aggregates rebuilt, {corrected} products corrected."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from products_app.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the product full-text search index from the product table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default", help="Database alias to rebuild the index on.")
+
+    def handle(self, *args, **options):
+        rebuild_index(using=options["database"])
+        self.stdout.write(self.style.SUCCESS("Product search index rebuilt."))
@@ -0,0 +1,36 @@
+from concurrent.futures import as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from products_app.image_variants import get_executor, render_variants, store_variants, variant_stem
+from products_app.models import ProductImage
+
+
+class Command(BaseCommand):
+    help = "Render the resized variants of product images that do not have them yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Re-render the variants of every image.")
+
+    def handle(self, *args, **options):
+        images = ProductImage.objects.all() if options["all"] else ProductImage.objects.filter(variants={})
+
+        futures = {}
+        for product_image in images.iterator():
+            future = get_executor().submit(
+                render_variants, product_image.image.path, settings.MEDIA_ROOT, variant_stem(product_image)
+            )
+            futures[future] = product_image
+
+        rendered = failed = 0
+        for future in as_completed(futures):
+            product_image = futures[future]
+            try:
+                store_variants(product_image.pk, product_image.image.name, future.result())
+                rendered += 1
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f"Product image {product_image.pk}: {exc}")
+
+        self.stdout.write(self.style.SUCCESS(f"Rendered variants for {rendered} images, {failed} failed."))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from products_app.deletion import run_deletion_job
+from products_app.models import DeletionJob
+
+
+class Command(BaseCommand):
+    help = ("Run the brand and category deletion jobs that have not finished, such as those interrupted "
+            "by a restart. Failed jobs are retried; jobs another runner is working on are skipped.")
+
+    def handle(self, *args, **options):
+        pending = DeletionJob.objects.exclude(status="done").order_by("pk").values_list("pk", flat=True)
+        for pk in pending:
+            try:
+                job = run_deletion_job(pk)
+            except Exception as exc:
+                self.stderr.write(f"Deletion job {pk}: {exc}")
+                continue
+            if job is None:
+                self.stdout.write(f"Deletion job {pk}: skipped, another runner is working on it.")
+                continue
+            self.stdout.write(f"Deletion job {pk}: deleted {job.target} {job.object_id} and {job.products_deleted} products.")
+        self.stdout.write(self.style.SUCCESS("Done."))
@@ -0,0 +1,42 @@
+from django.db import migrations
+
+FTS_TABLE = "products_app_product_fts"
+TSVECTOR_INDEX = "products_app_product_search_idx"
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == "sqlite":
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(name, description, tokenize='porter unicode61')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE}(rowid, name, description) "
+            "SELECT id, name, description FROM products_app_product"
+        )
+    elif vendor == "postgresql":
+        schema_editor.execute(
+            f"CREATE INDEX {TSVECTOR_INDEX} ON products_app_product "
+            "USING GIN (to_tsvector('english', name || ' ' || description))"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE {FTS_TABLE}")
+    elif vendor == "postgresql":
+        schema_editor.execute(f"DROP INDEX {TSVECTOR_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products_app', '0004_product_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.0.1 on 2026-10-18 01:02
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Product = apps.get_model('products_app', 'Product')
+    ProductReview = apps.get_model('products_app', 'ProductReview')
+
+    totals = ProductReview.objects.values('product_id').annotate(
+        count=Count('id'),
+        total=Sum('rating'),
+        **{f'rating_{stars}': Count('id', filter=Q(rating=stars)) for stars in range(1, 6)}
+    ).order_by()
+
+    for row in totals.iterator():
+        Product.objects.filter(pk=row['product_id']).update(
+            rating_count=row['count'],
+            rating_sum=row['total'],
+            rating_average=row['total'] / row['count'],
+            **{f'rating_{stars}': row[f'rating_{stars}'] for stars in range(1, 6)}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products_app', '0006_product_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_1',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_2',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_3',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_4',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_5',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_average',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['rating_average', 'id'], name='product_rating_avg_id_idx'),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
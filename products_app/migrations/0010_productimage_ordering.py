@@ -0,0 +1,17 @@
+# Generated by Django 5.0.1 on 2026-10-18 01:20
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products_app', '0009_productimage_variants'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='productimage',
+            options={'ordering': ['id']},
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.0.1 on 2026-10-18 01:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products_app', '0010_productimage_ordering'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='brand',
+            name='name',
+            field=models.CharField(db_index=True, max_length=15),
+        ),
+        migrations.AlterField(
+            model_name='category',
+            name='name',
+            field=models.CharField(db_index=True, max_length=15),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='brand',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='products_app.brand'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='category',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='products_app.category'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', 'price', 'id'], name='product_category_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', 'brand', 'price', 'id'], name='product_cat_brand_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['brand', 'price', 'id'], name='product_brand_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('stock__gt', 0)), fields=['price', 'id'], name='product_in_stock_price_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.0.1 on 2026-10-18 02:45
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_catalog_changes(apps, schema_editor):
+    # Rows written before the feed existed are listed once, so that reading
+    # the feed from the start yields the whole catalog.
+    CatalogChange = apps.get_model('products_app', 'CatalogChange')
+    now = timezone.now()
+
+    for target, model_name in (('brand', 'Brand'), ('category', 'Category'), ('product', 'Product')):
+        ids = apps.get_model('products_app', model_name).objects.order_by('pk').values_list('pk', flat=True)
+        batch = []
+        for pk in ids.iterator(chunk_size=2000):
+            batch.append(CatalogChange(target=target, object_id=pk, action='upsert', changed_at=now))
+            if len(batch) == 2000:
+                CatalogChange.objects.bulk_create(batch)
+                batch = []
+        CatalogChange.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products_app', '0013_deletion_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target', models.CharField(choices=[('product', 'Product'), ('brand', 'Brand'), ('category', 'Category')], max_length=8)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('action', models.CharField(choices=[('upsert', 'Upsert'), ('delete', 'Delete')], max_length=6)),
+                ('changed_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['target', 'object_id'], name='catalog_change_object_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_catalog_changes, migrations.RunPython.noop),
+    ]
@@ -5,30 +5,121 @@ from users_app.models import User
 
 
 class Brand(models.Model):
-    name = models.CharField(max_length=15)
+    name = models.CharField(max_length=15, db_index=True)
     description = models.CharField(max_length=500)
+    # Set while a `DeletionJob` removes the brand's products; the brand is
+    # hidden from reads in the meantime.
+    is_deleting = models.BooleanField(default=False, editable=False)
 
 class Category(models.Model):
-    name = models.CharField(max_length=15)
+    name = models.CharField(max_length=15, db_index=True)
     description = models.CharField(max_length=500)
+    is_deleting = models.BooleanField(default=False, editable=False)
 
 class Product(models.Model):
     name = models.CharField(max_length=15)
     description = models.CharField(max_length=1000)
     price = models.DecimalField(max_digits=6, decimal_places=2)
     stock = models.PositiveBigIntegerField()
-    category = models.ForeignKey(Category, on_delete=models.CASCADE)
-    brand = models.ForeignKey(Brand, on_delete=models.CASCADE)
+    # Both foreign keys lead a composite index below, which also serves the
+    # plain lookups a separate FK index would.
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, db_index=False)
+    brand = models.ForeignKey(Brand, on_delete=models.CASCADE, db_index=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+    rating_average = models.FloatField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="product_created_at_id_idx"),
+            models.Index(fields=["price", "id"], name="product_price_id_idx"),
+            models.Index(fields=["updated_at"], name="product_updated_at_idx"),
+            models.Index(fields=["rating_average", "id"], name="product_rating_avg_id_idx"),
+            models.Index(fields=["category", "price", "id"], name="product_category_price_idx"),
+            models.Index(fields=["category", "brand", "price", "id"], name="product_cat_brand_price_idx"),
+            models.Index(fields=["brand", "price", "id"], name="product_brand_price_idx"),
+            models.Index(fields=["category", "created_at", "id"], name="product_category_created_idx"),
+            models.Index(fields=["brand", "created_at", "id"], name="product_brand_created_idx"),
+            models.Index(fields=["name", "id"], name="product_name_id_idx"),
+            models.Index(
+                fields=["price", "id"], condition=models.Q(stock__gt=0), name="product_in_stock_price_idx"
+            ),
+        ]
 
 class ProductImage(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     image = models.ImageField(upload_to='product_images/')
+    variants = models.JSONField(default=dict, blank=True, editable=False)
+
+    class Meta:
+        ordering = ["id"]
     
 class ProductReview(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     user = models.ForeignKey(User, models.CASCADE)
     rating = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)])
     description = models.CharField(max_length=200)
-    created_at = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["product", "created_at"], name="review_product_created_idx"),
+        ]
+
+class DeletionJob(models.Model):
+    """
+    The background deletion of a brand or category and its products.
+    """
+    TARGET_CHOICES = [
+        ("brand", "Brand"),
+        ("category", "Category"),
+    ]
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    target = models.CharField(max_length=8, choices=TARGET_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    status = models.CharField(max_length=8, choices=STATUS_CHOICES, default="pending")
+    products_total = models.PositiveIntegerField(default=0)
+    products_deleted = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+class CatalogChange(models.Model):
+    """
+    The latest change to a product, brand or category. Each change replaces
+    the previous entry of its object, and its `id` is the sequence number
+    the change feed is read by.
+    """
+    TARGET_CHOICES = [
+        ("product", "Product"),
+        ("brand", "Brand"),
+        ("category", "Category"),
+    ]
+    ACTION_CHOICES = [
+        ("upsert", "Upsert"),
+        ("delete", "Delete"),
+    ]
+
+    target = models.CharField(max_length=8, choices=TARGET_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    action = models.CharField(max_length=6, choices=ACTION_CHOICES)
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["target", "object_id"], name="catalog_change_object_idx"),
+        ]
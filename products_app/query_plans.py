@@ -0,0 +1,157 @@
+import re
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connections, transaction
+from django.utils import timezone
+
+from products_app.cache import bump_version
+from products_app.models import Brand, Category, Product, ProductReview
+
+# Query-plan regression checks for the catalog.
+#
+# `catalog_queries` mirrors the queries issued by the product listing, its
+# filters and orderings, the export and the review listing. `check_plans`
+# runs `EXPLAIN QUERY PLAN` on each of them and reports every table that
+# SQLite would read in full. An index that only serves an ORDER BY (a
+# "SCAN ... USING INDEX" stopped by LIMIT) is fine; a bare "SCAN table" is
+# not. Sorts the index cannot avoid are reported separately. Brand and
+# category names are resolved to ids in memory (see `products_app.lookups`),
+# so the name filters issue the same queries as the id filters.
+
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+TEMP_SORT = "USE TEMP B-TREE FOR ORDER BY"
+
+PAGE = 21
+
+
+def catalog_queries(category, brand):
+    """
+    Return `{name: queryset}` for the catalog queries that must be served
+    from an index.
+    """
+    products = Product.objects.all()
+    since = timezone.now() - timedelta(days=1)
+    return {
+        "list newest": products.order_by("-created_at", "-pk")[:PAGE],
+        "list by price": products.order_by("price", "pk")[:PAGE],
+        "list by rating": products.order_by("-rating_average", "-pk")[:PAGE],
+        "brand id by price": products.filter(brand_id=brand.pk).order_by("price", "pk")[:PAGE],
+        "category id and brand id": products.filter(
+            category_id=category.pk, brand_id=brand.pk
+        ).order_by("price", "pk")[:PAGE],
+        "list by name": products.order_by("name", "pk")[:PAGE],
+        "category id newest": products.filter(category_id=category.pk).order_by("-created_at", "-pk")[:PAGE],
+        "brand id newest": products.filter(brand_id=brand.pk).order_by("-created_at", "-pk")[:PAGE],
+        "category id by price": products.filter(category_id=category.pk).order_by("price", "pk")[:PAGE],
+        "in stock": products.filter(stock__gt=0).order_by("price", "pk")[:PAGE],
+        "in stock newest": products.filter(stock__gt=0).order_by("-created_at", "-pk")[:PAGE],
+        "price page": products.filter(price__gte=Decimal("50")).order_by("price", "pk")[:PAGE],
+        "price range newest": products.filter(
+            price__gte=Decimal("50"), price__lte=Decimal("60")
+        ).order_by("-created_at", "-pk")[:PAGE],
+        "category id price range": products.filter(
+            category_id=category.pk, price__gte=Decimal("50"), price__lte=Decimal("60")
+        ).order_by("price", "pk")[:PAGE],
+        "updated since": products.filter(updated_at__gte=since).order_by("updated_at", "pk"),
+        "product reviews": ProductReview.objects.filter(product_id=1).order_by("-created_at", "-pk")[:PAGE],
+    }
+
+
+def explain(queryset):
+    """
+    Return the `EXPLAIN QUERY PLAN` lines of `queryset`.
+    """
+    connection = connections[queryset.db]
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def full_scans(plan):
+    """
+    Return the tables read in full by `plan`.
+    """
+    return [match.group(1) for match in map(FULL_SCAN.match, plan) if match]
+
+
+def check_plans(queries):
+    """
+    Explain every query and return `{name: (plan, full_scans)}`.
+    """
+    return {name: (plan, full_scans(plan)) for name, plan in
+            ((name, explain(queryset)) for name, queryset in queries.items())}
+
+
+def generate_catalog(rows, categories=50, brands=200):
+    """
+    Insert a synthetic catalog of `rows` products spread over the given
+    number of categories and brands, with timestamps spread over a year.
+    Returns one category and one brand.
+
+    The products are generated by SQLite itself in a single
+    `INSERT ... SELECT`, so a million rows take seconds rather than the
+    minutes `bulk_create` would.
+    """
+    category_objs = Category.objects.bulk_create(
+        Category(name=f"Category {i}", description="") for i in range(categories)
+    )
+    brand_objs = Brand.objects.bulk_create(Brand(name=f"Brand {i}", description="") for i in range(brands))
+    # `bulk_create` sends no `post_save`.
+    bump_version("category")
+    bump_version("brand")
+
+    connection = connections[Product.objects.db]
+    timestamp = "strftime('%%Y-%%m-%%d %%H:%%M:%%f', 'now', -(i %% 365) || ' days')"
+    generated = {
+        "name": ("'Product ' || i", []),
+        "description": ("'Generated product'", []),
+        "price": ("(i %% 99900) / 100.0", []),
+        "stock": ("i %% 7", []),
+        "category_id": ("%s + i %% %s", [category_objs[0].pk, categories]),
+        "brand_id": ("%s + i * 7 %% %s", [brand_objs[0].pk, brands]),
+        "created_at": (timestamp, []),
+        "updated_at": (timestamp, []),
+        "rating_average": ("(i %% 500) / 100.0", []),
+    }
+    # Every other column gets its model default.
+    for field in Product._meta.concrete_fields:
+        if not field.primary_key and field.column not in generated:
+            generated[field.column] = ("%s", [field.get_db_prep_save(field.get_default(), connection)])
+
+    columns = ", ".join(connection.ops.quote_name(column) for column in generated)
+    values = ", ".join(sql for sql, params in generated.values())
+    params = [param for sql, params in generated.values() for param in params]
+    table = connection.ops.quote_name(Product._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "WITH RECURSIVE series(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM series WHERE i + 1 < %s) "
+            f"INSERT INTO {table} ({columns}) SELECT {values} FROM series",
+            [rows] + params
+        )
+
+    return category_objs[0], brand_objs[0]
+
+
+def run_benchmark(rows, using="default"):
+    """
+    Generate `rows` products, gather statistics and explain the catalog
+    queries against them. Everything is rolled back afterwards.
+
+    Returns `(results, generation_seconds)`.
+    """
+    with transaction.atomic(using=using):
+        started = time.perf_counter()
+        category, brand = generate_catalog(rows)
+        generation_seconds = time.perf_counter() - started
+
+        with connections[using].cursor() as cursor:
+            cursor.execute("ANALYZE")
+        results = check_plans(catalog_queries(category, brand))
+
+        transaction.set_rollback(True, using=using)
+
+    return results, generation_seconds
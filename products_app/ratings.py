@@ -0,0 +1,127 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Q, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
+
+from products_app import changes
+from products_app.cache import bump_version
+from products_app.models import Product, ProductReview
+
+# Per-product rating aggregates are denormalized onto `Product` and kept up
+# to date from the `ProductReview` signals with single relative UPDATEs, so
+# concurrent review writes never overwrite each other's counts.
+
+HISTOGRAM_FIELDS = [f"rating_{stars}" for stars in range(1, 6)]
+
+AGGREGATE_FIELDS = ["rating_count", "rating_sum", *HISTOGRAM_FIELDS, "rating_average"]
+
+
+def apply_rating_delta(product_id, removed=None, added=None):
+    """
+    Update the aggregates of `product_id` for a review whose rating went
+    from `removed` to `added`; either may be None when a review is created
+    or deleted.
+    """
+    count_delta = (added is not None) - (removed is not None)
+    sum_delta = (added or 0) - (removed or 0)
+
+    histogram = Counter()
+    if removed is not None:
+        histogram[f"rating_{removed}"] -= 1
+    if added is not None:
+        histogram[f"rating_{added}"] += 1
+
+    updates = {
+        field: F(field) + delta for field, delta in histogram.items() if delta
+    }
+    # Every assignment in a single UPDATE sees the old row, so the new
+    # average is computed from the old sum and count plus the deltas.
+    updates.update(
+        rating_count=F("rating_count") + count_delta,
+        rating_sum=F("rating_sum") + sum_delta,
+        rating_average=Coalesce(
+            Cast(F("rating_sum") + sum_delta, FloatField()) / NullIf(F("rating_count") + count_delta, Value(0)),
+            Value(0.0),
+        ),
+        updated_at=timezone.now(),
+    )
+
+    Product.objects.filter(pk=product_id).update(**updates)
+    changes.record_changes("product", [product_id])
+    bump_version("product")
+
+
+def review_written(before, after):
+    """
+    Update the aggregates for a review write.
+
+    `before` and `after` are `(product_id, rating)` pairs for the review as
+    it was and as it is now, or None when it did not or no longer exists.
+    """
+    if before and after and before[0] == after[0]:
+        if before[1] != after[1]:
+            apply_rating_delta(after[0], removed=before[1], added=after[1])
+        return
+
+    if before:
+        apply_rating_delta(before[0], removed=before[1])
+    if after:
+        apply_rating_delta(after[0], added=after[1])
+
+
+def rebuild_rating_aggregates(batch_size=2000):
+    """
+    Recompute the aggregates of every product from its reviews.
+
+    Products are walked in primary key batches; only the rows whose stored
+    aggregates differ are written back, with `bulk_update`. Returns the
+    number of products that were corrected.
+    """
+    corrected = 0
+    last_id = 0
+
+    while True:
+        products = list(
+            Product.objects.filter(pk__gt=last_id).order_by("pk").only(*AGGREGATE_FIELDS)[:batch_size]
+        )
+        if not products:
+            break
+        first_id, last_id = products[0].pk, products[-1].pk
+
+        totals = {
+            row["product_id"]: row
+            for row in ProductReview.objects.filter(product_id__gte=first_id, product_id__lte=last_id)
+            .values("product_id")
+            .annotate(
+                rating_count=Count("id"),
+                rating_sum=Sum("rating"),
+                **{field: Count("id", filter=Q(rating=stars)) for stars, field in enumerate(HISTOGRAM_FIELDS, 1)}
+            )
+            .order_by()
+        }
+
+        now = timezone.now()
+        changed = []
+        for product in products:
+            row = totals.get(product.pk)
+            values = {field: row[field] if row else 0 for field in AGGREGATE_FIELDS[:-1]}
+            values["rating_average"] = values["rating_sum"] / values["rating_count"] if row else 0.0
+
+            if any(getattr(product, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(product, field, value)
+                product.updated_at = now
+                changed.append(product)
+
+        if changed:
+            with transaction.atomic():
+                Product.objects.bulk_update(changed, AGGREGATE_FIELDS + ["updated_at"])
+                changes.record_changes("product", [product.pk for product in changed])
+            corrected += len(changed)
+
+    if corrected:
+        bump_version("product")
+
+    return corrected
@@ -0,0 +1,132 @@
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from products_app.models import Product
+
+# Full-text index over product names and descriptions.
+#
+# On SQLite the index is an FTS5 table keyed by the product id, kept in sync
+# from the `Product` save/delete signals (see `products_app.signals`). On
+# PostgreSQL it is a GIN index over the `to_tsvector` expression below, which
+# the database maintains on its own. Both are created by migration 0005.
+
+FTS_TABLE = "products_app_product_fts"
+
+TSVECTOR = "to_tsvector('english', {table}.name || ' ' || {table}.description)"
+
+RANK_ANNOTATION = "search_rank"
+
+# Keeps `IN` lists below the SQLite variable limit.
+BATCH_SIZE = 500
+
+
+def build_match_query(text):
+    """
+    Turn free text into an FTS5 query that matches every word in it.
+
+    Each word is quoted so that user input can never be parsed as FTS5
+    query syntax.
+    """
+    return " ".join('"%s"' % term for term in re.findall(r"\w+", text))
+
+
+def search_products(queryset, text):
+    """
+    Restrict `queryset` to products matching `text`.
+
+    The result is annotated with `search_rank`, where a lower value means a
+    more relevant product, so that it can be ordered and paginated like any
+    other column.
+    """
+    vendor = connections[queryset.db].vendor
+    table = connections[queryset.db].ops.quote_name(Product._meta.db_table)
+
+    if vendor == "sqlite":
+        query = build_match_query(text)
+        if not query:
+            return queryset.none()
+        # Joined once: the planner starts from the index matches and looks
+        # the products up by rowid, and `bm25()` reads the rank of the
+        # joined row instead of running a MATCH per candidate product.
+        queryset = queryset.extra(
+            tables=[FTS_TABLE], where=[f"{FTS_TABLE}.rowid = {table}.id", f"{FTS_TABLE} MATCH %s"], params=[query]
+        )
+        rank = RawSQL(f"bm25({FTS_TABLE})", [], output_field=FloatField())
+        return queryset.annotate(**{RANK_ANNOTATION: rank})
+
+    if vendor == "postgresql":
+        tsvector = TSVECTOR.format(table=table)
+        match = RawSQL(f"{tsvector} @@ plainto_tsquery('english', %s)", [text], output_field=BooleanField())
+        rank = RawSQL(f"-ts_rank({tsvector}, plainto_tsquery('english', %s))", [text], output_field=FloatField())
+    else:
+        match = Q(name__icontains=text) | Q(description__icontains=text)
+        rank = Value(0.0, output_field=FloatField())
+
+    return queryset.filter(match).annotate(**{RANK_ANNOTATION: rank})
+
+
+def index_products(products, using="default"):
+    """
+    Add or refresh `products` in the SQLite full-text index.
+    """
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+
+    rows = [(product.pk, product.name, product.description) for product in products]
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT OR REPLACE INTO {FTS_TABLE}(rowid, name, description) VALUES (%s, %s, %s)", rows
+        )
+
+
+def reindex_product_ids(product_ids, using="default"):
+    """
+    Refresh the given product ids in the SQLite full-text index from the
+    product table.
+    """
+    connection = connections[using]
+    if connection.vendor != "sqlite" or not product_ids:
+        return
+
+    product_ids = list(product_ids)
+    with connection.cursor() as cursor:
+        for start in range(0, len(product_ids), BATCH_SIZE):
+            batch = product_ids[start:start + BATCH_SIZE]
+            placeholders = ", ".join(["%s"] * len(batch))
+            cursor.execute(
+                f"INSERT OR REPLACE INTO {FTS_TABLE}(rowid, name, description) "
+                f"SELECT id, name, description FROM {Product._meta.db_table} WHERE id IN ({placeholders})",
+                batch
+            )
+
+
+def unindex_products(product_ids, using="default"):
+    """
+    Remove the given product ids from the SQLite full-text index.
+    """
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(pk,) for pk in product_ids])
+
+
+def rebuild_index(using="default"):
+    """
+    Rebuild the SQLite full-text index from the product table.
+    """
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}(rowid, name, description) "
+            f"SELECT id, name, description FROM {Product._meta.db_table}"
+        )
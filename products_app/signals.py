@@ -0,0 +1,141 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from products_app import changes, image_variants, search
+from products_app.cache import bump_version
+from products_app.models import Brand, Category, Product, ProductImage, ProductReview
+from products_app.ratings import review_written
+
+# Sent by code that writes products in bulk (`bulk_create`, `update()`),
+# which bypasses `post_save`. `product_ids` lists the products written and
+# `fields` the columns that changed, or None when whole rows were written.
+products_bulk_saved = Signal()
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance=None, using="default", **kwargs):
+    search.index_products([instance], using=using)
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance=None, using="default", **kwargs):
+    search.unindex_products([instance.pk], using=using)
+
+
+@receiver(products_bulk_saved, sender=Product)
+def reindex_bulk_saved_products(sender, product_ids=(), fields=None, using="default", **kwargs):
+    if fields is None or {"name", "description"} & set(fields):
+        search.reindex_product_ids(product_ids, using=using)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(products_bulk_saved, sender=Product)
+def invalidate_product_cache(sender, using="default", **kwargs):
+    # Bumped again on commit, so that a catalog snapshot synced between the
+    # write and the commit does not keep the old rows.
+    bump_version("product")
+    transaction.on_commit(partial(bump_version, "product"), using=using)
+
+
+@receiver(post_save, sender=Brand)
+@receiver(post_delete, sender=Brand)
+def invalidate_brand_cache(sender, using="default", **kwargs):
+    # Bumped again on commit: a process may reload its brand lookup between
+    # the write and the commit, and would otherwise keep the old rows.
+    bump_version("brand")
+    transaction.on_commit(partial(bump_version, "brand"), using=using)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_cache(sender, using="default", **kwargs):
+    bump_version("category")
+    transaction.on_commit(partial(bump_version, "category"), using=using)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Brand)
+@receiver(post_save, sender=Category)
+def record_catalog_change(sender, instance=None, using="default", **kwargs):
+    changes.record_changes(sender._meta.model_name, [instance.pk], using=using)
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Brand)
+@receiver(post_delete, sender=Category)
+def record_catalog_deletion(sender, instance=None, using="default", **kwargs):
+    changes.record_changes(sender._meta.model_name, [instance.pk], action="delete", using=using)
+
+
+@receiver(products_bulk_saved, sender=Product)
+def record_bulk_catalog_changes(sender, product_ids=(), using="default", **kwargs):
+    changes.record_changes("product", product_ids, using=using)
+
+
+@receiver(pre_save, sender=ProductReview)
+def remember_review_rating(sender, instance=None, **kwargs):
+    instance._rating_before = None
+    if instance.pk:
+        instance._rating_before = (
+            ProductReview.objects.filter(pk=instance.pk).values_list("product_id", "rating").first()
+        )
+
+
+@receiver(post_save, sender=ProductReview)
+def update_ratings_on_review_save(sender, instance=None, **kwargs):
+    review_written(getattr(instance, "_rating_before", None), (instance.product_id, instance.rating))
+
+
+@receiver(post_delete, sender=ProductReview)
+def update_ratings_on_review_delete(sender, instance=None, **kwargs):
+    review_written((instance.product_id, instance.rating), None)
+
+
+@receiver(pre_save, sender=ProductImage)
+def remember_product_image(sender, instance=None, **kwargs):
+    instance._image_before = None
+    if instance.pk:
+        instance._image_before = (
+            ProductImage.objects.filter(pk=instance.pk).values_list("image", "variants", "product_id").first()
+        )
+
+
+@receiver(post_save, sender=ProductImage)
+def render_product_image_variants(sender, instance=None, created=False, using="default", **kwargs):
+    before = getattr(instance, "_image_before", None)
+    if before is not None and before[0] == instance.image.name:
+        return
+
+    if before is not None:
+        image_variants.delete_variants(before[1])
+        ProductImage.objects.using(using).filter(pk=instance.pk).update(variants={})
+        instance.variants = {}
+
+    if instance.image:
+        transaction.on_commit(lambda: image_variants.schedule_variants(instance), using=using)
+
+
+@receiver(post_delete, sender=ProductImage)
+def delete_product_image_variants(sender, instance=None, **kwargs):
+    image_variants.delete_variants(instance.variants)
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def touch_product_on_image_change(sender, instance=None, using="default", **kwargs):
+    # Images are embedded in product responses, so an image write has to
+    # move the product's Last-Modified and invalidate its cached detail,
+    # again on commit like the other receivers.
+    product_ids = {instance.product_id}
+    before = getattr(instance, "_image_before", None)
+    if before is not None:
+        product_ids.add(before[2])
+    Product.objects.using(using).filter(pk__in=product_ids).update(updated_at=timezone.now())
+    changes.record_changes("product", product_ids, using=using)
+    bump_version("product")
+    transaction.on_commit(partial(bump_version, "product"), using=using)
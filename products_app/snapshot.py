@@ -0,0 +1,366 @@
+import logging
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import ROUND_CEILING, ROUND_FLOOR, Decimal
+from itertools import islice
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Max
+from django.utils.dateparse import parse_datetime
+
+from products_app import lookups
+from products_app.cache import get_versions
+from products_app.models import CatalogChange, Product
+
+logger = logging.getLogger(__name__)
+
+# A compact, column-oriented copy of the product table for the listing.
+#
+# Anonymous catalog browsing reads the same rows over and over while the
+# catalog changes a few times a minute. With `PRODUCT_CATALOG_SNAPSHOT`
+# enabled, every worker keeps the columns the listing filters and sorts on
+# in `array`s (eight bytes per value, no per-row objects) together with the
+# row positions sorted by `(created_at, id)` and by `(price, id)`. A page is
+# found by bisecting to the cursor in the sorted positions and scanning
+# forward until enough rows pass the filters; only the ids of that page go
+# to the database, to load the products themselves.
+#
+# The copy follows the "product" version stamp (see `products_app.cache`).
+# Once it changes, the rows whose `updated_at` is newer than the last sync
+# are read and merged. Deleted rows leave no timestamp behind; their
+# tombstones in the change feed (see `products_app.changes`) are read
+# instead, and their positions are only marked dead, which keeps the sorted
+# positions valid. A row count that still does not match, a new id below
+# the highest one, a large delta or too many dead rows call for a full
+# reload. Reloads, and the first load, run on a background thread while
+# the listing is answered by the database, and the new state is swapped in
+# once built: at a million rows a load takes seconds, which no request
+# should wait for.
+
+COLUMNS = ["id", "price", "stock", "category_id", "brand_id", "created_at"]
+
+SORT_FIELDS = ["created_at", "price"]
+
+FILTERS = ["min_price", "max_price", "in_stock", "category_id", "brand_id", "category__name", "brand__name"]
+
+# Rows written in transactions that commit out of `updated_at` order are
+# still picked up by re-reading this far behind the last sync.
+SYNC_OVERLAP = timedelta(seconds=5)
+
+# Above this many changed rows, reloading is cheaper than merging.
+MAX_DELTA = 1000
+
+# Above this many dead rows, the copy is reloaded to drop them.
+MAX_DEAD = 10000
+
+LOAD_CHUNK_SIZE = 10000
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def to_micros(value):
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def to_cents(value):
+    return int(value * 100)
+
+
+def is_enabled():
+    return getattr(settings, "PRODUCT_CATALOG_SNAPSHOT", False)
+
+
+class SnapshotState:
+    """
+    The product columns at one version, with positions sorted for each
+    supported ordering. Row positions follow ascending ids.
+
+    A state is never modified once published; merging a delta works on a
+    copy.
+    """
+
+    def __init__(self, version):
+        self.version = version
+        self.columns = {name: array("q") for name in COLUMNS}
+        self.orders = {}
+        self.dead = set()
+        self.synced_until = None
+        self.changes_until = 0
+
+    def __len__(self):
+        return len(self.columns["id"]) - len(self.dead)
+
+    def sort_key(self, field):
+        values, ids = self.columns[field], self.columns["id"]
+        return lambda position: (values[position], ids[position])
+
+    def convert(self, row):
+        pk, price, stock, category_id, brand_id, created_at = row
+        return pk, to_cents(price), stock, category_id, brand_id, to_micros(created_at)
+
+    def extend(self, rows):
+        """
+        Append `rows`, ordered by id, converting them a column at a time.
+        """
+        pks, prices, stocks, category_ids, brand_ids, created = zip(*rows)
+        self.columns["id"].extend(pks)
+        self.columns["price"].extend(map(to_cents, prices))
+        self.columns["stock"].extend(stocks)
+        self.columns["category_id"].extend(category_ids)
+        self.columns["brand_id"].extend(brand_ids)
+        self.columns["created_at"].extend(map(to_micros, created))
+
+    def sort(self):
+        # Positions follow the ids, so a stable sort on the value alone
+        # orders them by `(value, id)`.
+        positions = range(len(self.columns["id"]))
+        self.orders = {
+            field: array("q", sorted(positions, key=self.columns[field].__getitem__)) for field in SORT_FIELDS
+        }
+
+    def copy(self, version):
+        state = SnapshotState(version)
+        state.columns = {name: array("q", values) for name, values in self.columns.items()}
+        state.orders = {field: array("q", order) for field, order in self.orders.items()}
+        state.dead = set(self.dead)
+        state.synced_until = self.synced_until
+        state.changes_until = self.changes_until
+        return state
+
+    def merge(self, row):
+        """
+        Insert or update one row. Returns False if the row cannot be merged
+        because its id is below the highest one and unknown.
+        """
+        ids = self.columns["id"]
+        position = bisect_left(ids, row[0])
+        known = position < len(ids) and ids[position] == row[0]
+        if not known and position < len(ids):
+            return False
+
+        if known:
+            for field, order in self.orders.items():
+                key = self.sort_key(field)
+                del order[bisect_left(order, key(position), key=key)]
+            for name, value in zip(COLUMNS, self.convert(row)):
+                self.columns[name][position] = value
+            self.dead.discard(position)
+        else:
+            self.extend([row])
+
+        for field, order in self.orders.items():
+            key = self.sort_key(field)
+            order.insert(bisect_left(order, key(position), key=key), position)
+        return True
+
+    def remove(self, pk):
+        """
+        Mark the row with id `pk` as deleted, if it is known.
+        """
+        ids = self.columns["id"]
+        position = bisect_left(ids, pk)
+        if position < len(ids) and ids[position] == pk:
+            self.dead.add(position)
+
+    def compile_filters(self, filters):
+        """
+        Turn the cleaned values of `ProductFilter` into a test on a row
+        position. Returns None if no row can match.
+        """
+        columns = self.columns
+        checks = []
+
+        if filters.get("min_price") is not None:
+            low = int((filters["min_price"] * 100).to_integral_value(rounding=ROUND_CEILING))
+            checks.append((columns["price"], lambda value: value >= low))
+        if filters.get("max_price") is not None:
+            high = int((filters["max_price"] * 100).to_integral_value(rounding=ROUND_FLOOR))
+            checks.append((columns["price"], lambda value: value <= high))
+        if filters.get("in_stock") is not None:
+            in_stock = filters["in_stock"]
+            checks.append((columns["stock"], lambda value: (value > 0) == in_stock))
+
+        for field, table in (("category", lookups.categories), ("brand", lookups.brands)):
+            snapshot = table.current()
+            allowed = None
+            if filters.get(f"{field}_id") is not None:
+                allowed = {filters[f"{field}_id"]} - snapshot.deleting_ids
+            if filters.get(f"{field}__name"):
+                ids = set(snapshot.ids_for_name(filters[f"{field}__name"]))
+                allowed = ids if allowed is None else allowed & ids
+            if allowed is not None:
+                if not allowed:
+                    return None
+                checks.append((columns[f"{field}_id"], allowed.__contains__))
+            elif snapshot.deleting_ids:
+                # Products of a brand or category being deleted are hidden.
+                checks.append((columns[f"{field}_id"], lambda value, hidden=snapshot.deleting_ids: value not in hidden))
+
+        return lambda position: all(test(values[position]) for values, test in checks)
+
+    def page(self, filters, ordering, position, limit):
+        """
+        Return the ids of up to `limit` rows matching `filters`, after the
+        keyset `position` in `ordering`, or None if `ordering` is not
+        supported.
+        """
+        field, _ = ordering
+        descending = field.startswith("-")
+        field = field.lstrip("-")
+        if field not in self.orders:
+            return None
+
+        matches = self.compile_filters(filters)
+        if matches is None:
+            return []
+
+        order = self.orders[field]
+        key = self.sort_key(field)
+        if position is None:
+            start = len(order) if descending else 0
+        else:
+            value, pk = position
+            try:
+                value = to_cents(Decimal(value)) if field == "price" else to_micros(parse_datetime(value))
+            except ArithmeticError:
+                raise ValueError(f"Invalid {field} {value!r}.")
+            bound = (value, int(pk))
+            if descending:
+                start = bisect_left(order, bound, key=key)
+            else:
+                start = bisect_right(order, bound, key=key)
+
+        indexes = range(start - 1, -1, -1) if descending else range(start, len(order))
+        ids = self.columns["id"]
+        dead = self.dead
+        page = []
+        for index in indexes:
+            position = order[index]
+            if position not in dead and matches(position):
+                page.append(ids[position])
+                if len(page) == limit:
+                    break
+        return page
+
+
+_executor = None
+
+
+def get_executor():
+    """
+    Return the thread that builds snapshots, starting it on first use.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="snapshot")
+    return _executor
+
+
+class CatalogSnapshot:
+    """
+    The snapshot kept by this process.
+    """
+
+    def __init__(self):
+        self._state = None
+        self._lock = threading.Lock()
+        self._reloading = False
+
+    def current(self):
+        """
+        Return the state matching the current "product" version stamp,
+        syncing it first if needed, or None while it is being built.
+        """
+        [version] = get_versions(["product"])
+        state = self._state
+        if state is not None and state.version == version:
+            return state
+
+        with self._lock:
+            state = self._state
+            if state is None or state.version != version:
+                synced = state is not None and self._sync(state, version)
+                if synced:
+                    self._state = state = synced
+                else:
+                    self.schedule_reload()
+                    state = self._state
+        return state if state is not None and state.version == version else None
+
+    def clear(self):
+        self._state = None
+
+    def schedule_reload(self):
+        """
+        Rebuild the state on the background thread, unless a rebuild is
+        already under way.
+        """
+        if not self._reloading:
+            self._reloading = True
+            get_executor().submit(self._reload_in_background)
+
+    def _reload_in_background(self):
+        close_old_connections()
+        try:
+            self.reload()
+        except Exception:
+            logger.exception("Catalog snapshot reload failed")
+        finally:
+            self._reloading = False
+            close_old_connections()
+
+    def reload(self):
+        """
+        Build a new state from the product table and swap it in.
+        """
+        [version] = get_versions(["product"])
+        state = SnapshotState(version)
+        # Taken first: rows written during the load are read again by the
+        # next sync.
+        state.synced_until = Product.objects.aggregate(last=Max("updated_at"))["last"]
+        state.changes_until = CatalogChange.objects.aggregate(last=Max("id"))["last"] or 0
+
+        rows = Product.objects.order_by("pk").values_list(*COLUMNS).iterator(chunk_size=LOAD_CHUNK_SIZE)
+        while chunk := list(islice(rows, LOAD_CHUNK_SIZE)):
+            state.extend(chunk)
+        state.sort()
+        self._state = state
+        return state
+
+    def _sync(self, state, version):
+        if state.synced_until is None:
+            return None
+
+        changed = Product.objects.filter(updated_at__gte=state.synced_until - SYNC_OVERLAP)
+        rows = list(changed.order_by("pk").values_list("updated_at", *COLUMNS)[:MAX_DELTA + 1])
+        if len(rows) > MAX_DELTA:
+            return None
+        # Every product change since the last sync, to find the deletions.
+        changes = list(
+            CatalogChange.objects.filter(pk__gt=state.changes_until, target="product")
+            .order_by("pk").values_list("pk", "object_id", "action")[:MAX_DELTA + 1]
+        )
+        if len(changes) > MAX_DELTA:
+            return None
+
+        state = state.copy(version)
+        for updated_at, *row in rows:
+            if not state.merge(row):
+                return None
+            state.synced_until = max(state.synced_until, updated_at)
+        for sequence, pk, action in changes:
+            if action == "delete":
+                state.remove(pk)
+            state.changes_until = sequence
+
+        if len(state.dead) > MAX_DEAD or len(state) != Product.objects.count():
+            # Too many dead rows, or a deletion the feed does not show yet.
+            return None
+        return state
+
+
+catalog = CatalogSnapshot()
@@ -1,9 +1,45 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+from base64 import urlsafe_b64encode
+from io import BytesIO, StringIO
+from unittest.mock import patch
+
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
 from rest_framework import status
 from rest_framework.authtoken.models import Token
-from rest_framework.test import APITestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from ecomm.fast_serialization import serialize_queryset
 
+from . import lookups
+from .api.pagination import ProductKeysetPagination
+from .api.serializers import (BrandSerializer, CategorySerializer,
+                              ProductImageSerializer, ProductReviewSerializer,
+                              ProductSerializer)
+from .api.views import list_products_view
+from .autocomplete import autocomplete
+from .cache import VERSION_CACHE, _version_key, get_versions, stats
+from .checks import check_version_cache
+from .deletion import STALE_AFTER, run_deletion_job
+from .image_variants import render_variants
+from .query_plans import (TEMP_SORT, catalog_queries, check_plans, explain,
+                          full_scans, generate_catalog)
+from .snapshot import catalog
 from .models import *
 
 
@@ -498,6 +534,24 @@ class ProductReviewTestCase(APITestCase):
         """
         response = self.client.get(reverse("reviews"))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_review_list_paginated(self):
+        """
+        Test that page parameters return one page of reviews, newest first, with its total.
+        """
+        latest = ProductReview.objects.create(product=self.product, user=self.admin_user, rating=3, description="Fine.")
+
+        response = self.client.get(reverse("reviews"), {"page_size": 1, "count": "exact"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([review["id"] for review in response.data["results"]], [latest.id])
+        self.assertEqual((response.data["count"], response.data["count_exact"]), (2, True))
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual([review["id"] for review in response.data["results"]], [self.review.id])
+        self.assertIsNone(response.data["next"])
+
+        response = self.client.get(reverse("reviews"), {"page": 3, "page_size": 1})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
     
     def test_review_create_admin(self):
         """
@@ -571,7 +625,7 @@ class ProductReviewTestCase(APITestCase):
         self.token = Token.objects.get(user__username=self.user.username)
         self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
 
-        response = self.client.get(reverse("review", args=(self.product.id,)))
+        response = self.client.get(reverse("review", args=(self.review.id,)))
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
     
@@ -605,4 +659,2124 @@ class ProductReviewTestCase(APITestCase):
          
         response = self.client.patch(reverse("review-edit", args=(self.product.id,)), data)
 
-        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class ProductPaginationTestCase(APITestCase):
+    """
+    Test case for keyset pagination of the product listing.
+    """
+
+    def setUp(self):
+        """
+        Set up a catalog spread over two brands with repeated prices.
+        """
+        self.brand = Brand.objects.create(name="Test Brand", description="Test Brand Description")
+        self.other_brand = Brand.objects.create(name="Other Brand", description="Other Brand Description")
+        self.category = Category.objects.create(name="Test Category", description="Test Category Description")
+        for i in range(25):
+            Product.objects.create(
+                name=f"Product {i}",
+                description="Test Product Description",
+                price=10 + i % 3,
+                stock=5,
+                category=self.category,
+                brand=self.brand if i % 2 else self.other_brand
+            )
+
+    def collect_pages(self, url):
+        """
+        Follow the `next` links starting at `url` and return all product ids seen.
+        """
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids += [product["id"] for product in response.data["results"]]
+            url = response.data["next"]
+        return ids
+
+    def test_product_list_paginated(self):
+        """
+        Test that the listing walks every product exactly once, newest first.
+        """
+        ids = self.collect_pages(reverse("products") + "?page_size=10")
+
+        expected = list(Product.objects.order_by("-created_at", "-pk").values_list("id", flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_product_list_paginated_by_price(self):
+        """
+        Test that ordering by a column with ties neither skips nor repeats products.
+        """
+        ids = self.collect_pages(reverse("products") + "?ordering=price&page_size=4")
+
+        expected = list(Product.objects.order_by("price", "pk").values_list("id", flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_product_list_previous_page(self):
+        """
+        Test that the `previous` link returns the page before the current one.
+        """
+        first = self.client.get(reverse("products") + "?ordering=-price&page_size=5")
+        second = self.client.get(first.data["next"])
+        previous = self.client.get(second.data["previous"])
+
+        self.assertEqual(previous.data["results"], first.data["results"])
+
+    def test_product_list_paginated_with_filter(self):
+        """
+        Test that pagination applies on top of the brand filter.
+        """
+        ids = self.collect_pages(reverse("products") + "?brand__name=Other Brand&page_size=3")
+
+        expected = set(Product.objects.filter(brand=self.other_brand).values_list("id", flat=True))
+        self.assertEqual(len(ids), len(expected))
+        self.assertEqual(set(ids), expected)
+
+    def test_product_list_count_modes(self):
+        """
+        Test that a total is only reported when asked for, exactly or from the count cache.
+        """
+        cache.clear()
+        url = reverse("products") + "?brand__name=Other Brand&page_size=5"
+
+        self.assertNotIn("count", self.client.get(url).data)
+
+        response = self.client.get(url + "&count=exact")
+        self.assertEqual((response.data["count"], response.data["count_exact"]), (13, True))
+
+        response = self.client.get(url + "&count=estimate")
+        self.assertEqual((response.data["count"], response.data["count_exact"]), (13, True))
+        Product.objects.filter(brand=self.other_brand).first().delete()
+        response = self.client.get(url + "&count=estimate")
+        self.assertEqual((response.data["count"], response.data["count_exact"]), (13, False))
+
+        response = self.client.get(url + "&count=maybe")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_product_list_paginated_by_name(self):
+        """
+        Test ordering the listing by name through the ordering filter.
+        """
+        ids = self.collect_pages(reverse("products") + "?ordering=-name&page_size=7")
+
+        expected = list(Product.objects.order_by("-name", "-pk").values_list("id", flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_product_list_filters(self):
+        """
+        Test the price range, availability and id filters.
+        """
+        Product.objects.filter(price=10).update(stock=0)
+        cases = [
+            ({"min_price": 11}, Product.objects.filter(price__gte=11)),
+            ({"max_price": "11.00"}, Product.objects.filter(price__lte=11)),
+            ({"min_price": 11, "max_price": 11}, Product.objects.filter(price=11)),
+            ({"in_stock": "true"}, Product.objects.filter(stock__gt=0)),
+            ({"in_stock": "false"}, Product.objects.filter(stock=0)),
+            ({"brand_id": self.brand.id}, Product.objects.filter(brand=self.brand)),
+            ({"category_id": self.category.id, "brand_id": self.other_brand.id, "in_stock": "true"},
+             Product.objects.filter(brand=self.other_brand, stock__gt=0)),
+        ]
+        for params, expected in cases:
+            with self.subTest(params=params):
+                response = self.client.get(reverse("products"), {**params, "page_size": 100})
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(
+                    {product["id"] for product in response.data["results"]},
+                    set(expected.values_list("id", flat=True))
+                )
+
+    def test_product_list_invalid_filter(self):
+        """
+        Test that malformed filter values are rejected and unknown orderings ignored.
+        """
+        response = self.client.get(reverse("products"), {"min_price": "cheap"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        for params in ({"category_id": "1.9"}, {"brand_id": "1.9"}):
+            response = self.client.get(reverse("products"), params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            with override_settings(PRODUCT_CATALOG_SNAPSHOT=True):
+                response = self.client.get(reverse("products"), params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(reverse("products"), {"ordering": "stock", "page_size": 100})
+        expected = list(Product.objects.order_by("-created_at", "-pk").values_list("id", flat=True))
+        self.assertEqual([product["id"] for product in response.data["results"]], expected)
+
+    def test_product_list_page_size_capped(self):
+        """
+        Test that the requested page size is capped.
+        """
+        ProductKeysetPagination.max_page_size, max_page_size = 10, ProductKeysetPagination.max_page_size
+        try:
+            response = self.client.get(reverse("products") + "?page_size=1000")
+        finally:
+            ProductKeysetPagination.max_page_size = max_page_size
+
+        self.assertEqual(len(response.data["results"]), 10)
+
+    def test_product_list_invalid_cursor(self):
+        """
+        Test that a malformed or foreign cursor is rejected.
+        """
+        response = self.client.get(reverse("products") + "?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        first = self.client.get(reverse("products") + "?ordering=price&page_size=5")
+        cursor = first.data["next"].split("cursor=")[1].split("&")[0]
+        response = self.client.get(reverse("products") + f"?ordering=created_at&cursor={cursor}")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ProductSearchTestCase(APITestCase):
+    """
+    Test case for full-text product search.
+    """
+
+    def setUp(self):
+        """
+        Set up test data including brand, category, and products.
+        """
+        self.brand = Brand.objects.create(name="Test Brand", description="Test Brand Description")
+        self.category = Category.objects.create(name="Test Category", description="Test Category Description")
+        self.trail_shoes = Product.objects.create(
+            name="Trail shoes",
+            description="Trail running shoes with a trail grip",
+            price=99.99,
+            stock=5,
+            category=self.category,
+            brand=self.brand
+        )
+        self.city_shoes = Product.objects.create(
+            name="City shoes",
+            description="Light shoes, not made for the trail",
+            price=59.99,
+            stock=5,
+            category=self.category,
+            brand=self.brand
+        )
+        self.hat = Product.objects.create(
+            name="Hat",
+            description="A warm hat",
+            price=19.99,
+            stock=5,
+            category=self.category,
+            brand=self.brand
+        )
+
+    def search(self, text):
+        """
+        Return the ids of the products found for `text`, in response order.
+        """
+        response = self.client.get(reverse("products"), {"search": text})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [product["id"] for product in response.data["results"]]
+
+    def test_search_ranked_by_relevance(self):
+        """
+        Test that matches are ordered by relevance.
+        """
+        self.assertEqual(self.search("trail"), [self.trail_shoes.id, self.city_shoes.id])
+
+    def test_search_matches_all_words(self):
+        """
+        Test that every word of the query has to match.
+        """
+        self.assertEqual(self.search("light shoes"), [self.city_shoes.id])
+        self.assertEqual(self.search("running"), [self.trail_shoes.id])
+
+    def test_search_ignores_query_syntax(self):
+        """
+        Test that FTS query syntax in user input is treated as plain text.
+        """
+        self.assertEqual(self.search('"hat" OR'), [])
+        self.assertEqual(self.search("*"), [])
+
+    def test_search_index_follows_edits(self):
+        """
+        Test that the index follows product edits and deletes.
+        """
+        self.hat.name = "Cap"
+        self.hat.save()
+        self.assertEqual(self.search("cap"), [self.hat.id])
+
+        self.hat.delete()
+        self.assertEqual(self.search("cap"), [])
+
+    def test_search_paginated(self):
+        """
+        Test that relevance-ordered results can be paged through.
+        """
+        response = self.client.get(reverse("products"), {"search": "trail", "page_size": 1})
+        self.assertEqual([product["id"] for product in response.data["results"]], [self.trail_shoes.id])
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual([product["id"] for product in response.data["results"]], [self.city_shoes.id])
+        self.assertIsNone(response.data["next"])
+
+
+class ProductFacetsTestCase(APITestCase):
+    """
+    Test case for the product facet counts endpoint.
+    """
+
+    def setUp(self):
+        """
+        Set up test data including brands, categories, and products.
+        """
+        self.brand = Brand.objects.create(name="Test Brand", description="Test Brand Description")
+        self.other_brand = Brand.objects.create(name="Other Brand", description="Other Brand Description")
+        self.category = Category.objects.create(name="Test Category", description="Test Category Description")
+        self.other_category = Category.objects.create(name="Other Category", description="Other Category Description")
+        for price, category, brand in [
+            (10, self.category, self.brand),
+            (30, self.category, self.brand),
+            (30, self.other_category, self.brand),
+            (700, self.other_category, self.other_brand),
+        ]:
+            Product.objects.create(
+                name="Test Product",
+                description="Test Product Description",
+                price=price,
+                stock=5,
+                category=category,
+                brand=brand
+            )
+
+    def test_product_facets(self):
+        """
+        Test the facet counts over the whole catalog.
+        """
+        response = self.client.get(reverse("product-facets"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(response.data["brands"], [
+            {"id": self.brand.id, "name": "Test Brand", "count": 3},
+            {"id": self.other_brand.id, "name": "Other Brand", "count": 1},
+        ])
+        self.assertEqual(
+            [bucket["count"] for bucket in response.data["price"]],
+            [1, 2, 0, 0, 0, 1]
+        )
+
+    def test_product_facets_filtered(self):
+        """
+        Test that the facet counts follow the listing filters.
+        """
+        response = self.client.get(reverse("product-facets"), {"brand__name": "Test Brand"})
+
+        self.assertEqual(response.data["categories"], [
+            {"id": self.category.id, "name": "Test Category", "count": 2},
+            {"id": self.other_category.id, "name": "Other Category", "count": 1},
+        ])
+        self.assertEqual(response.data["brands"], [{"id": self.brand.id, "name": "Test Brand", "count": 3}])
+
+    def test_product_facets_cached_until_products_change(self):
+        """
+        Test that facet counts are served from cache until a product changes.
+        """
+        self.client.get(reverse("product-facets"))
+        with self.assertNumQueries(0):
+            self.client.get(reverse("product-facets"))
+
+        Product.objects.create(
+            name="Test Product",
+            description="Test Product Description",
+            price=30,
+            stock=5,
+            category=self.category,
+            brand=self.other_brand
+        )
+        response = self.client.get(reverse("product-facets"))
+        self.assertEqual(response.data["brands"][1]["count"], 2)
+
+
+class DetailCacheTestCase(APITestCase):
+    """
+    Test case for the product, brand and category detail response cache.
+    """
+
+    def setUp(self):
+        """
+        Set up test data including an admin user, brand, category, and product.
+        """
+        self.admin_user = User.objects.create_superuser(username="test_admin_user", password="password")
+        self.brand = Brand.objects.create(name="Test Brand", description="Test Brand Description")
+        self.category = Category.objects.create(name="Test Category", description="Test Category Description")
+        self.product = Product.objects.create(
+            name="Test Product",
+            description="Test Product Description",
+            price=99.99,
+            stock=50,
+            category=self.category,
+            brand=self.brand
+        )
+        stats.reset()
+
+    def test_product_detail_cached(self):
+        """
+        Test that a repeated product retrieval only reads the product's validators.
+        """
+        self.client.get(reverse("product", args=(self.product.id,)))
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("product", args=(self.product.id,)))
+
+        self.assertEqual(response.data["name"], "Test Product")
+        self.assertEqual(stats.as_dict(), {"hits": 1, "misses": 1, "hit_rate": 0.5})
+
+    def test_product_detail_invalidated_on_save(self):
+        """
+        Test that saving a product invalidates its cached response.
+        """
+        self.client.get(reverse("product", args=(self.product.id,)))
+        self.product.name = "Edited"
+        self.product.save()
+
+        response = self.client.get(reverse("product", args=(self.product.id,)))
+        self.assertEqual(response.data["name"], "Edited")
+
+    def test_product_detail_kept_on_other_product_save(self):
+        """
+        Test that saving another product leaves a cached product response in place.
+        """
+        other = Product.objects.create(
+            name="Other Product",
+            description="Test Product Description",
+            price=9.99,
+            stock=5,
+            category=self.category,
+            brand=self.brand
+        )
+        self.client.get(reverse("product", args=(self.product.id,)))
+        other.name = "Edited"
+        other.save()
+        stats.reset()
+
+        self.client.get(reverse("product", args=(self.product.id,)))
+        self.assertEqual(stats.as_dict()["hits"], 1)
+
+    def test_category_detail_invalidated_on_save(self):
+        """
+        Test that saving a category invalidates its cached response.
+        """
+        self.client.get(reverse("category", args=(self.category.id,)))
+        self.category.name = "Edited"
+        self.category.save()
+
+        response = self.client.get(reverse("category", args=(self.category.id,)))
+        self.assertEqual(response.data["name"], "Edited")
+
+    def test_product_detail_invalidated_on_brand_cascade_delete(self):
+        """
+        Test that deleting a brand invalidates the cached responses of its products.
+        """
+        brand_id = self.brand.id
+        self.client.get(reverse("product", args=(self.product.id,)))
+        self.client.get(reverse("brand", args=(brand_id,)))
+        self.brand.delete()
+
+        response = self.client.get(reverse("product", args=(self.product.id,)))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(reverse("brand", args=(brand_id,)))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cache_stats_admin(self):
+        """
+        Test that admins can read the cache statistics.
+        """
+        self.client.get(reverse("product", args=(self.product.id,)))
+
+        self.client.force_authenticate(self.admin_user)
+        response = self.client.get(reverse("cache-stats"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["misses"], 1)
+
+    def test_cache_stats_unauthenticated(self):
+        """
+        Test that the cache statistics are not public.
+        """
+        response = self.client.get(reverse("cache-stats"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ConditionalGetTestCase(APITestCase):
+    """
+    Test case for conditional GET on product detail and listing.
+    """
+
+    def setUp(self):
+        """
+        Set up test data including brand, category, and product.
+        """
+        self.brand = Brand.objects.create(name="Test Brand", description="Test Brand Description")
+        self.category = Category.objects.create(name="Test Category", description="Test Category Description")
+        self.product = Product.objects.create(
+            name="Test Product",
+            description="Test Product Description",
+            price=99.99,
+            stock=50,
+            category=self.category,
+            brand=self.brand
+        )
+
+    def test_product_detail_if_none_match(self):
+        """
+        Test that a matching ETag is answered with 304 until the product changes.
+        """
+        response = self.client.get(reverse("product", args=(self.product.id,)))
+        etag = response.headers["ETag"]
+
+        response = self.client.get(reverse("product", args=(self.product.id,)), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+
+        self.product.stock = 10
+        self.product.save()
+        response = self.client.get(reverse("product", args=(self.product.id,)), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+    def test_product_detail_if_modified_since(self):
+        """
+        Test that `If-Modified-Since` is honoured on product detail.
+        """
+        response = self.client.get(reverse("product", args=(self.product.id,)))
+        last_modified = response.headers["Last-Modified"]
+
+        response = self.client.get(reverse("product", args=(self.product.id,)), HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_product_detail_not_found(self):
+        """
+        Test that a missing product is still a 404 when validators are sent.
+        """
+        response = self.client.get(reverse("product", args=(0,)), HTTP_IF_NONE_MATCH='"abc"')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_product_list_if_none_match(self):
+        """
+        Test that the listing ETag changes when products are added or deleted.
+        """
+        response = self.client.get(reverse("products"))
+        etag = response.headers["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("products"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get(reverse("products"), {"ordering": "price"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.product.delete()
+        response = self.client.get(reverse("products"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_product_list_search_if_none_match(self):
+        """
+        Test that validators are computed for search results too.
+        """
+        response = self.client.get(reverse("products"), {"search": "test"})
+        self.assertEqual(len(response.data["results"]), 1)
+
+        response = self.client.get(reverse("products"), {"search": "test"}, HTTP_IF_NONE_MATCH=response.headers["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class ProductRatingTestCase(APITestCase):
+    """
+    Test case for the denormalized product rating aggregates.
+    """
+
+    def setUp(self):
+        """
+        Set up test data including users, brand, category, and products.
+        """
+        self.admin_user = User.objects.create_superuser(username="test_admin_user", password="password")
+        self.user = User.objects.create_user(username="test_user", password="password")
+        self.brand = Brand.objects.create(name="Test Brand", description="Test Brand Description")
+        self.category = Category.objects.create(name="Test Category", description="Test Category Description")
+        self.product = Product.objects.create(
+            name="Test Product",
+            description="Test Product Description",
+            price=99.99,
+            stock=50,
+            category=self.category,
+            brand=self.brand
+        )
+        self.other_product = Product.objects.create(
+            name="Other Product",
+            description="Other Product Description",
+            price=9.99,
+            stock=50,
+            category=self.category,
+            brand=self.brand
+        )
+        self.client.force_authenticate(self.admin_user)
+
+    def create_review(self, product, rating):
+        """
+        Create a review through the API and return its id.
+        """
+        data = {"product": product.id, "user": self.user.id, "rating": rating, "description": "Test"}
+        response = self.client.post(reverse("review-create"), data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data["id"]
+
+    def assertRatings(self, product, count, total, histogram):
+        """
+        Assert the stored aggregates of `product`.
+        """
+        product.refresh_from_db()
+        self.assertEqual(product.rating_count, count)
+        self.assertEqual(product.rating_sum, total)
+        self.assertEqual(
+            [product.rating_1, product.rating_2, product.rating_3, product.rating_4, product.rating_5],
+            histogram
+        )
+        self.assertAlmostEqual(product.rating_average, total / count if count else 0.0)
+
+    def test_rating_aggregates_follow_review_writes(self):
+        """
+        Test that creating, editing and deleting reviews keeps the aggregates in step.
+        """
+        first = self.create_review(self.product, 5)
+        self.create_review(self.product, 2)
+        self.assertRatings(self.product, 2, 7, [0, 1, 0, 0, 1])
+
+        self.client.patch(reverse("review-edit", args=(first,)), {"rating": 3})
+        self.assertRatings(self.product, 2, 5, [0, 1, 1, 0, 0])
+
+        self.client.patch(reverse("review-edit", args=(first,)), {"product": self.other_product.id})
+        self.assertRatings(self.product, 1, 2, [0, 1, 0, 0, 0])
+        self.assertRatings(self.other_product, 1, 3, [0, 0, 1, 0, 0])
+
+        self.client.delete(reverse("review-delete", args=(first,)))
+        self.assertRatings(self.other_product, 0, 0, [0, 0, 0, 0, 0])
+
+    def test_rating_aggregates_follow_cascade_deletes(self):
+        """
+        Test that reviews removed with their author are subtracted.
+        """
+        self.create_review(self.product, 4)
+        self.user.delete()
+        self.assertRatings(self.product, 0, 0, [0, 0, 0, 0, 0])
+
+    def test_rating_aggregates_read_only(self):
+        """
+        Test that the aggregates cannot be written through the product API.
+        """
+        self.client.patch(reverse("product-edit", args=(self.product.id,)), {"rating_count": 100})
+        self.assertRatings(self.product, 0, 0, [0, 0, 0, 0, 0])
+
+    def test_rebuild_rating_aggregates(self):
+        """
+        Test that the rebuild command corrects drifted aggregates.
+        """
+        ProductReview.objects.create(product=self.product, user=self.user, rating=4, description="Test")
+        Product.objects.filter(pk=self.product.pk).update(rating_count=0, rating_sum=0)
+        Product.objects.filter(pk=self.other_product.pk).update(rating_count=3, rating_sum=3, rating_1=3)
+
+        call_command("rebuild_product_ratings", stdout=StringIO())
+
+        self.assertRatings(self.product, 1, 4, [0, 0, 0, 1, 0])
+        self.assertRatings(self.other_product, 0, 0, [0, 0, 0, 0, 0])
+
+    def test_product_list_ordered_by_rating(self):
+        """
+        Test sorting the listing by average rating.
+        """
+        self.create_review(self.product, 2)
+        self.create_review(self.other_product, 4)
+
+        response = self.client.get(reverse("products"), {"ordering": "-rating_average"})
+        self.assertEqual(
+            [product["id"] for product in response.data["results"]],
+            [self.other_product.id, self.product.id]
+        )
+
+
+class ProductReviewListTestCase(APITestCase):
+    """
+    Test case for the per-product review listing.
+    """
+
+    def setUp(self):
+        """
+        Set up test data including users, brand, category, products, and reviews.
+        """
+        self.brand = Brand.objects.create(name="Test Brand", description="Test Brand Description")
+        self.category = Category.objects.create(name="Test Category", description="Test Category Description")
+        self.product = Product.objects.create(
+            name="Test Product",
+            description="Test Product Description",
+            price=99.99,
+            stock=50,
+            category=self.category,
+            brand=self.brand
+        )
+        self.other_product = Product.objects.create(
+            name="Other Product",
+            description="Other Product Description",
+            price=9.99,
+            stock=50,
+            category=self.category,
+            brand=self.brand
+        )
+        for i in range(7):
+            user = User.objects.create_user(username=f"test_user_{i}")
+            ProductReview.objects.create(product=self.product, user=user, rating=1 + i % 5, description="Test")
+            ProductReview.objects.create(product=self.other_product, user=user, rating=3, description="Test")
+
+    def test_product_reviews_paginated(self):
+        """
+        Test that a product's reviews are listed newest first, page by page.
+        """
+        url = reverse("product-reviews", args=(self.product.id,)) + "?page_size=3"
+        reviews = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            reviews += response.data["results"]
+            url = response.data["next"]
+
+        expected = list(
+            ProductReview.objects.filter(product=self.product).order_by("-created_at", "-pk").values_list("id", flat=True)
+        )
+        self.assertEqual([review["id"] for review in reviews], expected)
+        self.assertEqual(reviews[0]["user_name"], "test_user_6")
+
+    def test_product_reviews_query_count(self):
+        """
+        Test that authors are loaded without a query per review.
+        """
+        with self.assertNumQueries(2):
+            self.client.get(reverse("product-reviews", args=(self.product.id,)))
+
+    def test_product_reviews_unknown_product(self):
+        """
+        Test listing the reviews of a product that does not exist.
+        """
+        response = self.client.get(reverse("product-reviews", args=(0,)))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ProductImportTestCase(APITestCase):
+    """
+    Test case for the bulk product import.
+    """
+
+    def setUp(self):
+        """
+        Set up test data including users, brand, and category.
+        """
+        self.admin_user = User.objects.create_superuser(username="test_admin_user", password="password")
+        self.user = User.objects.create_user(username="test_user", password="password")
+        self.brand = Brand.objects.create(name="Test Brand", description="Test Brand Description")
+        self.category = Category.objects.create(name="Test Category", description="Test Category Description")
+
+    def test_product_import_csv_admin(self):
+        """
+        Test importing a CSV file, with invalid rows reported by line.
+        """
+        self.client.force_authenticate(self.admin_user)
+        content = (
+            "name,description,price,stock,category,brand\n"
+            "Lamp,A desk lamp,19.99,10,Test Category,Test Brand\n"
+            "Chair,An office chair,12345.00,3,Test Category,Test Brand\n"
+            "Desk,A standing desk,249.00,2,Test Category,Missing Brand\n"
+            "Rug,A wool rug,89.50,4,Test Category,Test Brand\n"
+        )
+        upload = SimpleUploadedFile("catalog.csv", content.encode("utf-8"))
+
+        response = self.client.post(reverse("product-import"), {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["rows"], 4)
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual([error["line"] for error in response.data["errors"]], [3, 4])
+        self.assertIn("price", response.data["errors"][0]["errors"])
+        self.assertIn("brand", response.data["errors"][1]["errors"])
+
+        lamp = Product.objects.get(name="Lamp")
+        self.assertEqual((lamp.brand, lamp.category, lamp.stock), (self.brand, self.category, 10))
+
+        response = self.client.get(reverse("products"), {"search": "lamp"})
+        self.assertEqual([product["id"] for product in response.data["results"]], [lamp.id])
+
+    def test_product_import_unauthenticated(self):
+        """
+        Test importing products as a non-admin user.
+        """
+        self.client.force_authenticate(self.user)
+        upload = SimpleUploadedFile("catalog.csv", b"name\n")
+
+        response = self.client.post(reverse("product-import"), {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_product_import_unknown_format(self):
+        """
+        Test importing a file whose format cannot be inferred.
+        """
+        self.client.force_authenticate(self.admin_user)
+        upload = SimpleUploadedFile("catalog.xml", b"<products/>")
+
+        response = self.client.post(reverse("product-import"), {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_import_products_command_jsonl(self):
+        """
+        Test importing a JSONL file with the management command, in several batches.
+        """
+        lines = [
+            json.dumps({"name": f"Product {i}", "description": "Test", "price": 9.5, "stock": i,
+                        "category": "Test Category", "brand": "Test Brand"})
+            for i in range(5)
+        ]
+        lines.insert(2, "{not json")
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as f:
+            f.write("\n".join(lines))
+        self.addCleanup(os.remove, f.name)
+
+        stdout, stderr = StringIO(), StringIO()
+        call_command("import_products", f.name, "--batch-size", "2", stdout=stdout, stderr=stderr)
+
+        self.assertEqual(Product.objects.count(), 5)
+        self.assertIn("Imported 5 of 6 rows (1 rejected)", stdout.getvalue())
+        self.assertIn("Line 3", stderr.getvalue())
+
+    def test_product_import_jsonl_non_string_names(self):
+        """
+        Test that brands and categories given as lists or objects are rejected as row errors.
+        """
+        self.client.force_authenticate(self.admin_user)
+        rows = [
+            {"name": "Lamp", "description": "A desk lamp", "price": 19.99, "stock": 10,
+             "category": "Test Category", "brand": ["Test Brand"]},
+            {"name": "Rug", "description": "A wool rug", "price": 89.5, "stock": 4,
+             "category": {"name": "Test Category"}, "brand": "Test Brand"},
+        ]
+        content = "\n".join(json.dumps(row) for row in rows)
+        upload = SimpleUploadedFile("catalog.jsonl", content.encode("utf-8"))
+
+        response = self.client.post(reverse("product-import"), {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["created"], 0)
+        self.assertIn("brand", response.data["errors"][0]["errors"])
+        self.assertIn("category", response.data["errors"][1]["errors"])
+
+
+class ProductExportTestCase(APITestCase):
+    """
+    Test case for the streaming catalog export.
+    """
+
+    def setUp(self):
+        """
+        Set up test data including brand, category, and products.
+        """
+        self.brand = Brand.objects.create(name="Test Brand", description="Test Brand Description")
+        self.category = Category.objects.create(name="Test Category", description="Test Category Description")
+        self.products = [
+            Product.objects.create(
+                name=f"Product {i}",
+                description="Test, with a comma",
+                price=10.5 + i,
+                stock=i,
+                category=self.category,
+                brand=self.brand
+            )
+            for i in range(3)
+        ]
+
+    def export(self, **params):
+        """
+        Request an export and return the response and its full content.
+        """
+        response = self.client.get(reverse("product-export"), params)
+        content = b"".join(response.streaming_content).decode("utf-8") if response.streaming else None
+        return response, content
+
+    def test_product_export_ndjson(self):
+        """
+        Test that NDJSON export lines match the product serializer's output.
+        """
+        response, content = self.export()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.headers["Content-Type"], "application/x-ndjson")
+
+        records = [json.loads(line) for line in content.splitlines()]
+        # The export carries the product's own columns, not nested images.
+        expected = [json.loads(json.dumps(ProductSerializer(product).data)) for product in
+                    Product.objects.order_by("pk")]
+        for record in expected:
+            del record["images"]
+        self.assertEqual(records, expected)
+
+    def test_product_export_csv(self):
+        """
+        Test exporting the catalog as CSV.
+        """
+        response, content = self.export(output="csv")
+        self.assertEqual(response.headers["Content-Type"], "text/csv")
+
+        rows = list(csv.DictReader(StringIO(content)))
+        self.assertEqual([row["name"] for row in rows], ["Product 0", "Product 1", "Product 2"])
+        self.assertEqual(rows[1]["description"], "Test, with a comma")
+        self.assertEqual(rows[1]["price"], "11.50")
+
+    def test_product_export_updated_since(self):
+        """
+        Test that an incremental export only contains products changed since the watermark.
+        """
+        response, _ = self.export()
+        watermark = response.headers["X-Export-Watermark"]
+
+        self.products[1].stock = 100
+        self.products[1].save()
+        _, content = self.export(updated_since=watermark)
+
+        self.assertEqual([json.loads(line)["id"] for line in content.splitlines()], [self.products[1].id])
+
+    def test_product_export_invalid_parameters(self):
+        """
+        Test exporting with an unknown format or a malformed timestamp.
+        """
+        response, _ = self.export(output="xml")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response, _ = self.export(updated_since="yesterday")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ProductBulkUpdateTestCase(APITestCase):
+    """
+    Test case for the bulk price and stock update.
+    """
+
+    def setUp(self):
+        """
+        Set up test data including users, brand, category, and products.
+        """
+        self.admin_user = User.objects.create_superuser(username="test_admin_user", password="password")
+        self.user = User.objects.create_user(username="test_user", password="password")
+        self.brand = Brand.objects.create(name="Test Brand", description="Test Brand Description")
+        self.category = Category.objects.create(name="Test Category", description="Test Category Description")
+        self.products = [
+            Product.objects.create(
+                name=f"Product {i}",
+                description="Test Product Description",
+                price=10,
+                stock=5,
+                category=self.category,
+                brand=self.brand
+            )
+            for i in range(3)
+        ]
+
+    def test_bulk_update_admin(self):
+        """
+        Test absolute and relative updates with per-id results.
+        """
+        self.client.force_authenticate(self.admin_user)
+        first, second, third = self.products
+        data = [
+            {"id": first.id, "price": "12.50", "stock": 20},
+            {"id": second.id, "stock_delta": -2},
+            {"id": third.id, "stock_delta": -6},
+            {"id": 0, "price": "1.00"},
+        ]
+
+        # Five for the update, two to replace the change feed entries.
+        with self.assertNumQueries(7):
+            response = self.client.post(reverse("product-bulk-update"), data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [
+            {"id": first.id, "status": "updated", "price": "12.50", "stock": 20},
+            {"id": second.id, "status": "updated", "price": "10.00", "stock": 3},
+            {"id": third.id, "status": "insufficient_stock"},
+            {"id": 0, "status": "not_found"},
+        ])
+        third.refresh_from_db()
+        self.assertEqual(third.stock, 5)
+
+    def test_bulk_update_relative_stock_is_not_lost(self):
+        """
+        Test that a relative update applies on top of a change it did not read.
+        """
+        self.client.force_authenticate(self.admin_user)
+        product = self.products[0]
+        Product.objects.filter(pk=product.pk).update(stock=50)
+
+        self.client.post(reverse("product-bulk-update"), [{"id": product.id, "stock_delta": 3}], format="json")
+
+        product.refresh_from_db()
+        self.assertEqual(product.stock, 53)
+
+    def test_bulk_update_invalid_payload(self):
+        """
+        Test rejecting duplicate ids and contradictory stock changes.
+        """
+        self.client.force_authenticate(self.admin_user)
+        product = self.products[0]
+
+        response = self.client.post(
+            reverse("product-bulk-update"),
+            [{"id": product.id, "stock": 1}, {"id": product.id, "stock": 2}],
+            format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(
+            reverse("product-bulk-update"), [{"id": product.id, "stock": 1, "stock_delta": 1}], format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_update_unauthenticated(self):
+        """
+        Test the bulk update as a non-admin user.
+        """
+        self.client.force_authenticate(self.user)
+        response = self.client.post(reverse("product-bulk-update"), [], format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ProductImageVariantsTestCase(APITestCase):
+    """
+    Test case for the resized product image variants.
+    """
+
+    def setUp(self):
+        """
+        Set up a temporary media root, a product, and an uploaded image.
+        """
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.brand = Brand.objects.create(name="Test Brand", description="Test Brand Description")
+        self.category = Category.objects.create(name="Test Category", description="Test Category Description")
+        self.product = Product.objects.create(
+            name="Test Product",
+            description="Test Product Description",
+            price=10,
+            stock=5,
+            category=self.category,
+            brand=self.brand
+        )
+        self.product_image = ProductImage.objects.create(product=self.product, image=self.upload("photo.png"))
+
+    def upload(self, name, size=(2000, 1000)):
+        content = BytesIO()
+        Image.new("RGB", size, "red").save(content, "PNG")
+        return SimpleUploadedFile(name, content.getvalue(), content_type="image/png")
+
+    def test_render_variants(self):
+        """
+        Test that every variant is scaled to fit its box in both formats.
+        """
+        variants = render_variants(self.product_image.image.path, self.media_root, "test")
+
+        self.assertEqual((variants["thumbnail"]["width"], variants["thumbnail"]["height"]), (160, 80))
+        self.assertEqual((variants["card"]["width"], variants["card"]["height"]), (480, 240))
+        self.assertEqual((variants["zoom"]["width"], variants["zoom"]["height"]), (1600, 800))
+        with Image.open(os.path.join(self.media_root, variants["card"]["webp"])) as image:
+            self.assertEqual((image.format, image.size), ("WEBP", (480, 240)))
+        with Image.open(os.path.join(self.media_root, variants["card"]["jpeg"])) as image:
+            self.assertEqual((image.format, image.size), ("JPEG", (480, 240)))
+
+    def test_render_variants_never_upscales(self):
+        """
+        Test that an image smaller than a variant box keeps its size.
+        """
+        small = ProductImage.objects.create(product=self.product, image=self.upload("small.png", size=(100, 50)))
+
+        variants = render_variants(small.image.path, self.media_root, "small")
+
+        self.assertEqual((variants["zoom"]["width"], variants["zoom"]["height"]), (100, 50))
+
+    def test_variants_scheduled_on_commit(self):
+        """
+        Test that rendering is queued once the upload is committed, not during the request.
+        """
+        with patch("products_app.image_variants.schedule_variants") as schedule_variants:
+            with self.captureOnCommitCallbacks() as callbacks:
+                ProductImage.objects.create(product=self.product, image=self.upload("other.png"))
+            schedule_variants.assert_not_called()
+            for callback in callbacks:
+                callback()
+            self.assertEqual(schedule_variants.call_count, 1)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.product_image.save()
+            self.assertEqual(schedule_variants.call_count, 1)
+
+    def test_render_image_variants_command(self):
+        """
+        Test rendering missing variants in the process pool and exposing them as URLs.
+        """
+        out = StringIO()
+        call_command("render_image_variants", stdout=out)
+        self.assertIn("Rendered variants for 1 images, 0 failed.", out.getvalue())
+
+        self.product_image.refresh_from_db()
+        self.assertEqual(self.product_image.variants["thumbnail"]["width"], 160)
+
+        data = ProductImageSerializer(self.product_image).data
+        self.assertTrue(data["variants"]["thumbnail"]["webp"].startswith("/media/product_images/variants/"))
+        self.assertTrue(data["variants"]["thumbnail"]["jpeg"].endswith("_thumbnail.jpeg"))
+
+    def test_replacing_image_discards_variants(self):
+        """
+        Test that stale variant files are removed when the image is replaced or deleted.
+        """
+        call_command("render_image_variants", stdout=StringIO())
+        self.product_image.refresh_from_db()
+        old_path = os.path.join(self.media_root, self.product_image.variants["card"]["webp"])
+        self.assertTrue(os.path.exists(old_path))
+
+        self.product_image.image = self.upload("replacement.png")
+        self.product_image.save()
+        self.product_image.refresh_from_db()
+        self.assertEqual(self.product_image.variants, {})
+        self.assertFalse(os.path.exists(old_path))
+
+        call_command("render_image_variants", stdout=StringIO())
+        self.product_image.refresh_from_db()
+        new_path = os.path.join(self.media_root, self.product_image.variants["card"]["webp"])
+        self.product_image.delete()
+        self.assertFalse(os.path.exists(new_path))
+
+
+class ProductImageEmbeddingTestCase(APITestCase):
+    """
+    Test case for the images embedded in product responses.
+    """
+
+    def setUp(self):
+        """
+        Set up test data including brand, category, and products with images.
+        """
+        self.brand = Brand.objects.create(name="Test Brand", description="Test Brand Description")
+        self.category = Category.objects.create(name="Test Category", description="Test Category Description")
+        self.products = [self.create_product(i) for i in range(5)]
+        # A running worker has its brand and category lookups loaded.
+        lookups.brands.current()
+        lookups.categories.current()
+
+    def create_product(self, i):
+        product = Product.objects.create(
+            name=f"Product {i}",
+            description="Test Product Description",
+            price=10,
+            stock=5,
+            category=self.category,
+            brand=self.brand
+        )
+        for n in range(2):
+            ProductImage.objects.create(product=product, image=f"product_images/{i}_{n}.png")
+        return product
+
+    def test_list_query_count_is_constant(self):
+        """
+        Test that the images of a whole page are loaded with a single extra query.
+        """
+        # Page, images.
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("products"))
+        self.assertEqual(len(response.data["results"]), 5)
+        self.assertTrue(all(len(product["images"]) == 2 for product in response.data["results"]))
+
+        self.products += [self.create_product(i) for i in range(5, 15)]
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("products"))
+        self.assertEqual(len(response.data["results"]), 15)
+
+    def test_values_serialization_loads_images_in_batches(self):
+        """
+        Test that the values() path loads nested images a batch of products at a time, with the same output.
+        """
+        products = Product.objects.order_by("pk")
+        with patch("ecomm.fast_serialization.BATCH_SIZE", 2), self.assertNumQueries(4):
+            data = serialize_queryset(ProductSerializer(), products)
+
+        self.assertEqual(JSONRenderer().render(data), JSONRenderer().render(ProductSerializer(products, many=True).data))
+        self.assertTrue(all(len(product["images"]) == 2 for product in data))
+
+    def test_detail_embeds_images(self):
+        """
+        Test that a product detail lists its images in upload order.
+        """
+        product = self.products[0]
+        response = self.client.get(reverse("product", args=(product.id,)))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [image["id"] for image in response.data["images"]],
+            list(product.productimage_set.values_list("id", flat=True))
+        )
+        self.assertTrue(response.data["images"][0]["image"].endswith("/media/product_images/0_0.png"))
+
+    def test_image_write_refreshes_product(self):
+        """
+        Test that adding an image changes the product's validators and cached detail.
+        """
+        product = self.products[0]
+        response = self.client.get(reverse("product", args=(product.id,)))
+        etag = response.headers["ETag"]
+
+        ProductImage.objects.create(product=product, image="product_images/new.png")
+
+        response = self.client.get(reverse("product", args=(product.id,)), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["images"]), 3)
+
+
+    def test_image_write_bumps_again_on_commit(self):
+        """
+        Test that an image write bumps the product stamp once more when it commits.
+        """
+        with patch("products_app.image_variants.schedule_variants"):
+            with self.captureOnCommitCallbacks() as callbacks:
+                ProductImage.objects.create(product=self.products[0], image="product_images/new.png")
+            [version] = get_versions(["product"])
+
+            for callback in callbacks:
+                callback()
+
+        self.assertNotEqual(get_versions(["product"]), [version])
+
+class CatalogQueryPlanTestCase(APITestCase):
+    """
+    Test case for the catalog query-plan regression check.
+    """
+
+    def test_catalog_queries_use_indexes(self):
+        """
+        Test that no catalog query reads the product table in full.
+        """
+        category, brand = generate_catalog(2000, categories=5, brands=10)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        results = check_plans(catalog_queries(category, brand))
+
+        self.assertEqual({name: scans for name, (plan, scans) in results.items() if scans}, {})
+        plan, scans = results["category id and brand id"]
+        self.assertNotIn(TEMP_SORT, plan)
+
+    def test_full_scan_detected(self):
+        """
+        Test that an unindexed filter is reported as a full scan.
+        """
+        plan = explain(Product.objects.filter(description="Test"))
+        self.assertEqual(full_scans(plan), ["products_app_product"])
+
+
+class SparseFieldsTestCase(APITestCase):
+    """
+    Test case for `?fields=` and `?expand=` on catalog responses.
+    """
+
+    def setUp(self):
+        """
+        Set up test data including brand, category, and products with images.
+        """
+        self.brand = Brand.objects.create(name="Test Brand", description="Test Brand Description")
+        self.category = Category.objects.create(name="Test Category", description="Test Category Description")
+        self.products = [
+            Product.objects.create(
+                name=f"Product {i}",
+                description="Test Product Description",
+                price=10,
+                stock=5,
+                category=self.category,
+                brand=self.brand
+            )
+            for i in range(3)
+        ]
+        ProductImage.objects.create(product=self.products[0], image="product_images/0.png")
+        # A running worker has its brand and category lookups loaded.
+        lookups.brands.current()
+        lookups.categories.current()
+
+    def test_fields_trim_response_and_query(self):
+        """
+        Test that unrequested fields are neither serialized nor selected.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("products"), {"fields": "id,name,price"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data["results"][0]), {"id", "name", "price"})
+        # The page alone; images are not requested, so not prefetched.
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("description", queries[0]["sql"])
+
+    def test_expand_inlines_relations(self):
+        """
+        Test that expanded brands and categories are joined into the page query.
+        """
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("products"), {"expand": "brand,category"})
+
+        product = response.data["results"][0]
+        self.assertEqual(product["brand"]["name"], "Test Brand")
+        self.assertEqual(product["category"]["name"], "Test Category")
+        self.assertEqual(len(response.data["results"]), 3)
+
+        response = self.client.get(reverse("products"), {"fields": "id,brand", "expand": "brand,unknown"})
+        self.assertEqual(response.data["results"][0], {"id": product["id"], "brand": product["brand"]})
+
+    def test_detail_fields_and_expand(self):
+        """
+        Test that cached and conditional product details follow the expanded brand.
+        """
+        product = self.products[0]
+        url = reverse("product", args=(product.id,))
+        params = {"fields": "name,brand,images", "expand": "brand"}
+
+        response = self.client.get(url, params)
+        self.assertEqual(set(response.data), {"name", "brand", "images"})
+        self.assertEqual(response.data["brand"]["name"], "Test Brand")
+        self.assertEqual(len(response.data["images"]), 1)
+        self.assertNotIn("Last-Modified", response.headers)
+        etag = response.headers["ETag"]
+
+        self.brand.name = "Renamed"
+        self.brand.save()
+
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["brand"]["name"], "Renamed")
+
+        response = self.client.get(url)
+        self.assertIn("description", response.data)
+        self.assertEqual(response.data["brand"], self.brand.id)
+
+    def test_brand_and_category_fields(self):
+        """
+        Test sparse fields on brand and category listings and details.
+        """
+        response = self.client.get(reverse("brands"), {"fields": "name"})
+        self.assertEqual(response.data, [{"name": "Test Brand"}])
+
+        response = self.client.get(reverse("category", args=(self.category.id,)), {"fields": "id"})
+        self.assertEqual(response.data, {"id": self.category.id})
+
+
+class FastSerializationTestCase(APITestCase):
+    """
+    Test case for the values() serialization of the catalog list endpoints.
+    """
+
+    def setUp(self):
+        """
+        Set up test data including a user, brand, category, products, images, and a review.
+        """
+        self.user = User.objects.create_user(username="test_user", password="password")
+        self.brand = Brand.objects.create(name="Test Brand", description="Test Brand Description")
+        self.category = Category.objects.create(name="Test Category", description="Test Category Description")
+        self.products = [
+            Product.objects.create(
+                name=f"Product {i}",
+                description="Test Product Description",
+                price="12.50",
+                stock=i,
+                category=self.category,
+                brand=self.brand
+            )
+            for i in range(3)
+        ]
+        ProductImage.objects.create(
+            product=self.products[0],
+            image="product_images/0.png",
+            variants={"card": {"width": 480, "height": 240, "webp": "product_images/variants/0_card.webp",
+                               "jpeg": "product_images/variants/0_card.jpeg"}}
+        )
+        ProductImage.objects.create(product=self.products[0], image="product_images/1.png")
+        ProductReview.objects.create(product=self.products[1], user=self.user, rating=4, description="Good")
+        # A running worker has its brand and category lookups loaded.
+        lookups.brands.current()
+        lookups.categories.current()
+
+    def list_products(self, params=None):
+        """
+        Call the unpaginated product list, which has no route of its own.
+        """
+        return list_products_view(APIRequestFactory().get("/", params)).render()
+
+    def assertSameContent(self, response, serializer_class, queryset, **options):
+        """
+        Assert that `response` holds exactly what `serializer_class` renders for `queryset`.
+        """
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        expected = JSONRenderer().render(serializer_class(queryset, many=True, **options).data)
+        self.assertEqual(response.content, expected)
+
+    def test_product_list_matches_serializer(self):
+        """
+        Test that the product list, with nested images, fields and expansion, is unchanged.
+        """
+        products = Product.objects.all()
+        self.assertSameContent(self.list_products(), ProductSerializer, products)
+
+        for options in [{"fields": ["id", "images", "price"]}, {"expand": ["brand", "category"]}]:
+            with self.subTest(options=options):
+                params = {key: ",".join(value) for key, value in options.items()}
+                self.assertSameContent(self.list_products(params), ProductSerializer, products, **options)
+
+    def test_catalog_lists_match_serializers(self):
+        """
+        Test that the brand, category, and review lists are unchanged.
+        """
+        self.assertSameContent(self.client.get(reverse("brands")), BrandSerializer, Brand.objects.all())
+        self.assertSameContent(self.client.get(reverse("categories")), CategorySerializer, Category.objects.all())
+        self.assertSameContent(self.client.get(reverse("reviews")), ProductReviewSerializer, ProductReview.objects.all())
+
+    def test_product_list_query_count(self):
+        """
+        Test that products and their images are read with one query each.
+        """
+        with self.assertNumQueries(2):
+            self.list_products()
+
+
+class LookupCacheTestCase(APITestCase):
+    """
+    Test case for the in-memory brand and category lookup tables.
+    """
+
+    def setUp(self):
+        """
+        Set up test data including brands, a category, and products.
+        """
+        self.brand = Brand.objects.create(name="Test Brand", description="Test Brand Description")
+        self.other_brand = Brand.objects.create(name="Other Brand", description="Other Brand Description")
+        self.category = Category.objects.create(name="Test Category", description="Test Category Description")
+        self.products = [
+            Product.objects.create(
+                name=f"Product {i}",
+                description="Test Product Description",
+                price=10 + i,
+                stock=5,
+                category=self.category,
+                brand=brand
+            )
+            for i, brand in enumerate([self.brand, self.other_brand, self.brand])
+        ]
+        self.admin_user = User.objects.create_superuser(username="admin", password="adminpassword")
+
+    def test_brand_list_served_from_memory(self):
+        """
+        Test that repeated brand and category lists issue no query.
+        """
+        self.client.get(reverse("brands"))
+        self.client.get(reverse("categories"))
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("brands"))
+            self.client.get(reverse("categories"))
+        self.assertEqual([brand["name"] for brand in response.data], ["Test Brand", "Other Brand"])
+
+    def test_brand_list_follows_writes(self):
+        """
+        Test that a created, renamed, or deleted brand shows up on the next request.
+        """
+        self.client.get(reverse("brands"))
+
+        new_brand = Brand.objects.create(name="New Brand", description="New Brand Description")
+        self.assertIn("New Brand", [brand["name"] for brand in self.client.get(reverse("brands")).data])
+
+        new_brand.name = "Renamed Brand"
+        new_brand.save()
+        self.assertIn("Renamed Brand", [brand["name"] for brand in self.client.get(reverse("brands")).data])
+
+        new_brand.delete()
+        self.assertEqual(len(self.client.get(reverse("brands")).data), 2)
+
+    def test_brand_list_follows_writes_of_other_processes(self):
+        """
+        Test that a stamp bumped by another process through the shared version cache reloads the table.
+        """
+        self.client.get(reverse("brands"))
+        Brand.objects.filter(pk=self.brand.pk).update(name="Renamed Brand")
+
+        other_process = FileBasedCache(settings.CACHES[VERSION_CACHE]["LOCATION"], {})
+        other_process.incr(_version_key("brand"))
+
+        response = self.client.get(reverse("brands"))
+        self.assertEqual([brand["name"] for brand in response.data], ["Renamed Brand", "Other Brand"])
+
+    def test_version_cache_check(self):
+        """
+        Test that the system check requires a version cache and warns about a process-local or expiring one.
+        """
+        default = settings.CACHES["default"]
+        with override_settings(CACHES={"default": default}):
+            self.assertEqual([error.id for error in check_version_cache(None)], ["products_app.E001"])
+        with override_settings(CACHES={"default": default, VERSION_CACHE: default}):
+            self.assertEqual([error.id for error in check_version_cache(None)], ["products_app.W001"])
+        expiring = {**settings.CACHES[VERSION_CACHE], "TIMEOUT": 300}
+        with override_settings(CACHES={"default": default, VERSION_CACHE: expiring}):
+            self.assertEqual([error.id for error in check_version_cache(None)], ["products_app.W003"])
+        self.assertEqual(check_version_cache(None), [])
+
+    def test_name_filter_without_join(self):
+        """
+        Test that filtering products by brand name compares the foreign key column.
+        """
+        self.client.get(reverse("products"), {"brand__name": "Test Brand"})
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("products"), {"brand__name": "Test Brand"})
+
+        self.assertEqual(
+            [product["id"] for product in response.data["results"]],
+            [self.products[2].id, self.products[0].id]
+        )
+        self.assertFalse(any("products_app_brand" in query["sql"] for query in queries.captured_queries))
+
+        response = self.client.get(reverse("products"), {"brand__name": "Missing Brand"})
+        self.assertEqual(response.data["results"], [])
+
+    def test_product_write_validates_brand_from_memory(self):
+        """
+        Test that product writes check the brand and category without querying them.
+        """
+        self.client.force_authenticate(self.admin_user)
+        data = {
+            "name": "New Product",
+            "description": "New Product Description",
+            "price": 99.99,
+            "stock": 10,
+            "category": self.category.id,
+        }
+        self.client.get(reverse("brands"))
+        self.client.get(reverse("categories"))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse("product-create"), {**data, "brand": self.brand.id})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(any('FROM "products_app_brand"' in query["sql"] for query in queries.captured_queries))
+
+        response = self.client.post(reverse("product-create"), {**data, "brand": 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("brand", response.data)
+
+
+@override_settings(PRODUCT_CATALOG_SNAPSHOT=True)
+class CatalogSnapshotTestCase(ProductPaginationTestCase):
+    """
+    Test case for the product listing answered from the catalog snapshot.
+
+    Every pagination test above runs again against the snapshot.
+    """
+
+    def setUp(self):
+        """
+        Set up the catalog, drop any snapshot left by another test, and build snapshots inline.
+        """
+        super().setUp()
+        catalog.clear()
+        patcher = patch.object(catalog, "schedule_reload", catalog.reload)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_snapshot_pages_match_database(self):
+        """
+        Test that filtered and sorted pages are the same with and without the snapshot.
+        """
+        queries = [
+            "?page_size=4",
+            "?ordering=price&page_size=4",
+            "?ordering=-price&min_price=10.5&page_size=3",
+            "?ordering=created_at&brand__name=Other Brand&max_price=11&page_size=2",
+            f"?category_id={self.category.id}&in_stock=true&page_size=5",
+            "?in_stock=false",
+            "?brand__name=Missing Brand",
+            "?ordering=name&page_size=7",
+        ]
+        for query in queries:
+            with self.subTest(query=query):
+                ids = self.collect_pages(reverse("products") + query)
+                with override_settings(PRODUCT_CATALOG_SNAPSHOT=False):
+                    self.assertEqual(ids, self.collect_pages(reverse("products") + query))
+
+    def test_snapshot_page_query_count(self):
+        """
+        Test that a page only reads its products and their images from the database.
+        """
+        self.client.get(reverse("products"))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("products") + "?ordering=price&min_price=11")
+        self.assertEqual(len(response.data["results"]), 16)
+        self.assertEqual(len(queries), 2)
+
+    def test_snapshot_follows_writes(self):
+        """
+        Test that created, updated, and deleted products show up on the next request.
+        """
+        self.client.get(reverse("products"))
+        cheapest = Product.objects.order_by("price", "pk").first()
+        cheapest.price = 99
+        cheapest.save()
+        new = Product.objects.create(
+            name="New Product",
+            description="Test Product Description",
+            price=1,
+            stock=5,
+            category=self.category,
+            brand=self.brand
+        )
+
+        ids = self.collect_pages(reverse("products") + "?ordering=price&page_size=10")
+        self.assertEqual(ids[0], new.id)
+        self.assertEqual(ids[-1], cheapest.id)
+
+        new.delete()
+        ids = self.collect_pages(reverse("products") + "?ordering=price&page_size=10")
+        self.assertNotIn(new.id, ids)
+        self.assertEqual(len(ids), 25)
+
+    def test_snapshot_deletion_merged_without_reload(self):
+        """
+        Test that a deleted product is dropped from the snapshot through its tombstone, without a reload.
+        """
+        self.client.get(reverse("products"))
+        deleted = Product.objects.order_by("pk").first()
+        deleted.delete()
+
+        with patch.object(catalog, "schedule_reload") as schedule_reload:
+            ids = self.collect_pages(reverse("products") + "?ordering=price&page_size=10")
+
+        schedule_reload.assert_not_called()
+        self.assertNotIn(deleted.id, ids)
+        self.assertEqual(len(ids), 24)
+        self.assertEqual(len(catalog.current()), 24)
+
+    def test_database_answers_while_snapshot_builds(self):
+        """
+        Test that the listing is answered from the database while the snapshot is built in the background.
+        """
+        with patch.object(catalog, "schedule_reload") as schedule_reload:
+            ids = self.collect_pages(reverse("products") + "?ordering=price&page_size=10")
+            self.assertIsNone(catalog.current())
+
+        schedule_reload.assert_called()
+        self.assertEqual(len(ids), 25)
+
+    def test_snapshot_invalid_cursor(self):
+        """
+        Test that a tampered cursor is rejected.
+        """
+        cursor = urlsafe_b64encode(json.dumps({"o": "price", "p": ["abc", 1]}).encode("ascii")).decode("ascii")
+        response = self.client.get(reverse("products"), {"ordering": "price", "cursor": cursor})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class AutocompleteTestCase(APITestCase):
+    """
+    Test case for the autocomplete endpoint.
+    """
+
+    def setUp(self):
+        """
+        Set up brands, categories, and products with different review counts.
+        """
+        self.brand = Brand.objects.create(name="Lumo", description="Test Brand Description")
+        self.other_brand = Brand.objects.create(name="Acme", description="Test Brand Description")
+        self.category = Category.objects.create(name="Lamps", description="Test Category Description")
+        self.products = {}
+        for name, rating_count in [("Lamp", 3), ("Lantern", 7), ("lamp shade", 3), ("Desk", 9)]:
+            self.products[name] = Product.objects.create(
+                name=name,
+                description="Test Product Description",
+                price=10,
+                stock=5,
+                category=self.category,
+                brand=self.brand,
+                rating_count=rating_count
+            )
+        autocomplete.clear()
+        patcher = patch.object(autocomplete, "schedule_rebuild", autocomplete.rebuild)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def suggest(self, q, **params):
+        response = self.client.get(reverse("product-autocomplete"), {"q": q, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {group: [entry["name"] for entry in entries] for group, entries in response.data.items()}
+
+    def test_autocomplete_ranked_by_popularity(self):
+        """
+        Test that matches are case-insensitive, most popular first, then alphabetical.
+        """
+        self.assertEqual(
+            self.suggest("LA"),
+            {"products": ["Lantern", "Lamp", "lamp shade"], "brands": [], "categories": ["Lamps"]}
+        )
+        self.assertEqual(self.suggest("lamp", limit=1)["products"], ["Lamp"])
+        self.assertEqual(self.suggest("l")["brands"], ["Lumo"])
+        self.assertEqual(self.suggest("x")["products"], [])
+
+    def test_autocomplete_warm_lookup_without_queries(self):
+        """
+        Test that lookups after the first one issue no query.
+        """
+        self.suggest("la")
+
+        with self.assertNumQueries(0):
+            self.suggest("lan")
+
+    def test_autocomplete_follows_writes(self):
+        """
+        Test that renamed, created, deleted, and newly reviewed products show up on the next request.
+        """
+        self.suggest("la")
+
+        lamp = self.products["Lamp"]
+        lamp.name = "Lava Lamp"
+        lamp.save()
+        Product.objects.create(
+            name="Laser", description="Test Product Description", price=10, stock=5,
+            category=self.category, brand=self.other_brand
+        )
+        self.assertEqual(self.suggest("la")["products"], ["Lantern", "lamp shade", "Lava Lamp", "Laser"])
+
+        self.products["lamp shade"].delete()
+        self.assertEqual(self.suggest("la")["products"], ["Lantern", "Lava Lamp", "Laser"])
+
+        user = User.objects.create_user(username="reviewer", password="password")
+        for _ in range(4):
+            ProductReview.objects.create(product=Product.objects.get(name="Laser"), user=user, rating=5, description="Good")
+        self.assertEqual(self.suggest("la")["products"], ["Lantern", "Laser", "Lava Lamp"])
+        self.assertEqual(self.suggest("la", limit=2)["products"], ["Lantern", "Laser"])
+
+    def test_autocomplete_deletion_without_rebuild(self):
+        """
+        Test that a deleted product is left out through its tombstone, without rebuilding the index.
+        """
+        self.suggest("la")
+        self.products["Lantern"].delete()
+
+        with patch.object(autocomplete, "schedule_rebuild") as schedule_rebuild:
+            self.assertEqual(self.suggest("la")["products"], ["Lamp", "lamp shade"])
+        schedule_rebuild.assert_not_called()
+
+    def test_autocomplete_brand_change_does_not_count_products(self):
+        """
+        Test that a new brand is suggested without grouping the product table again.
+        """
+        self.suggest("l")
+        Brand.objects.create(name="Lux", description="Test Brand Description")
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.suggest("l")["brands"], ["Lumo", "Lux"])
+        self.assertFalse(any("GROUP BY" in query["sql"] for query in queries.captured_queries))
+
+    def test_autocomplete_before_first_build(self):
+        """
+        Test that a process still building its product index suggests brands and categories only.
+        """
+        with patch.object(autocomplete, "schedule_rebuild") as schedule_rebuild:
+            self.assertEqual(self.suggest("l"), {"products": [], "brands": ["Lumo"], "categories": ["Lamps"]})
+        schedule_rebuild.assert_called_once()
+
+    def test_autocomplete_invalid_query(self):
+        """
+        Test that a missing prefix or an out-of-range limit is rejected.
+        """
+        response = self.client.get(reverse("product-autocomplete"))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(reverse("product-autocomplete"), {"q": "la", "limit": 500})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ProductBatchTestCase(APITestCase):
+    """
+    Test case for retrieving several products by ID at once.
+    """
+
+    def setUp(self):
+        """
+        Set up test data including a brand, a category, and three products.
+        """
+        self.brand = Brand.objects.create(name="Test Brand", description="Test Brand Description")
+        self.category = Category.objects.create(name="Test Category", description="Test Category Description")
+        self.products = [
+            Product.objects.create(
+                name=f"Test Product {index}",
+                description="Test Product Description",
+                price=10,
+                stock=5,
+                category=self.category,
+                brand=self.brand
+            )
+            for index in range(3)
+        ]
+        stats.reset()
+
+    def batch(self, ids, **params):
+        response = self.client.get(reverse("product-batch"), {"ids": ",".join(map(str, ids)), **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_batch_in_request_order(self):
+        """
+        Test that products come back in the order requested, with unknown IDs reported as missing.
+        """
+        first, second, third = [product.id for product in self.products]
+
+        data = self.batch([third, 0, first, third])
+
+        self.assertEqual([product["id"] for product in data["results"]], [third, first])
+        self.assertEqual(data["missing"], [0])
+        self.assertEqual(
+            data["results"][1], self.client.get(reverse("product", args=(first,))).data
+        )
+
+    def test_batch_queries_only_cache_misses(self):
+        """
+        Test that cached products are not queried again, including those cached by the detail view.
+        """
+        first, second, third = [product.id for product in self.products]
+        self.client.get(reverse("product", args=(first,)))
+        self.batch([second])
+
+        with CaptureQueriesContext(connection) as queries:
+            data = self.batch([first, second, third])
+
+        self.assertEqual([product["id"] for product in data["results"]], [first, second, third])
+        product_queries = [query["sql"] for query in queries if '"products_app_product"' in query["sql"]]
+        # The revisions of all three, then the one that missed.
+        self.assertEqual(len(product_queries), 2)
+        self.assertIn(f"IN ({third})", product_queries[1])
+        with self.assertNumQueries(1):
+            self.batch([third, first])
+
+    def test_batch_sparse_fields(self):
+        """
+        Test that ?fields= applies to every product and is cached separately.
+        """
+        first = self.products[0].id
+        self.batch([first])
+
+        data = self.batch([first], fields="id,name")
+
+        self.assertEqual(data["results"], [{"id": first, "name": "Test Product 0"}])
+
+    def test_batch_invalidated_on_save(self):
+        """
+        Test that saving a product invalidates its cached entry.
+        """
+        product = self.products[0]
+        self.batch([product.id])
+        product.name = "Edited"
+        product.save()
+
+        self.assertEqual(self.batch([product.id])["results"][0]["name"], "Edited")
+
+    def test_batch_invalid_ids(self):
+        """
+        Test that malformed, empty, or too many IDs are rejected.
+        """
+        for ids in ["1,x", "", ",".join(map(str, range(1, 300)))]:
+            response = self.client.get(reverse("product-batch"), {"ids": ids})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@patch("products_app.deletion.BATCH_PAUSE", 0)
+@patch("products_app.deletion.BATCH_SIZE", 2)
+class DeletionJobTestCase(APITestCase):
+    """
+    Test case for deleting brands and categories with many products in the background.
+    """
+
+    def setUp(self):
+        """
+        Set up test data including an admin, two brands, a category, products, and a review.
+        """
+        self.admin_user = User.objects.create_superuser(username="test_admin_user", password="password")
+        self.brand = Brand.objects.create(name="Big Brand", description="Test Brand Description")
+        self.small_brand = Brand.objects.create(name="Small Brand", description="Test Brand Description")
+        self.category = Category.objects.create(name="Test Category", description="Test Category Description")
+        self.products = [
+            Product.objects.create(
+                name=f"Product {i}",
+                description="Test Product Description",
+                price=10,
+                stock=5,
+                category=self.category,
+                brand=self.brand if i < 5 else self.small_brand
+            )
+            for i in range(6)
+        ]
+        ProductReview.objects.create(product=self.products[0], user=self.admin_user, rating=4, description="Good.")
+        self.client.force_authenticate(self.admin_user)
+        catalog.clear()
+        patcher = patch.object(catalog, "schedule_reload", catalog.reload)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def listed_ids(self):
+        response = self.client.get(reverse("products"))
+        return {product["id"] for product in response.data["results"]}
+
+    def test_small_brand_deleted_immediately(self):
+        """
+        Test that a brand with few products is still deleted within the request.
+        """
+        response = self.client.delete(reverse("brand-delete", args=(self.small_brand.id,)))
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Brand.objects.filter(pk=self.small_brand.id).exists())
+        self.assertFalse(DeletionJob.objects.exists())
+
+    def test_large_brand_hidden_then_deleted_in_batches(self):
+        """
+        Test that a large brand is hidden at once, then deleted with its products by the job.
+        """
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.delete(reverse("brand-delete", args=(self.brand.id,)))
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual((response.data["status"], response.data["products_total"]), ("pending", 5))
+        self.assertTrue(callbacks)
+        self.assertEqual(self.client.get(reverse("brand", args=(self.brand.id,))).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual([brand["id"] for brand in self.client.get(reverse("brands")).data], [self.small_brand.id])
+        self.assertEqual(self.listed_ids(), {self.products[5].id})
+        response = self.client.get(reverse("product", args=(self.products[0].id,)))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.delete(reverse("brand-delete", args=(self.brand.id,)))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        job = run_deletion_job(DeletionJob.objects.get().pk)
+
+        self.assertEqual((job.status, job.products_deleted), ("done", 5))
+        self.assertFalse(Brand.objects.filter(pk=self.brand.id).exists())
+        self.assertEqual(Product.objects.count(), 1)
+        self.assertFalse(ProductReview.objects.exists())
+        response = self.client.get(reverse("deletion-job", args=(job.pk,)))
+        self.assertEqual((response.data["status"], response.data["products_deleted"]), ("done", 5))
+
+    @override_settings(PRODUCT_CATALOG_SNAPSHOT=True)
+    def test_category_being_deleted_hidden_from_snapshot(self):
+        """
+        Test that the catalog snapshot hides the products of a category being deleted.
+        """
+        self.assertEqual(len(self.listed_ids()), 6)
+
+        response = self.client.delete(reverse("category-delete", args=(self.category.id,)))
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(self.listed_ids(), set())
+        response = self.client.get(reverse("products"), {"category_id": self.category.id})
+        self.assertEqual(response.data["results"], [])
+
+    def test_brand_being_deleted_hidden_from_autocomplete_and_export(self):
+        """
+        Test that suggestions and the export leave out the products of a brand being deleted.
+        """
+        autocomplete.clear()
+        patcher = patch.object(autocomplete, "schedule_rebuild", autocomplete.rebuild)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.assertEqual(len(autocomplete.suggest("Product")["products"]), 6)
+
+        response = self.client.delete(reverse("brand-delete", args=(self.brand.id,)))
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        suggested = [entry["id"] for entry in autocomplete.suggest("Product")["products"]]
+        self.assertEqual(suggested, [self.products[5].id])
+        response = self.client.get(reverse("product-export"))
+        exported = [json.loads(line)["id"] for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual(exported, [self.products[5].id])
+
+    def test_interrupted_job_resumes(self):
+        """
+        Test that running a job again carries on with the products left.
+        """
+        self.client.delete(reverse("brand-delete", args=(self.brand.id,)))
+        job = DeletionJob.objects.get()
+        Product.objects.filter(pk=self.products[0].id).delete()
+        DeletionJob.objects.filter(pk=job.pk).update(
+            status="running", products_deleted=1, updated_at=timezone.now() - STALE_AFTER * 2
+        )
+
+        call_command("run_deletion_jobs", stdout=StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.products_deleted), ("done", 5))
+        self.assertFalse(Brand.objects.filter(pk=self.brand.id).exists())
+
+    def test_running_job_not_claimed_twice(self):
+        """
+        Test that a job another runner is working on is left to it, and that only products actually deleted are counted.
+        """
+        self.client.delete(reverse("brand-delete", args=(self.brand.id,)))
+        job = DeletionJob.objects.get()
+        DeletionJob.objects.filter(pk=job.pk).update(status="running", updated_at=timezone.now())
+        out = StringIO()
+
+        call_command("run_deletion_jobs", stdout=out)
+
+        self.assertIn("skipped", out.getvalue())
+        self.assertIsNone(run_deletion_job(job.pk))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.products_deleted), ("running", 0))
+        self.assertEqual(Product.objects.filter(brand=self.brand).count(), 5)
+
+        DeletionJob.objects.filter(pk=job.pk).update(status="failed")
+        Product.objects.filter(pk__in=[product.id for product in self.products[:2]]).delete()
+        job = run_deletion_job(job.pk)
+
+        self.assertEqual((job.status, job.products_deleted), ("done", 3))
+
+    def test_job_status_admin_only(self):
+        """
+        Test that the job status is not public.
+        """
+        self.client.delete(reverse("brand-delete", args=(self.brand.id,)))
+        self.client.force_authenticate(None)
+
+        response = self.client.get(reverse("deletion-job", args=(DeletionJob.objects.get().pk,)))
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class CatalogChangeFeedTestCase(APITestCase):
+    """
+    Test case for the catalog change feed.
+    """
+
+    def setUp(self):
+        """
+        Set up test data including an admin, a brand, a category, and products.
+        """
+        self.admin_user = User.objects.create_superuser(username="test_admin_user", password="password")
+        self.brand = Brand.objects.create(name="Test Brand", description="Test Brand Description")
+        self.category = Category.objects.create(name="Test Category", description="Test Category Description")
+        self.products = [
+            Product.objects.create(
+                name=f"Product {i}",
+                description="Test Product Description",
+                price=10,
+                stock=5,
+                category=self.category,
+                brand=self.brand
+            )
+            for i in range(3)
+        ]
+        self.client.force_authenticate(self.admin_user)
+
+    def changes(self, **params):
+        response = self.client.get(reverse("catalog-changes"), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_changes_from_start(self):
+        """
+        Test that the feed lists every object written, with its data.
+        """
+        data = self.changes()
+
+        entries = [(entry["type"], entry["id"], entry["action"]) for entry in data["results"]]
+        self.assertEqual(entries, [
+            ("brand", self.brand.id, "upsert"),
+            ("category", self.category.id, "upsert"),
+            *[("product", product.id, "upsert") for product in self.products],
+        ])
+        self.assertEqual(data["results"][2]["data"]["name"], "Product 0")
+        self.assertEqual(data["cursor"], data["results"][-1]["sequence"])
+        self.assertFalse(data["has_more"])
+
+    def test_edit_moves_object_to_end(self):
+        """
+        Test that an edit replaces the object's entry with a later one.
+        """
+        cursor = self.changes()["cursor"]
+
+        response = self.client.patch(reverse("product-edit", args=(self.products[0].id,)), {"name": "Renamed"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        data = self.changes(since=cursor)
+        self.assertEqual([(entry["id"], entry["data"]["name"]) for entry in data["results"]],
+                         [(self.products[0].id, "Renamed")])
+        self.assertEqual([entry["id"] for entry in self.changes()["results"]][-1], self.products[0].id)
+        self.assertEqual(CatalogChange.objects.filter(target="product").count(), 3)
+
+    def test_delete_leaves_tombstone(self):
+        """
+        Test that deleting a product records a deletion without data.
+        """
+        cursor = self.changes()["cursor"]
+
+        response = self.client.delete(reverse("product-delete", args=(self.products[1].id,)))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        entry, = self.changes(since=cursor)["results"]
+        self.assertEqual((entry["type"], entry["id"], entry["action"], entry["data"]),
+                         ("product", self.products[1].id, "delete", None))
+
+    def test_new_brand_sent_with_stale_lookup(self):
+        """
+        Test that a brand missing from this process's lookup copy is still sent as an upsert with its data.
+        """
+        cursor = self.changes()["cursor"]
+        stale = lookups.brands.current()
+        brand = Brand.objects.create(name="New Brand", description="Test Brand Description")
+
+        with patch.object(lookups.brands, "current", return_value=stale):
+            entry, = self.changes(since=cursor)["results"]
+
+        self.assertEqual((entry["type"], entry["id"], entry["action"]), ("brand", brand.id, "upsert"))
+        self.assertEqual(entry["data"], BrandSerializer(brand).data)
+
+    def test_bulk_update_recorded(self):
+        """
+        Test that the bulk update, which sends no signals, records its changes.
+        """
+        cursor = self.changes()["cursor"]
+        data = [{"id": self.products[0].id, "price": "12.50"}, {"id": self.products[2].id, "stock_delta": 1}]
+
+        self.client.post(reverse("product-bulk-update"), data, format="json")
+
+        results = self.changes(since=cursor)["results"]
+        self.assertEqual({entry["id"] for entry in results}, {self.products[0].id, self.products[2].id})
+        self.assertEqual({entry["data"]["price"] for entry in results}, {"12.50", "10.00"})
+
+    def test_empty_delta_single_query(self):
+        """
+        Test that a client that is up to date costs a single query.
+        """
+        cursor = self.changes()["cursor"]
+
+        with self.assertNumQueries(1):
+            data = self.changes(since=cursor)
+
+        self.assertEqual((data["results"], data["cursor"], data["has_more"]), ([], cursor, False))
+
+    def test_limit_and_has_more(self):
+        """
+        Test that a limited page reports that more changes follow.
+        """
+        first = self.changes(limit=2)
+        second = self.changes(since=first["cursor"], limit=2)
+        third = self.changes(since=second["cursor"], limit=2)
+
+        self.assertTrue(first["has_more"] and second["has_more"])
+        self.assertFalse(third["has_more"])
+        self.assertEqual(len(first["results"]) + len(second["results"]) + len(third["results"]), 5)
+
+    def test_invalid_parameters(self):
+        """
+        Test that a negative cursor or a limit out of range is rejected.
+        """
+        for params in ({"since": -1}, {"limit": 0}, {"limit": 501}):
+            response = self.client.get(reverse("catalog-changes"), params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
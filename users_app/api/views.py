@@ -7,6 +7,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 
+from ecomm.fast_serialization import serialize_queryset
 from users_app.signals import *
 
 from .serializers import *
@@ -80,9 +81,9 @@ def list_profiles_view(request):
     """
     profiles = Profile.objects.all()
         
-    serializer = ProfileViewSerializer(profiles, many=True)
+    data = serialize_queryset(ProfileViewSerializer(), profiles)
     
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    return Response(data, status=status.HTTP_200_OK)
 
 
 @extend_schema(
@@ -1,8 +1,10 @@
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
 
+from users_app.api.serializers import ProfileViewSerializer
 from users_app.models import *
 
 
@@ -200,6 +202,9 @@ class UserTestCase(APITestCase):
         response = self.client.get(reverse("profiles"))
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.content, JSONRenderer().render(ProfileViewSerializer(Profile.objects.all(), many=True).data)
+        )
 
     def test_retrieve_single_profile(self):
         """